@@ -0,0 +1,228 @@
+"""
+End-to-end cast benchmark.
+
+Builds the fixture repositories, starts the local OpenAI-compatible stub
+server and runs RepoCaster.cast on each fixture in a fresh child process.
+Reports per-stage wall time, peak RSS and model tokens, and compares them
+with a stored baseline.
+
+    python benchmarks/bench.py                      # all fixtures
+    python benchmarks/bench.py esm_like --delay 0.2
+    python benchmarks/bench.py --save_baseline      # refresh baseline.json
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import resource
+import subprocess
+import urllib.request
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from fixtures import FIXTURES
+from stub_server import start_stub_server
+
+RESULT_MARKER = "BENCH_RESULT "
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+
+
+def run_child(repo_path, output_dir, model_url, cast_options):
+    """Cast one fixture (runs inside the child process)."""
+    from repocaster.core import RepoCaster
+    from repocaster.scheduler import configure_scheduler
+
+    # The stub has no rate limits; keep the scheduler out of the measurement.
+    configure_scheduler(requests_per_minute=100000, max_concurrency=64)
+    caster = RepoCaster(
+        repo_path,
+        output_dir=output_dir,
+        model_name="stub-model",
+        model_url=model_url,
+        model_api_key="stub",
+        **cast_options,
+    )
+    started = time.perf_counter()
+    caster.cast()
+    total = time.perf_counter() - started
+    result = {
+        "total_seconds": round(total, 4),
+        "stages": caster.timer.report(),
+        "peak_rss_mb": round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0, 1
+        ),
+        "ok": os.path.exists(os.path.join(output_dir, "server.py")),
+    }
+    print(RESULT_MARKER + json.dumps(result), flush=True)
+
+
+def _stub_stats(model_url):
+    with urllib.request.urlopen(model_url + "/stats") as response:
+        return json.load(response)
+
+
+def _stub_reset(model_url):
+    request = urllib.request.Request(model_url + "/reset", data=b"{}", method="POST")
+    urllib.request.urlopen(request).close()
+
+
+def bench_fixture(name, repo_path, work_dir, model_url, cast_options):
+    output_dir = os.path.join(work_dir, "out", name)
+    _stub_reset(model_url)
+    proc = subprocess.run(
+        [
+            sys.executable,
+            os.path.abspath(__file__),
+            "--child",
+            repo_path,
+            "--output_dir",
+            output_dir,
+            "--model_url",
+            model_url,
+            "--cast_options",
+            json.dumps(cast_options),
+        ],
+        capture_output=True,
+        text=True,
+        cwd=work_dir,  # keep stray files (e.g. graph renders) out of the tree
+    )
+    lines = [l for l in proc.stdout.splitlines() if l.startswith(RESULT_MARKER)]
+    if proc.returncode != 0 or not lines:
+        sys.stderr.write(proc.stdout[-4000:] + proc.stderr[-4000:])
+        raise RuntimeError(f"Benchmark child failed for {name}")
+    result = json.loads(lines[-1][len(RESULT_MARKER) :])
+    result["tokens"] = _stub_stats(model_url)
+    return result
+
+
+def _delta(current, baseline):
+    if not baseline:
+        return ""
+    return f" ({(current - baseline) / baseline * 100:+.0f}%)"
+
+
+def print_report(results, baseline):
+    for name, result in results.items():
+        base = baseline.get(name, {})
+        base_stages = base.get("stages", {})
+        tokens = result["tokens"]
+        base_tokens = base.get("tokens", {})
+        print(f"\n=== {name} {'' if result['ok'] else '(FAILED: no server.py)'}")
+        print(f"{'stage':<20}{'calls':>6}{'seconds':>12}")
+        for stage, data in result["stages"].items():
+            base_seconds = base_stages.get(stage, {}).get("seconds")
+            print(
+                f"{stage:<20}{data['calls']:>6}{data['seconds']:>12.3f}"
+                f"{_delta(data['seconds'], base_seconds)}"
+            )
+        print(
+            f"{'total':<26}{result['total_seconds']:>12.3f}"
+            f"{_delta(result['total_seconds'], base.get('total_seconds'))}"
+        )
+        print(
+            f"peak RSS: {result['peak_rss_mb']} MB"
+            f"{_delta(result['peak_rss_mb'], base.get('peak_rss_mb'))}"
+        )
+        print(
+            f"model calls: {tokens['calls']}, prompt tokens: {tokens['prompt_tokens']}"
+            f"{_delta(tokens['prompt_tokens'], base_tokens.get('prompt_tokens'))}, "
+            f"completion tokens: {tokens['completion_tokens']}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark RepoCaster.cast end to end."
+    )
+    parser.add_argument(
+        "fixtures",
+        nargs="*",
+        default=list(FIXTURES),
+        help=f"Fixtures to run (default: all of {', '.join(FIXTURES)}).",
+    )
+    parser.add_argument(
+        "--delay",
+        type=float,
+        default=0.05,
+        help="Stub latency per model call in seconds (default: 0.05).",
+    )
+    parser.add_argument(
+        "--delay_per_1k_tokens",
+        type=float,
+        default=0.0,
+        help="Extra stub latency per 1k completion tokens (default: 0).",
+    )
+    parser.add_argument(
+        "--baseline", default=DEFAULT_BASELINE, help="Baseline JSON to compare against."
+    )
+    parser.add_argument(
+        "--save_baseline",
+        action="store_true",
+        help="Write this run's results to the baseline file.",
+    )
+    parser.add_argument(
+        "--keep",
+        action="store_true",
+        help="Keep the temporary fixture and output directories.",
+    )
+    parser.add_argument(
+        "--speculative", action="store_true", help="Cast with speculative refinement."
+    )
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--cast_options", default="{}", help=argparse.SUPPRESS)
+    parser.add_argument("--output_dir", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--model_url", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return run_child(
+            args.child, args.output_dir, args.model_url, json.loads(args.cast_options)
+        )
+
+    unknown = set(args.fixtures) - set(FIXTURES)
+    if unknown:
+        parser.error(f"Unknown fixtures: {sorted(unknown)}")
+
+    cast_options = {"speculative": args.speculative}
+    server, _, model_url = start_stub_server(
+        delay=args.delay, delay_per_1k_tokens=args.delay_per_1k_tokens
+    )
+    work_dir = tempfile.mkdtemp(prefix="repocaster-bench-")
+    results = {}
+    try:
+        for name in args.fixtures:
+            print(f"🏗️ Building fixture {name}...")
+            repo_path = FIXTURES[name](os.path.join(work_dir, "fixtures"))
+            print(f"⏱️ Casting {name}...")
+            results[name] = bench_fixture(
+                name, repo_path, work_dir, model_url, cast_options
+            )
+    finally:
+        server.shutdown()
+        if args.keep:
+            print(f"Kept benchmark files in {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+
+    if args.save_baseline:
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"\n💾 Baseline saved to {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
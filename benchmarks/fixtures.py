@@ -0,0 +1,235 @@
+"""
+Fixture repositories for the cast benchmark, generated on demand so the
+tree stays small. Each builder writes a deterministic repository layout
+into `root` and returns its path.
+"""
+
+import os
+import json
+import random
+
+ARGPARSE_SCRIPT = """import argparse
+
+
+def main(args):
+    print("running", args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="{description}")
+{arguments}
+    main(parser.parse_args())
+"""
+
+LIBRARY_MODULE = '''"""{description}"""
+
+
+def {name}_forward(x, scale=1.0):
+    """Apply the {name} transform."""
+    return x * scale
+
+
+def {name}_load(path):
+    """Load {name} weights from path."""
+    return path
+
+
+class {cls}:
+    def __init__(self, dim):
+        self.dim = dim
+
+    def forward(self, x):
+        return {name}_forward(x)
+'''
+
+
+def _write(root, rel_path, content):
+    path = os.path.join(root, rel_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    mode = "wb" if isinstance(content, bytes) else "w"
+    with open(path, mode) as f:
+        f.write(content)
+
+
+def _script(description, args):
+    lines = []
+    for name, type_name, required, help_text in args:
+        extra = f", type={type_name}" if type_name else ""
+        extra += ", required=True" if required else ", default=None"
+        lines.append(f'    parser.add_argument("--{name}"{extra}, help="{help_text}")')
+    return ARGPARSE_SCRIPT.format(description=description, arguments="\n".join(lines))
+
+
+def _weights(root, rel_path, size_mb, seed):
+    rng = random.Random(seed)
+    _write(root, rel_path, rng.randbytes(int(size_mb * 1024 * 1024)))
+
+
+def build_proteinmpnn_like(root, weights_mb=30):
+    """Main inference script with many flags, helper preprocessing scripts, weights."""
+    repo = os.path.join(root, "ProteinMPNN")
+    run_args = [("pdb_path", None, False, "Path to a single PDB to be designed")]
+    run_args += [
+        ("jsonl_path", None, False, "Path to a folder with parsed pdb into jsonl")
+    ]
+    run_args += [("out_folder", None, True, "Path to a folder to output sequences")]
+    run_args += [("num_seq_per_target", "int", False, "Number of sequences per target")]
+    run_args += [("sampling_temp", None, False, "Sampling temperatures")]
+    run_args += [("seed", "int", False, "Random seed")]
+    run_args += [
+        (f"option_{i}", "float" if i % 3 else "int", False, f"Tuning option {i}")
+        for i in range(30)
+    ]
+    _write(repo, "protein_mpnn_run.py", _script("ProteinMPNN inference", run_args))
+    _write(
+        repo,
+        "protein_mpnn_utils.py",
+        LIBRARY_MODULE.format(
+            description="ProteinMPNN model utilities", name="mpnn", cls="ProteinMPNN"
+        ),
+    )
+    helpers = {
+        "parse_multiple_chains.py": "Parse PDB files into jsonl",
+        "assign_fixed_chains.py": "Assign designed and fixed chains",
+        "make_fixed_positions_dict.py": "Build fixed positions dictionary",
+        "make_tied_positions_dict.py": "Build tied positions dictionary",
+    }
+    for name, description in helpers.items():
+        _write(
+            repo,
+            f"helper_scripts/{name}",
+            _script(
+                description,
+                [
+                    ("input_path", None, True, "Input path"),
+                    ("output_path", None, True, "Output path"),
+                    ("chain_list", None, False, "Chains to use"),
+                ],
+            ),
+        )
+    for i in range(1, 6):
+        _write(
+            repo,
+            f"examples/submit_example_{i}.sh",
+            (
+                "#!/bin/bash\n"
+                "python ../helper_scripts/parse_multiple_chains.py --input_path=../inputs/ "
+                "--output_path=parsed.jsonl\n"
+                f"python ../protein_mpnn_run.py --jsonl_path parsed.jsonl --out_folder out_{i} "
+                "--num_seq_per_target 8 --sampling_temp 0.1 --seed 37\n"
+            ),
+        )
+    for i in range(20):
+        _write(repo, f"inputs/PDB_monomers/pdbs/{i:04d}.pdb", "ATOM  " * 2000 + "\n")
+    for name in ("v_48_002", "v_48_010", "v_48_020", "v_48_030"):
+        _weights(repo, f"vanilla_model_weights/{name}.pt", weights_mb / 4, name)
+    _write(
+        repo,
+        "README.md",
+        "# ProteinMPNN\n\nRun `protein_mpnn_run.py` after "
+        "`helper_scripts/parse_multiple_chains.py`.\n" + "Details. " * 300,
+    )
+    return repo
+
+
+def build_esm_like(root, weights_mb=10):
+    """Library-heavy package with a handful of scripts and notebook examples."""
+    repo = os.path.join(root, "esm")
+    for name in ("pretrained", "model", "data", "inverse_folding", "utils", "api"):
+        for j in range(6):
+            _write(
+                repo,
+                f"esm/{name}/{name}_{j}_model.py",
+                LIBRARY_MODULE.format(
+                    description=f"{name} module {j}", name=f"{name}{j}", cls=f"Esm{j}"
+                ),
+            )
+    scripts = {
+        "scripts/extract.py": "Extract per-token representations",
+        "scripts/fold.py": "Predict structure with ESMFold",
+        "scripts/variant_prediction/predict.py": "Score variant effects",
+        "esm/inverse_folding/sample_sequences.py": "Sample sequences for a structure",
+        "esm/inverse_folding/score_log_likelihoods.py": "Score sequences for a structure",
+    }
+    for rel_path, description in scripts.items():
+        _write(
+            repo,
+            rel_path,
+            _script(
+                description,
+                [
+                    ("model_location", None, True, "Model name or path"),
+                    ("fasta_file", None, True, "FASTA input"),
+                    ("output_dir", None, True, "Output directory"),
+                    ("toks_per_batch", "int", False, "Tokens per batch"),
+                    ("repr_layers", "int", False, "Layers to extract"),
+                ],
+            ),
+        )
+    notebook = {
+        "cells": [
+            {
+                "cell_type": "code",
+                "source": [
+                    "!python scripts/extract.py esm2_t33_650M_UR50D examples/data/some_proteins.fasta out\n"
+                ],
+            }
+        ]
+    }
+    for name in (
+        "sup_variant_prediction",
+        "contact_prediction",
+        "esm_structural_dataset",
+    ):
+        _write(repo, f"examples/{name}.ipynb", json.dumps(notebook) + " " * 200)
+    _weights(repo, "weights/esm2_t6_8M_UR50D.pt", weights_mb, "esm")
+    _write(
+        repo,
+        "README.md",
+        "# ESM\n\nUse `scripts/extract.py` and `scripts/fold.py`.\n"
+        + "Details. " * 300,
+    )
+    return repo
+
+
+def build_monorepo(root, packages=40, modules=25, scripts_per_package=3):
+    """Large synthetic tree to stress the AST scan and context gathering."""
+    repo = os.path.join(root, "monorepo")
+    for p in range(packages):
+        for m in range(modules):
+            _write(
+                repo,
+                f"pkg_{p:03d}/lib/module_{m:03d}_utils.py",
+                LIBRARY_MODULE.format(
+                    description=f"package {p} module {m}",
+                    name=f"p{p}m{m}",
+                    cls=f"Model{p}x{m}",
+                ),
+            )
+        for s in range(scripts_per_package):
+            kind = ("run", "predict", "train")[s % 3]
+            _write(
+                repo,
+                f"pkg_{p:03d}/scripts/{kind}_{p:03d}_{s}.py",
+                _script(
+                    f"{kind} entry point {s} of package {p}",
+                    [
+                        (f"arg_{i}", "int" if i % 2 else None, i == 0, f"Argument {i}")
+                        for i in range(12)
+                    ],
+                ),
+            )
+        _write(
+            repo,
+            f"pkg_{p:03d}/examples/run_{p:03d}.sh",
+            f"python pkg_{p:03d}/scripts/run_{p:03d}_0.py --arg_0 x --arg_1 3\n" * 3,
+        )
+    _write(repo, "README.md", "# Monorepo\n\n" + "A large synthetic monorepo. " * 200)
+    return repo
+
+
+FIXTURES = {
+    "proteinmpnn_like": build_proteinmpnn_like,
+    "esm_like": build_esm_like,
+    "monorepo": build_monorepo,
+}
@@ -0,0 +1,295 @@
+"""
+Minimal OpenAI-compatible chat completions server for offline benchmarks.
+
+It recognises which RepoCaster node sent a prompt and returns canned, well
+formed JSON, Markdown or Python built from the script paths found in the
+prompt, after a configurable delay. Streaming (SSE) is supported.
+"""
+
+import re
+import sys
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import tiktoken
+
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+
+    def count_tokens(text):
+        return len(_ENCODING.encode(text, disallowed_special=()))
+
+except Exception:  # tiktoken missing or its data can't be downloaded
+
+    def count_tokens(text):
+        return max(1, len(text) // 4)
+
+
+PATH_PATTERN = re.compile(r"([\w./-]+\.py)\b")
+TOOL_NAME_PATTERN = re.compile(r"^TOOL (\S+)", re.MULTILINE)
+
+
+def _script_paths(text, limit=6):
+    seen = []
+    for path in PATH_PATTERN.findall(text):
+        if path not in seen:
+            seen.append(path)
+    return seen[:limit]
+
+
+def _tool(path):
+    name = path.rsplit("/", 1)[-1].replace(".py", "")
+    return {
+        "tool_name": name,
+        "script_path": path,
+        "description": f"Run {name}.",
+        "args": [
+            {
+                "name": "input_path",
+                "type": "string",
+                "required": True,
+                "description": "Input file or directory",
+            },
+            {
+                "name": "output_path",
+                "type": "string",
+                "required": False,
+                "description": "Where to write results",
+                "default": None,
+            },
+        ],
+    }
+
+
+def canned_response(prompt):
+    """Response text for a rendered RepoCaster prompt."""
+    if "Golden Workflows" in prompt:
+        section = prompt.split("USAGE EXAMPLES", 1)[0]
+        return json.dumps(
+            {
+                "workflows": [
+                    {
+                        "task_name": p.rsplit("/", 1)[-1][:-3],
+                        "target_script_path": p,
+                        "description": f"Run {p}.",
+                        "essential_args": ["input_path"],
+                        "notes": f"Step {i}.",
+                    }
+                    for i, p in enumerate(_script_paths(section, 3), 1)
+                ]
+            }
+        )
+    if "API Architect" in prompt:
+        section = prompt.split("WORKFLOW INSIGHTS", 1)[0]
+        return json.dumps({"tools": [_tool(p) for p in _script_paths(section)]})
+    if "QA Lead" in prompt:
+        return json.dumps({"approved": True, "missing_paths": []})
+    if "Generate or Revise" in prompt:
+        return json.dumps({"tools": [_tool(p) for p in _script_paths(prompt)]})
+    if "Python Expert" in prompt:
+        names = TOOL_NAME_PATTERN.findall(prompt) or ["run_tool"]
+        functions = "\n\n".join(
+            f"@mcp.tool()\nasync def {n}(input_path: str, output_path: str = None) -> str:\n"
+            f'    """Run {n}."""\n'
+            f'    cmd = ["python", "{n}.py", "--input_path", input_path]\n'
+            f'    return (await run_script("{n}", cmd)).stdout\n'
+            for n in names
+        )
+        return (
+            "import os\nimport asyncio\nimport subprocess\nfrom mcp.server.fastmcp import FastMCP\n\n"
+            'mcp = FastMCP("stub")\n\n\n'
+            "async def run_script(tool_name, cmd, check=False):\n"
+            "    proc = await asyncio.create_subprocess_exec(\n"
+            "        *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE\n"
+            "    )\n"
+            "    stdout, stderr = await proc.communicate()\n"
+            "    return subprocess.CompletedProcess(cmd, proc.returncode, stdout.decode(), stderr.decode())\n"
+            "\n\n" + functions + "\n\n"
+            'if __name__ == "__main__":\n    mcp.run()\n'
+        )
+    if "User Guide" in prompt:
+        return "A concise section.\n\n- Step one\n- Step two\n" * 5
+    return "{}"
+
+
+class StubState:
+    def __init__(self, delay=0.0, delay_per_1k_tokens=0.0):
+        self.delay = delay
+        self.delay_per_1k_tokens = delay_per_1k_tokens
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.calls = 0
+            self.prompt_tokens = 0
+            self.completion_tokens = 0
+
+    def record(self, prompt_tokens, completion_tokens):
+        with self.lock:
+            self.calls += 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+
+    def stats(self):
+        with self.lock:
+            return {
+                "calls": self.calls,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+            }
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send_json(self, payload, status=200):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path.rstrip("/").endswith("/stats"):
+                return self._send_json(state.stats())
+            self._send_json({"error": "not found"}, status=404)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if self.path.rstrip("/").endswith("/reset"):
+                state.reset()
+                return self._send_json({"ok": True})
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                return self._send_json({"error": "not found"}, status=404)
+
+            prompt = "\n".join(
+                m.get("content") or ""
+                for m in request.get("messages", [])
+                if isinstance(m.get("content"), str)
+            )
+            content = canned_response(prompt)
+            prompt_tokens = count_tokens(prompt)
+            completion_tokens = count_tokens(content)
+            state.record(prompt_tokens, completion_tokens)
+            delay = state.delay + state.delay_per_1k_tokens * completion_tokens / 1000
+            usage = {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            }
+            model = request.get("model", "stub")
+
+            if not request.get("stream"):
+                time.sleep(delay)
+                return self._send_json(
+                    {
+                        "id": "chatcmpl-stub",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": model,
+                        "choices": [
+                            {
+                                "index": 0,
+                                "finish_reason": "stop",
+                                "message": {"role": "assistant", "content": content},
+                            }
+                        ],
+                        "usage": usage,
+                    }
+                )
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            pieces = [content[i : i + 64] for i in range(0, len(content), 64)] or [""]
+            for piece in pieces:
+                time.sleep(delay / len(pieces))
+                self._event(
+                    {
+                        "choices": [
+                            {
+                                "index": 0,
+                                "delta": {"content": piece},
+                                "finish_reason": None,
+                            }
+                        ]
+                    },
+                    model,
+                )
+            self._event(
+                {
+                    "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                    "usage": usage,
+                },
+                model,
+            )
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+            self.close_connection = True
+
+        def _event(self, payload, model):
+            payload.update(
+                {
+                    "id": "chatcmpl-stub",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                }
+            )
+            self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+    return Handler
+
+
+def start_stub_server(host="127.0.0.1", port=0, delay=0.0, delay_per_1k_tokens=0.0):
+    """Start the stub in a daemon thread; returns (server, state, base_url)."""
+    state = StubState(delay, delay_per_1k_tokens)
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state, f"http://{host}:{server.server_address[1]}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="OpenAI-compatible stub for RepoCaster."
+    )
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--delay",
+        type=float,
+        default=0.0,
+        help="Seconds added to every response (default: 0).",
+    )
+    parser.add_argument(
+        "--delay_per_1k_tokens",
+        type=float,
+        default=0.0,
+        help="Extra seconds per 1k completion tokens (default: 0).",
+    )
+    args = parser.parse_args()
+    server, _, url = start_stub_server(
+        port=args.port, delay=args.delay, delay_per_1k_tokens=args.delay_per_1k_tokens
+    )
+    print(f"Stub server listening on {url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
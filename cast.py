@@ -4,7 +4,17 @@ import os
 # Ensure local modules can be imported
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from repocaster.core import RepoCaster
+# Only lightweight modules here; repocaster.core (and with it LangChain) is
+# imported after argument parsing so `--help` stays fast.
+from repocaster.scheduler import configure_scheduler
+from repocaster.cassette import Cassette
+from repocaster.ingest import LOCAL_MODES, repo_name_for
+from repocaster.models import (
+    ModelConfig,
+    NODE_NAMES,
+    load_model_config,
+    resolve_node_models,
+)
 import argparse
 
 
@@ -13,8 +23,34 @@ def main():
         description="Run RepoCaster on a GitHub repository or local path."
     )
     parser.add_argument(
-        "repo_input", help="GitHub repository URL or local path to the repository."
+        "repo_input",
+        nargs="?",
+        help="GitHub repository URL, local path, or .tar.gz/.zip snapshot of the repository.",
     )  # https://github.com/facebookresearch/esm
+    parser.add_argument(
+        "--batch",
+        default=None,
+        metavar="MANIFEST",
+        help="Cast every repository in a JSON (or one-per-line) manifest instead.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Concurrent casts in --batch mode (default: 4).",
+    )
+    parser.add_argument(
+        "--variants",
+        default=None,
+        metavar="FILE",
+        help="Cast the repository once per model variant in a JSON file, concurrently.",
+    )
+    parser.add_argument(
+        "--models",
+        default=None,
+        help="Comma-separated model names cast concurrently against --model_url "
+        "(shorthand for --variants).",
+    )
     parser.add_argument(
         "--model_name",
         default="gpt-4o",
@@ -33,8 +69,164 @@ def main():
         action="store_true",
         help="Generate MCP server code with LangGraph-compatible return formats.",
     )
+    parser.add_argument(
+        "--worker_pool",
+        action="store_true",
+        help="Generate tools that run scripts in warm worker processes (ships worker_pool.py).",
+    )
+    parser.add_argument(
+        "--speculative",
+        action="store_true",
+        help="Refine likely scripts concurrently with workflow analysis.",
+    )
+    parser.add_argument(
+        "--mirror",
+        action="store_true",
+        help="Clone through the local git mirror cache: a full-history download once, "
+        "then incremental fetches (default: a one-off shallow clone).",
+    )
+    parser.add_argument(
+        "--sparse",
+        action="store_true",
+        help="Blob-less partial clone that checks out only .py/.sh/.ipynb/README files.",
+    )
+    parser.add_argument(
+        "--extract_all",
+        action="store_true",
+        help="Archives and --sparse clones: put every file into repo_source "
+        "(default: code, READMEs and the files the generated tools reference).",
+    )
+    parser.add_argument(
+        "--local_mode",
+        choices=LOCAL_MODES,
+        default=None,
+        help="How a local path is ingested: full copy, hard-link tree, or analyzed in place "
+        "(default: copy, or inplace with --watch).",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep polling a local repository and update the server after every change.",
+    )
+    parser.add_argument(
+        "--watch_interval",
+        type=float,
+        default=1.0,
+        help="Seconds between polls in --watch mode (default: 1).",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Recast even if the repository, models and pipeline are unchanged.",
+    )
+    parser.add_argument(
+        "--no_incremental",
+        action="store_true",
+        help="Rerun the whole pipeline instead of regenerating only the tools of changed scripts.",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="cpu",
+        default=None,
+        choices=("cpu", "memory", "all"),
+        help="Profile every stage into <output>/profile: cProfile (cpu, the default), "
+        "tracemalloc allocations (memory, slow) or both (all).",
+    )
+    parser.add_argument(
+        "--dry_run",
+        action="store_true",
+        help="Only clone and analyze; write rendered prompts and a token/cost estimate.",
+    )
+    parser.add_argument(
+        "--render_graph",
+        default=None,
+        metavar="PATH",
+        help="Write the agent graph offline: Mermaid text, or PNG for *.png (needs pygraphviz).",
+    )
+    parser.add_argument(
+        "--model_config",
+        default=None,
+        help="JSON file with per-node model routing (see README).",
+    )
+    parser.add_argument(
+        "--node_model",
+        action="append",
+        default=[],
+        metavar="NODE=MODEL",
+        help=f"Override the model of one node; repeatable. Nodes: {', '.join(NODE_NAMES)}.",
+    )
+    parser.add_argument(
+        "--hedge_model",
+        default=None,
+        help="Second model raced against slow calls (enables hedging).",
+    )
+    parser.add_argument(
+        "--hedge_url", default=None, help="URL for the hedge model API (optional)."
+    )
+    parser.add_argument(
+        "--hedge_api_key",
+        default="OPENAI_API_KEY",
+        help="Env var holding the hedge model's API key (default: OPENAI_API_KEY).",
+    )
+    parser.add_argument(
+        "--hedge_percentile",
+        type=float,
+        default=95.0,
+        help="Hedge once a call is slower than this latency percentile (default: 95).",
+    )
+    transcript = parser.add_mutually_exclusive_group()
+    transcript.add_argument(
+        "--record",
+        default=None,
+        metavar="CASSETTE",
+        help="Record every model prompt and response to this JSON cassette.",
+    )
+    transcript.add_argument(
+        "--replay",
+        default=None,
+        metavar="CASSETTE",
+        help="Serve model responses from a recorded cassette (no API calls).",
+    )
+    parser.add_argument(
+        "--replay_latency",
+        default="0",
+        help="Synthetic latency per replayed call: seconds, or 'recorded' (default: 0).",
+    )
+    parser.add_argument(
+        "--requests_per_minute",
+        type=int,
+        default=60,
+        help="Model requests per minute allowed per provider (default: 60).",
+    )
+    parser.add_argument(
+        "--max_concurrency",
+        type=int,
+        default=8,
+        help="Maximum in-flight model requests per provider (default: 8).",
+    )
+    parser.add_argument(
+        "--max_retries",
+        type=int,
+        default=5,
+        help="Retries for rate-limited or failed model calls (default: 5).",
+    )
+    parser.add_argument(
+        "--request_timeout",
+        type=float,
+        default=600.0,
+        help="Timeout in seconds for a single model call (default: 600).",
+    )
 
     args = parser.parse_args()
+    if bool(args.repo_input) == bool(args.batch):
+        parser.error("give either a repo_input or --batch MANIFEST")
+    if (args.variants or args.models) and (args.batch or args.dry_run):
+        parser.error("--variants/--models can't be combined with --batch or --dry_run")
+    if args.watch and (args.batch or args.dry_run or args.variants or args.models):
+        parser.error("--watch casts a single repository with a single model")
+    if args.watch and not os.path.isdir(args.repo_input or ""):
+        parser.error("--watch needs a local repository directory")
 
     repo_input = args.repo_input
     model_name = args.model_name
@@ -42,20 +234,135 @@ def main():
     api_key = os.environ.get(args.api_key)
     langgraph_style = args.langgraph_style
 
-    if os.path.exists(repo_input) and os.path.isdir(repo_input):
-        repo_name = os.path.basename(os.path.abspath(repo_input))
+    model_config = load_model_config(args.model_config) if args.model_config else {}
+    node_overrides = {}
+    for item in args.node_model:
+        node, _, name = item.partition("=")
+        if node not in NODE_NAMES or not name:
+            parser.error(f"--node_model expects NODE=MODEL with NODE in {NODE_NAMES}")
+        node_overrides[node] = name
+    base_model = ModelConfig(
+        model_name=model_name,
+        model_url=model_url,
+        api_key_env=args.api_key,
+        api_key=api_key,
+        timeout=args.request_timeout,
+    )
+    hedge = None
+    if args.hedge_model:
+        hedge = ModelConfig(
+            model_name=args.hedge_model,
+            model_url=args.hedge_url,
+            api_key_env=args.hedge_api_key,
+            timeout=args.request_timeout,
+        )
+    base_model = base_model.merged(
+        {"hedge": hedge, "hedge_percentile": args.hedge_percentile}
+    )
+    node_models = resolve_node_models(base_model, model_config, node_overrides)
+
+    configure_scheduler(
+        requests_per_minute=args.requests_per_minute,
+        max_concurrency=args.max_concurrency,
+        max_retries=args.max_retries,
+        timeout=args.request_timeout,
+        provider_limits=model_config.get("providers"),
+    )
+
+    cassette = None
+    if args.record:
+        cassette = Cassette(args.record, mode="record")
+    elif args.replay:
+        latency = args.replay_latency
+        cassette = Cassette(
+            args.replay,
+            mode="replay",
+            latency=latency if latency == "recorded" else float(latency),
+        )
+
+    options = dict(
+        langgraph_style=langgraph_style,
+        cassette=cassette,
+        speculative=args.speculative,
+        dry_run=args.dry_run,
+        use_mirror=args.mirror,
+        sparse=args.sparse,
+        local_mode=args.local_mode or ("inplace" if args.watch else "copy"),
+        force=args.force,
+        incremental=not args.no_incremental,
+        profile=args.profile,
+        worker_pool=args.worker_pool,
+        extract_all=args.extract_all,
+        prices=model_config.get("prices"),
+    )
+
+    if args.batch:
+        from repocaster.batch import BatchCaster, load_manifest, print_report
+
+        report = BatchCaster(
+            load_manifest(args.batch),
+            output_root="./mcp_servers",
+            base_model=base_model,
+            model_config=model_config,
+            node_overrides=node_overrides,
+            workers=args.workers,
+            **options,
+        ).run()
+        print_report(report)
+        return
+
+    if args.variants or args.models:
+        from repocaster.variants import (
+            MultiModelCaster,
+            load_variants,
+            resolve_variants,
+        )
+
+        if args.variants:
+            entries = load_variants(args.variants)
+        else:
+            entries = [
+                {"model_name": name.strip()}
+                for name in args.models.split(",")
+                if name.strip()
+            ]
+        caster = MultiModelCaster(
+            repo_input,
+            resolve_variants(
+                entries, base_model, model_config, node_overrides, langgraph_style
+            ),
+            output_dir=f"./mcp_servers/{repo_name_for(repo_input)}",
+            model_name=model_name,
+            model_url=model_url,
+            model_api_key=api_key,
+            **options,
+        )
+        caster.cast()
+        return
+
+    if args.watch:
+        from repocaster.watch import RepoWatcher, WatchCaster
+
+        caster_class = WatchCaster
     else:
-        repo_name = repo_input.split("/")[-1].replace(".git", "")
+        from repocaster.core import RepoCaster
+
+        caster_class = RepoCaster
 
-    caster = RepoCaster(
+    caster = caster_class(
         repo_input,
-        output_dir=f"./mcp_servers/{repo_name}",
+        output_dir=f"./mcp_servers/{repo_name_for(repo_input)}",
         model_name=model_name,
         model_url=model_url,
         model_api_key=api_key,
-        langgraph_style=langgraph_style,
+        node_models=node_models,
+        render_graph=args.render_graph,
+        **options,
     )
-    caster.cast()
+    if args.watch:
+        RepoWatcher(caster, interval=args.watch_interval).run()
+    else:
+        caster.cast()
 
 
 if __name__ == "__main__":
@@ -1,7 +1,13 @@
 import ast
 import os
+import json
+import hashlib
 import logging
 
+from .cache import cache_dir
+from .ingest import open_source
+from .streaming import atomic_write
+
 logger = logging.getLogger("RepoCaster.Analyzer")
 
 
@@ -90,57 +96,95 @@ class FunctionVisitor(ast.NodeVisitor):
 
 class RepoAnalyzer:
     def __init__(self, repo_path):
+        # A directory, an archive (read without extraction) or a RepoSource
         self.repo_path = repo_path
+        self.source = open_source(repo_path)
 
     def analyze(self):
         results = {"scripts": [], "library": []}  # CLI scripts  # Python API functions
 
-        for root, _, files in os.walk(self.repo_path):
+        for root, _, files in self.source.walk():
             for file in files:
                 if file.endswith(".py"):
-                    full_path = os.path.join(root, file)
-                    rel_path = os.path.relpath(full_path, self.repo_path)
-
-                    try:
-                        with open(full_path, "r", encoding="utf-8") as f:
-                            tree = ast.parse(f.read(), filename=full_path)
-
-                        # 1. Check for argparse (CLI script characteristics)
-                        # Simple heuristic: check if file content contains 'argparse' and '__main__'
-                        with open(full_path, "r", encoding="utf-8") as f_txt:
-                            content = f_txt.read()
-
-                        if "argparse" in content and "__main__" in content:
-                            visitor = ArgParseVisitor()
-                            visitor.visit(tree)
-                            if visitor.arguments:
-                                results["scripts"].append(
-                                    {
-                                        "path": rel_path,
-                                        "name": os.path.splitext(file)[0],
-                                        "type": "cli",
-                                        "args": visitor.arguments,
-                                        "description": f"CLI execution of {file}",
-                                    }
-                                )
-
-                        # 2. Check top-level functions (Library characteristics)
-                        # Exclude files that are usually scripts, focus on utils, models, etc.
-                        if "utils" in file or "model" in file or "api" in file:
-                            func_visitor = FunctionVisitor()
-                            func_visitor.visit(tree)
-                            if func_visitor.functions:
-                                results["library"].append(
-                                    {
-                                        "path": rel_path,
-                                        "module": rel_path.replace("/", ".").replace(
-                                            ".py", ""
-                                        ),
-                                        "functions": func_visitor.functions,
-                                    }
-                                )
-
-                    except Exception as e:
-                        logger.warning(f"Failed to parse {rel_path}: {e}")
+                    rel_path = os.path.join(root, file) if root else file
+                    found = self.analyze_file(rel_path)
+                    results["scripts"].extend(found["scripts"])
+                    results["library"].extend(found["library"])
 
         return results
+
+    def analyze_file(self, rel_path):
+        """The scripts and library entries of one Python file."""
+        results = {"scripts": [], "library": []}
+        file = os.path.basename(rel_path)
+        try:
+            content = self.source.read_text(rel_path, errors="strict")
+            tree = ast.parse(content, filename=rel_path)
+
+            # 1. Check for argparse (CLI script characteristics)
+            # Simple heuristic: check if file content contains 'argparse' and '__main__'
+
+            if "argparse" in content and "__main__" in content:
+                visitor = ArgParseVisitor()
+                visitor.visit(tree)
+                if visitor.arguments:
+                    results["scripts"].append(
+                        {
+                            "path": rel_path,
+                            "name": os.path.splitext(file)[0],
+                            "type": "cli",
+                            "args": visitor.arguments,
+                            "description": f"CLI execution of {file}",
+                        }
+                    )
+
+            # 2. Check top-level functions (Library characteristics)
+            # Exclude files that are usually scripts, focus on utils, models, etc.
+            if "utils" in file or "model" in file or "api" in file:
+                func_visitor = FunctionVisitor()
+                func_visitor.visit(tree)
+                if func_visitor.functions:
+                    results["library"].append(
+                        {
+                            "path": rel_path,
+                            "module": rel_path.replace("/", ".").replace(".py", ""),
+                            "functions": func_visitor.functions,
+                        }
+                    )
+
+        except Exception as e:
+            logger.warning(f"Failed to parse {rel_path}: {e}")
+
+        return results
+
+
+def analyzer_version() -> str:
+    """Hash of the code that determines an analysis result."""
+    digest = hashlib.sha256()
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    for module in ("analyzer.py", "ingest.py"):
+        with open(os.path.join(package_dir, module), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def cached_analysis(repo_path, revision):
+    """
+    RepoAnalyzer(repo_path).analyze(), memoized under the local cache by
+    repository `revision` (commit or content hash) and analyzer version, so
+    casts of the same revision from any process share one AST scan.
+    """
+    key = hashlib.sha256(
+        f"{revision}:{analyzer_version()}".encode("utf-8")
+    ).hexdigest()[:24]
+    path = os.path.join(cache_dir("analysis"), f"{key}.json")
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            result = json.load(f)
+        logger.info(f"♻️ [Analyzer] Reusing cached analysis for {revision}")
+        return result
+    except (OSError, ValueError):
+        pass
+    result = RepoAnalyzer(repo_path).analyze()
+    atomic_write(path, json.dumps(result))
+    return result
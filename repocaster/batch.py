@@ -0,0 +1,196 @@
+import os
+import json
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import fields
+
+from .core import RepoCaster
+from .ingest import repo_name_for
+from .models import ModelConfig, resolve_node_models
+from .streaming import atomic_write
+
+logger = logging.getLogger("RepoCaster.Batch")
+
+# Per-repo manifest keys: ModelConfig fields, RepoCaster switches, and these
+MODEL_KEYS = {f.name for f in fields(ModelConfig)} - {"api_key", "hedge"}
+CASTER_KEYS = {
+    "langgraph_style",
+    "speculative",
+    "sparse",
+    "local_mode",
+    "force",
+    "incremental",
+    "profile",
+    "worker_pool",
+    "extract_all",
+    "use_mirror",
+    "dry_run",
+}
+ENTRY_KEYS = {"repo", "name", "node_models"} | MODEL_KEYS | CASTER_KEYS
+
+
+def load_manifest(path):
+    """
+    Read a batch manifest and return one dict per repository:
+
+        {
+            "defaults": {"langgraph_style": true},
+            "repos": [
+                "https://github.com/dauparas/ProteinMPNN",
+                {"repo": "https://github.com/facebookresearch/esm", "name": "esm_qwen",
+                 "model_name": "qwen3-max", "model_url": "...", "api_key_env": "QWEN_API_KEY",
+                 "node_models": {"critique": "qwen-turbo"}}
+            ]
+        }
+
+    A bare JSON list of repos, or a text file with one repo per line (`#`
+    comments allowed), also works.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    try:
+        data = json.loads(text)
+    except ValueError:
+        data = [
+            line.strip()
+            for line in text.splitlines()
+            if line.strip() and not line.lstrip().startswith("#")
+        ]
+    if isinstance(data, list):
+        data = {"repos": data}
+
+    defaults = data.get("defaults", {})
+    entries = []
+    for i, item in enumerate(data.get("repos", [])):
+        entry = {"repo": item} if isinstance(item, str) else dict(item)
+        node_models = {
+            **defaults.get("node_models", {}),
+            **entry.get("node_models", {}),
+        }
+        entry = {**defaults, **entry, "node_models": node_models}
+        unknown = set(entry) - ENTRY_KEYS
+        if unknown:
+            raise ValueError(f"{path}: unknown keys in repo {i}: {sorted(unknown)}")
+        if not entry.get("repo"):
+            raise ValueError(f"{path}: repo {i} has no 'repo'")
+        entries.append(entry)
+    return entries
+
+
+def assign_names(entries):
+    """Unique output directory name per entry (explicit "name", else the repo's)."""
+    seen = {}
+    names = []
+    for entry in entries:
+        name = entry.get("name") or repo_name_for(entry["repo"])
+        count = seen.get(name, 0) + 1
+        seen[name] = count
+        names.append(name if count == 1 else f"{name}-{count}")
+    return names
+
+
+class BatchCaster:
+    """
+    Cast many repositories concurrently with a bounded thread pool. Each
+    entry casts into its own `<output_root>/<name>`; the workers share the
+    process-wide request scheduler, the git mirror cache and the analysis
+    cache. `run()` returns (and writes) a per-repo status and timing report.
+    """
+
+    def __init__(
+        self,
+        entries,
+        output_root="./mcp_servers",
+        base_model=None,
+        model_config=None,
+        node_overrides=None,
+        workers=4,
+        **caster_options,
+    ):
+        self.entries = entries
+        self.output_root = output_root
+        self.base_model = base_model or ModelConfig()
+        self.model_config = model_config or {}
+        self.node_overrides = node_overrides or {}
+        self.workers = workers
+        # Remaining RepoCaster keyword arguments shared by every entry
+        self.caster_options = caster_options
+
+    def _caster(self, entry, output_dir):
+        model = self.base_model.merged({k: entry[k] for k in MODEL_KEYS if k in entry})
+        node_models = resolve_node_models(
+            model,
+            self.model_config,
+            {**self.node_overrides, **entry.get("node_models", {})},
+        )
+        options = dict(self.caster_options)
+        options.update({k: entry[k] for k in CASTER_KEYS if k in entry})
+        return RepoCaster(
+            entry["repo"],
+            output_dir=output_dir,
+            model_name=model.model_name,
+            model_url=model.model_url,
+            model_api_key=model.resolve_api_key(),
+            node_models=node_models,
+            **options,
+        )
+
+    def _run_one(self, entry, name):
+        output_dir = os.path.join(self.output_root, name)
+        record = {"name": name, "repo": entry["repo"], "output_dir": output_dir}
+        started = time.perf_counter()
+        caster = None
+        try:
+            caster = self._caster(entry, output_dir)
+            caster.cast()
+            if caster.error:
+                record.update(status="failed", error=caster.error)
+            elif caster.unchanged:
+                record["status"] = "unchanged"
+            elif caster.degraded:
+                record.update(status="degraded", errors=caster.degraded)
+            elif caster.dry_run:
+                record["status"] = "dry_run"
+            else:
+                record["status"] = "ok"
+        except Exception as e:
+            logger.error(f"❌ [Batch] {name} failed: {e}")
+            record.update(status="failed", error=str(e))
+        record["seconds"] = round(time.perf_counter() - started, 3)
+        record["stages"] = caster.timer.report() if caster else {}
+        return record
+
+    def run(self):
+        names = assign_names(self.entries)
+        print(
+            f"📦 Batch casting {len(self.entries)} repositories with {self.workers} workers..."
+        )
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            results = list(pool.map(self._run_one, self.entries, names))
+
+        counts = {}
+        for r in results:
+            counts[r["status"]] = counts.get(r["status"], 0) + 1
+        report = {
+            "seconds": round(time.perf_counter() - started, 3),
+            "counts": counts,
+            "repos": results,
+        }
+        os.makedirs(self.output_root, exist_ok=True)
+        atomic_write(
+            os.path.join(self.output_root, "batch_report.json"),
+            json.dumps(report, indent=2),
+        )
+        return report
+
+
+def print_report(report):
+    print(f"{'name':<32} {'status':<10} {'seconds':>9}")
+    for r in report["repos"]:
+        print(f"{r['name']:<32} {r['status']:<10} {r['seconds']:>9.2f}")
+        if r.get("error"):
+            print(f"    {r['error']}")
+    summary = ", ".join(f"{n} {s}" for s, n in sorted(report["counts"].items()))
+    print(f"Total {report['seconds']:.2f}s: {summary}")
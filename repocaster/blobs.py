@@ -0,0 +1,53 @@
+import os
+import json
+import hashlib
+import threading
+
+from .streaming import atomic_write
+
+
+class BlobStore:
+    """
+    Content-addressed store for the large AgentState values (README, example
+    scripts, AST data, generated code and manual). The graph state carries
+    only the short keys, so steps and checkpoints stay small however big the
+    repository is. Values must be JSON-serializable and are treated as
+    immutable.
+
+    With a `directory`, blobs are also written to `<directory>/<key>.json` so
+    a resumed run in another process can resolve the same keys.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def put(self, value) -> str:
+        data = json.dumps(value, sort_keys=True, separators=(",", ":"))
+        key = hashlib.sha256(data.encode("utf-8")).hexdigest()[:24]
+        with self.lock:
+            if key not in self.values:
+                self.values[key] = value
+                if self.directory:
+                    os.makedirs(self.directory, exist_ok=True)
+                    path = os.path.join(self.directory, f"{key}.json")
+                    if not os.path.exists(path):
+                        atomic_write(path, data)
+        return key
+
+    def get(self, key, default=None):
+        if not key:
+            return default
+        with self.lock:
+            if key in self.values:
+                return self.values[key]
+        if self.directory:
+            path = os.path.join(self.directory, f"{key}.json")
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    value = json.load(f)
+                with self.lock:
+                    self.values[key] = value
+                return value
+        raise KeyError(f"Unknown blob: {key}")
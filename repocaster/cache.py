@@ -0,0 +1,37 @@
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+def cache_dir(*parts) -> str:
+    """
+    Directory under the local RepoCaster cache (REPOCASTER_CACHE_DIR, or
+    ~/.cache/repocaster by default), created on first use.
+    """
+    root = os.environ.get("REPOCASTER_CACHE_DIR") or os.path.join(
+        os.path.expanduser("~"), ".cache", "repocaster"
+    )
+    path = os.path.join(root, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+@contextmanager
+def file_lock(path):
+    """
+    Exclusive advisory lock on `path` (created if missing), shared between
+    processes. Falls back to no locking where fcntl is unavailable.
+    """
+    with open(path, "a+") as handle:
+        if fcntl is None:
+            yield
+            return
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
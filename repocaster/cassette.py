@@ -0,0 +1,81 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+
+from .streaming import atomic_write
+
+logger = logging.getLogger("RepoCaster.Cassette")
+
+
+class CassetteMiss(KeyError):
+    """Replay was asked for a prompt that was never recorded."""
+
+
+class Cassette:
+    """
+    Local JSON transcript of model calls. Each entry is keyed by the agent
+    node, the rendered prompt messages and the bound call options, and holds
+    the response text plus the latency observed while recording.
+
+    mode="record" calls the real model and appends to the file; mode="replay"
+    serves recorded responses through a fake chat model, optionally with a
+    synthetic `latency` (seconds per call, or "recorded" to reuse the
+    recorded latencies).
+    """
+
+    def __init__(self, path, mode="replay", latency=0.0):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f).get("entries", {})
+        elif mode == "replay":
+            raise FileNotFoundError(f"Cassette not found: {path}")
+
+    @staticmethod
+    def key(node, messages, kwargs) -> str:
+        payload = json.dumps(
+            {
+                "node": node,
+                "messages": [[m.type, m.content] for m in messages],
+                "kwargs": kwargs,
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                raise CassetteMiss(
+                    f"No recorded response for prompt {key[:12]} in {self.path}; "
+                    "re-record the cassette"
+                )
+            return self.entries[key]
+
+    def put(self, key, node, messages, response, latency):
+        with self.lock:
+            self.entries[key] = {
+                "node": node,
+                "prompt": "\n\n".join(str(m.content) for m in messages),
+                "response": response,
+                "latency": round(latency, 3),
+            }
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            atomic_write(
+                self.path,
+                json.dumps({"entries": self.entries}, indent=1, sort_keys=True),
+            )
+
+    def replay_delay(self, entry) -> float:
+        if self.latency == "recorded":
+            return entry.get("latency", 0.0)
+        return float(self.latency or 0.0)
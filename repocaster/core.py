@@ -1,8 +1,33 @@
 import os
 import shutil
 import subprocess
-from .analyzer import RepoAnalyzer
-from .deep_agent import DeepRepoAgent  # Use the new Deep Agent
+from .analyzer import cached_analysis
+from .cache import file_lock
+from .streaming import atomic_write
+from .timing import StageTimer
+from .mirrors import MirrorCache, disable_sparse, head_commit, sparse_clone
+from .ingest import (
+    ArchiveSource,
+    archive_stem,
+    fetch_referenced,
+    ingest_local,
+    is_archive,
+    open_source,
+)
+from .models import ModelConfig, resolve_node_models
+from .fingerprint import (
+    FINGERPRINT_FILE,
+    cast_fingerprint,
+    content_hash,
+    load_fingerprint,
+    save_fingerprint,
+)
+from .incremental import (
+    TOOLS_FILE,
+    load_tool_state,
+    save_tool_state,
+    script_fingerprints,
+)
 
 
 class RepoCaster:
@@ -14,21 +39,90 @@ class RepoCaster:
         model_url=None,
         model_api_key=None,
         langgraph_style=False,
+        node_models=None,
+        cassette=None,
+        speculative=False,
+        render_graph=None,
+        dry_run=False,
+        prices=None,
+        use_mirror=False,
+        sparse=False,
+        local_mode="copy",
+        force=False,
+        incremental=True,
+        profile=None,
+        worker_pool=False,
+        extract_all=False,
     ):
         self.repo_url = repo_url
         self.output_dir = output_dir
-        self.repo_name = repo_url.split("/")[-1].replace(".git", "")
+        self.repo_name = archive_stem(repo_url.rstrip("/")).replace(".git", "")
         self.model_name = model_name
         self.model_url = model_url
         self.model_api_key = model_api_key
         self.langgraph_style = langgraph_style
+        # Optional {node: ModelConfig} routing; None uses one model everywhere
+        self.node_models = node_models
+        # Optional cassette.Cassette to record or replay model transcripts
+        self.cassette = cassette
+        # Refine keyword-matched scripts while the workflow analyst runs
+        self.speculative = speculative
+        # Optional path for an offline render of the agent graph (.mmd or .png)
+        self.render_graph = render_graph
+        # Stop after analysis and write prompts plus a token/cost estimate
+        self.dry_run = dry_run
+        # Optional {model_name: {"input": usd, "output": usd}} per 1M tokens
+        self.prices = prices
+        # Clone remote repos through the persistent bare-mirror cache
+        self.use_mirror = use_mirror
+        # Blob-less partial clone; check out only analyzable files
+        self.sparse = sparse
+        # Local paths: "copy", "link" (hard-link tree) or "inplace" (symlink)
+        self.local_mode = local_mode
+        # ingest.ArchiveSource when casting straight from a .tar.gz/.zip
+        self.source = None
+        # Recast even if the fingerprint matches the existing outputs
+        self.force = force
+        # Re-derive only the tools of changed scripts and splice them in
+        self.incremental = incremental
+        # Per-stage capture into <output_dir>/profile: "cpu" (cProfile),
+        # "memory" (tracemalloc) or "all"
+        self.profile = profile
+        # Generated tools run scripts in warm worker processes (worker_pool.py)
+        self.worker_pool = worker_pool
+        # Archives and sparse clones: materialize every file, not just what
+        # the generated tools reference
+        self.extract_all = extract_all
+        # Commit of a git checkout (else the content hash is fingerprinted)
+        self.revision = None
+        # True when the last cast() reused unchanged outputs
+        self.unchanged = False
+        # Error message when the last cast() failed in the agent
+        self.error = None
+        # Steps of the last cast() that fell back to placeholder output
+        self.degraded = []
+        # Wall time per stage of the last cast (clone, ast, node:*, write)
+        self.timer = StageTimer()
 
     def _clone_repo(self, target_dir):
+        if is_archive(self.repo_url):
+            # Read in place; extracted to repo_source only after the cast
+            print(f"📦 Reading archive {self.repo_url} without extraction...")
+            self.source = ArchiveSource(self.repo_url)
+            return
         if os.path.exists(self.repo_url) and os.path.isdir(self.repo_url):
-            print(f"📂 Copying local repo from {self.repo_url}...")
-            if os.path.exists(target_dir):
-                shutil.rmtree(target_dir)
-            shutil.copytree(self.repo_url, target_dir, dirs_exist_ok=True)
+            ingest_local(self.repo_url, target_dir, self.local_mode)
+            return
+        if os.path.islink(target_dir):
+            # Left by an earlier in-place cast; never follow it into the source
+            os.remove(target_dir)
+        if self.use_mirror:
+            self.revision = MirrorCache(sparse=self.sparse).checkout(
+                self.repo_url, target_dir
+            )
+            return
+        if self.sparse:
+            sparse_clone(self.repo_url, target_dir)
         else:
             print(f"🚀 Cloning {self.repo_url}...")
             if os.path.exists(target_dir):
@@ -36,61 +130,295 @@ class RepoCaster:
             subprocess.run(
                 ["git", "clone", "--depth", "1", self.repo_url, target_dir], check=True
             )
+        self.revision = head_commit(target_dir)
+
+    def _is_sparse_clone(self):
+        return self.sparse and self.source is None and not os.path.isdir(self.repo_url)
+
+    def _fetch_tool_files(self, repo_local_path, tools):
+        """
+        A sparse clone only checks out code and READMEs; fetch the configs,
+        weights and data the generated tools reference.
+        """
+        try:
+            if self.extract_all:
+                disable_sparse(repo_local_path)
+                print("   -> Checked out every file (--extract_all)")
+                return
+            paths = fetch_referenced(repo_local_path, tools)
+        except subprocess.CalledProcessError as e:
+            print(f"⚠️ Could not fetch the files the tools reference: {e}")
+            paths = None
+        if paths:
+            print(f"   -> Fetched {len(paths)} files the tools reference")
+        print(
+            "⚠️ Sparse checkout: other non-code files were not downloaded. Fetch "
+            f"them with `git -C {repo_local_path} sparse-checkout disable` "
+            "or recast with --extract_all."
+        )
+
+    def _materialize_source(self, repo_local_path, tools):
+        """Write what the generated `tools` need to run into repo_source."""
+        if self.source is None:
+            if self._is_sparse_clone():
+                self._fetch_tool_files(repo_local_path, tools)
+            return
+        paths = None if self.extract_all else self.source.needed_paths(tools)
+        count = self.source.materialize(repo_local_path, paths)
+        total = len(self.source.sizes)
+        print(f"   -> Extracted {count} of {total} files to {repo_local_path}")
+        if count < total:
+            print(
+                "   -> Only code, READMEs and the files the tools reference were "
+                "extracted; recast with --extract_all for everything"
+            )
+
+    def _node_models(self):
+        return self.node_models or resolve_node_models(
+            ModelConfig(model_name=self.model_name, model_url=self.model_url)
+        )
+
+    def _revision(self, repo_local_path):
+        return self.revision or "content:" + content_hash(
+            self.source or open_source(repo_local_path)
+        )
+
+    def _analyze(self, repo_local_path, revision):
+        return cached_analysis(self.source or repo_local_path, revision)
+
+    def _script_fingerprints(self, repo_local_path, analysis_result):
+        return script_fingerprints(
+            analysis_result, self.source or open_source(repo_local_path)
+        )
+
+    def _is_unchanged(self, output_dir, fingerprint):
+        return (
+            not self.force
+            and fingerprint == load_fingerprint(output_dir)
+            and all(
+                os.path.isfile(os.path.join(output_dir, name))
+                for name in ("server.py", "USAGE.md")
+            )
+        )
+
+    def _build_agent(
+        self,
+        repo_local_path,
+        analysis_result,
+        work_dir,
+        node_models,
+        langgraph_style,
+        timer,
+        context=None,
+    ):
+        # Deferred: LangChain/LangGraph take most of the startup time
+        from .deep_agent import DeepRepoAgent
+
+        return DeepRepoAgent(
+            repo_local_path,
+            analysis_result,
+            model_url=self.model_url,
+            model_name=self.model_name,
+            model_api_key=self.model_api_key,
+            langgraph_style=langgraph_style,
+            work_dir=work_dir,
+            node_models=node_models,
+            cassette=self.cassette,
+            timer=timer,
+            speculative=self.speculative,
+            source=self.source,
+            context=context,
+            worker_pool=self.worker_pool,
+        )
+
+    def _run_agent(self, agent, output_dir, components, fingerprints, timer):
+        """
+        Update the previous outputs in `output_dir` with only the tools of
+        changed scripts when their tool state is reusable, else run the
+        whole graph.
+        """
+        paths = [os.path.join(output_dir, name) for name in ("server.py", "USAGE.md")]
+        tool_state = None
+        if self.incremental and not self.force and all(map(os.path.isfile, paths)):
+            tool_state = load_tool_state(output_dir, components)
+        if tool_state is not None:
+            previous = []
+            for path in paths:
+                with open(path, "r", encoding="utf-8") as f:
+                    previous.append(f.read())
+            with timer.stage("incremental"):
+                result = agent.update(tool_state, fingerprints, *previous)
+            if result is not None:
+                print("🧩 Regenerated only the tools of changed scripts")
+                return result
+            print("   -> Previous outputs can't be spliced; running the full pipeline")
+        return agent.run()
+
+    def _write_outputs(
+        self, output_dir, result, work_dir, fingerprint, components, fingerprints
+    ):
+        """Write the outputs; return the errors of degraded steps (if any)."""
+        # Write server.py and USAGE.md (Critical for the get_user_guide tool).
+        # Both are promoted atomically so a reader never sees a half-written file.
+        atomic_write(os.path.join(output_dir, "server.py"), result["server_code"])
+        atomic_write(os.path.join(output_dir, "USAGE.md"), result["user_manual"])
+        if self.worker_pool:
+            # The generated server imports the pool runtime from next to itself
+            with open(
+                os.path.join(os.path.dirname(__file__), "worker_pool.py"), "r"
+            ) as f:
+                atomic_write(os.path.join(output_dir, "worker_pool.py"), f.read())
+        if result.get("errors"):
+            # Degraded outputs must not look reusable. The streamed pieces
+            # that did complete stay in work_dir for the retry to reuse.
+            print(
+                f"⚠️ {len(result['errors'])} step(s) fell back to degraded output; "
+                "not fingerprinting, so the next cast retries:"
+            )
+            for error in result["errors"]:
+                print(f"   - {error}")
+            for name in (FINGERPRINT_FILE, TOOLS_FILE):
+                try:
+                    os.remove(os.path.join(output_dir, name))
+                except FileNotFoundError:
+                    pass
+            return result["errors"]
+        shutil.rmtree(work_dir, ignore_errors=True)
+        save_tool_state(output_dir, components, result, fingerprints)
+        save_fingerprint(output_dir, fingerprint, components)
+        return []
+
+    def _dry_run(self, repo_local_path, analysis_result):
+        from .dry_run import dry_run, print_estimate
+
+        node_models = self._node_models()
+        out_dir = os.path.join(self.output_dir, "dry_run")
+        print("🧾 Dry run: rendering prompts and estimating cost (no model calls)...")
+        with self.timer.stage("dry_run"):
+            report = dry_run(
+                repo_local_path,
+                os.path.basename(repo_local_path),
+                analysis_result,
+                out_dir,
+                node_models=node_models,
+                prices=self.prices,
+                langgraph_style=self.langgraph_style,
+                source=self.source,
+                worker_pool=self.worker_pool,
+            )
+        print_estimate(report)
+        print(f"✅ Dry run written to: {out_dir}")
+        return report
 
     def cast(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        # Casts into the same output directory (e.g. concurrent runs for one
+        # repo name) take turns instead of clobbering repo_source.
+        with file_lock(os.path.join(self.output_dir, ".lock")):
+            if not self.profile:
+                return self._cast()
+            from .profiling import PROFILE_MODES, StageProfiler, print_profile
+
+            cpu, memory = PROFILE_MODES[self.profile]
+            profiler = StageProfiler(
+                os.path.join(self.output_dir, "profile"), cpu=cpu, memory=memory
+            )
+            self.timer.profiler = profiler
+            try:
+                return self._cast()
+            finally:
+                self.timer.profiler = None
+                print_profile(profiler.finish())
+                print(f"📈 Stage profiles written to {profiler.out_dir}")
+
+    def _cast(self):
         print(f"🔥 Starting RepoCaster for {self.repo_name}")
 
         # 1. Setup Directories
-        os.makedirs(self.output_dir, exist_ok=True)
         repo_local_path = os.path.join(self.output_dir, "repo_source")
+        # Streamed generations land here and survive a failed cast for resume
+        work_dir = os.path.join(self.output_dir, ".partial")
 
         # 2. Clone Code
-        self._clone_repo(repo_local_path)
+        self.unchanged = False
+        self.error = None
+        self.degraded = []
+        with self.timer.stage("clone"):
+            self._clone_repo(repo_local_path)
+
+        # Skip everything else if the inputs match the existing outputs
+        with self.timer.stage("fingerprint"):
+            fingerprint, components = cast_fingerprint(
+                self._revision(repo_local_path),
+                self._node_models(),
+                self.langgraph_style,
+                self.worker_pool,
+            )
+        if not self.dry_run and self._is_unchanged(self.output_dir, fingerprint):
+            self.unchanged = True
+            print(
+                f"⏭️ Unchanged since the last cast (fingerprint {fingerprint[:12]}); "
+                f"keeping {self.output_dir}/server.py. Use --force to recast."
+            )
+            if self._is_sparse_clone():
+                # The fresh checkout lacks what the kept tools reference
+                state = load_tool_state(self.output_dir, components) or {}
+                self._fetch_tool_files(
+                    repo_local_path, [e["tool"] for e in state.get("tools", [])]
+                )
+            return
 
         # 3. AST Analysis
         print("🔍 Analyzing repository structure (AST)...")
-        analyzer = RepoAnalyzer(repo_local_path)
-        analysis_result = analyzer.analyze()
+        with self.timer.stage("ast"):
+            analysis_result = self._analyze(repo_local_path, components["revision"])
         print(f"   -> Found {len(analysis_result['scripts'])} CLI scripts")
 
+        if self.dry_run:
+            return self._dry_run(repo_local_path, analysis_result)
+        fingerprints = self._script_fingerprints(repo_local_path, analysis_result)
+
         # 4. Deep Agent (Reasoning + Generation)
         print("🧠 Running Deep Repo Agent (LangGraph)...")
-        server_code = ""
         try:
-            agent = DeepRepoAgent(
-                repo_local_path,
-                analysis_result,
-                model_url=self.model_url,
-                model_name=self.model_name,
-                model_api_key=self.model_api_key,
-                langgraph_style=self.langgraph_style,
+            with self.timer.stage("agent_init"):
+                agent = self._build_agent(
+                    repo_local_path,
+                    analysis_result,
+                    work_dir,
+                    self.node_models,
+                    self.langgraph_style,
+                    self.timer,
+                )
+            if self.render_graph:
+                agent.render_graph(self.render_graph)
+            result = self._run_agent(
+                agent, self.output_dir, components, fingerprints, self.timer
             )
-            result = agent.run()
-            server_code = result["server_code"]
-            user_manual = result["user_manual"]
         except ImportError:
             print("❌ LangGraph not installed. Cannot run Deep Agent.")
+            self.error = "LangGraph not installed"
             return
         except Exception as e:
             print(f"❌ Agent failed: {e}")
+            self.error = str(e)
             import traceback
 
             traceback.print_exc()
+            if os.path.isdir(work_dir):
+                print(f"   -> Partial outputs kept for resume in {work_dir}")
             return
 
         # 5. Write Output Files
         print("💾 Saving MCP Server files...")
 
-        # Write server.py
-        with open(
-            os.path.join(self.output_dir, "server.py"), "w", encoding="utf-8"
-        ) as f:
-            f.write(server_code)
-
-        # Write USAGE.md (Critical for the get_user_guide tool)
-        with open(
-            os.path.join(self.output_dir, "USAGE.md"), "w", encoding="utf-8"
-        ) as f:
-            f.write(user_manual)
+        with self.timer.stage("write"):
+            self.degraded = self._write_outputs(
+                self.output_dir, result, work_dir, fingerprint, components, fingerprints
+            )
+            self._materialize_source(repo_local_path, result.get("tools", []))
 
-        print(f"✅ Done! MCP Server is ready at: {self.output_dir}/server.py")
+        if self.degraded:
+            print(f"⚠️ Done with degraded output: {self.output_dir}/server.py")
+        else:
+            print(f"✅ Done! MCP Server is ready at: {self.output_dir}/server.py")
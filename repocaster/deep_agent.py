@@ -1,22 +1,57 @@
 import os
 import json
 import logging
-from typing import List, Dict, Any, TypedDict
+import operator
+from typing import Annotated, List, Dict, TypedDict
+from .streaming import StreamingArtifact, atomic_write, content_key
+from .structured import (
+    invoke_structured,
+    WORKFLOWS_SCHEMA,
+    TOOLS_SCHEMA,
+    CRITIQUE_SCHEMA,
+)
+from .blobs import BlobStore
+from .fingerprint import model_settings
+from .ingest import RepoSource, open_source
+from .incremental import (
+    TOOL_HEADING,
+    UpdatePlan,
+    context_fingerprint,
+    tool_path,
+    match_functions,
+    function_source,
+    splice,
+    merge_imports,
+    parse_guide,
+    splice_guide,
+)
+from .models import ModelConfig, NODE_NAMES, resolve_node_models
 from .prompts import (
     WORKFLOW_ANALYST_PROMPT,
     SCHEMA_REFINER_PROMPT,
     TOOL_CRITIC_PROMPT,
     TOOL_REVISER_PROMPT,
-    DOC_WRITER_PROMPT,
-    CODE_GENERATOR_PROMPT,
-    CODE_GENERATOR_PROMPT_LANGGRAPH,
+)
+from .planning import (
+    gather_context,
+    analyst_inputs,
+    heuristic_scripts,
+    relevant_scripts,
+    refiner_inputs,
+    critic_inputs,
+    reviser_inputs,
+    markdown_anchor,
+    plan_sections,
+    stitch,
+    generator_prompt,
 )
 
 try:
-    from langchain_openai import ChatOpenAI
     from langchain_core.prompts import ChatPromptTemplate
-    from langchain_core.output_parsers import JsonOutputParser, StrOutputParser
+    from langchain_core.output_parsers import StrOutputParser
+    from langchain_core.runnables import RunnableLambda
     from langgraph.graph import StateGraph, END
+    from .llm import build_chat_model
 except ImportError:
     raise ImportError(
         "Please install dependencies: pip install langgraph langchain-openai"
@@ -30,237 +65,196 @@ logger = logging.getLogger("RepoCaster.DeepAgent")
 class AgentState(TypedDict):
     repo_path: str
     repo_name: str
-    ast_data: Dict[str, Any]
-    readme_content: str
-    example_scripts: Dict[str, str]
+
+    # Large inputs live in the BlobStore; the state only carries their keys
+    ast_ref: str
+    readme_ref: str
+    examples_ref: str
 
     # Workflow Analysis
     identified_workflows: List[Dict]
 
     # Tool Definitions
     refined_tools: List[Dict]
+    speculative_tools: List[Dict]
+    speculative_paths: List[str]
 
     # Reflection Loop State
     critique_feedback: str
     missing_scripts: List[str]
     iteration_count: int
 
-    # Artifacts
-    user_manual: str
-    mcp_server_code: str
+    # Artifacts (BlobStore keys)
+    user_guide_ref: str
+    server_code_ref: str
 
     # New fields for reflection
     revision_count: int
     critique_approved: bool
     missing_paths: List[str]
-    user_guide: str
     langgraph_style: bool
+    worker_pool: bool
+
+    # Directory for streamed, resumable generation output (optional)
+    work_dir: str
+
+    # Steps that fell back to a degraded result; such casts aren't fingerprinted
+    errors: Annotated[List[str], operator.add]
 
 
 # --- Nodes ---
 class ContextGatherer:
     """Gather Context: README + Example Scripts"""
 
-    def __call__(self, state: AgentState) -> AgentState:
-        repo_path = state["repo_path"]
-        logger.info(f"🔍 [Gatherer] Scanning {repo_path} for README and examples...")
-
-        readme = ""
-        examples = {}
-
-        # Read README
-        for f in os.listdir(repo_path):
-            if f.lower().startswith("readme"):
-                try:
-                    with open(
-                        os.path.join(repo_path, f),
-                        "r",
-                        encoding="utf-8",
-                        errors="ignore",
-                    ) as file:
-                        readme = file.read()
-                except:
-                    pass
-
-        # Search Usage Examples (.sh, .ipynb, key .py)
-        for root, dirs, files in os.walk(repo_path):
-            if any(x in root for x in [".git", "__pycache__", "venv", "node_modules"]):
-                continue
-            for f in files:
-                fp = os.path.join(root, f)
-                # As long as it is a script, or a py file with run/inference in the name
-                if f.endswith((".sh", ".bash", ".ipynb")) or (
-                    f.endswith(".py")
-                    and any(k in f for k in ["run", "infer", "example", "submit"])
-                ):
-                    try:
-                        with open(fp, "r", encoding="utf-8", errors="ignore") as file:
-                            content = file.read()
-                            if 50 < len(content) < 15000:  # Simple length filter
-                                rel_name = os.path.relpath(fp, repo_path)
-                                examples[rel_name] = content
-                    except:
-                        pass
-            if len(examples) > 15:
-                break
+    def __init__(self, blobs: BlobStore, source: RepoSource = None, context=None):
+        self.blobs = blobs
+        # Read from this source (e.g. an archive) instead of state["repo_path"]
+        self.source = source
+        # Precomputed {"readme", "examples"} shared by several agents
+        self.context = context
 
+    def __call__(self, state: AgentState) -> Dict:
+        if self.context is not None:
+            return {
+                "readme_ref": self.blobs.put(self.context["readme"]),
+                "examples_ref": self.blobs.put(self.context["examples"]),
+            }
+        source = self.source or open_source(state["repo_path"])
+        logger.info(f"🔍 [Gatherer] Scanning {source.name} for README and examples...")
+        readme, examples = gather_context(source)
         return {
-            **state,
-            "readme_content": readme,
-            "example_scripts": examples,
-            "revision_count": 0,
-            "critique_approved": False,
-            "missing_paths": [],
-            "user_guide": "",
-            "langgraph_style": state["langgraph_style"],
+            "readme_ref": self.blobs.put(readme),
+            "examples_ref": self.blobs.put(examples),
         }
 
 
 class WorkflowAnalyst:
-    def __init__(self, llm):
+    def __init__(self, llm, blobs: BlobStore):
         self.llm = llm.bind(response_format={"type": "json_object"})
+        self.blobs = blobs
 
-    def __call__(self, state: AgentState) -> AgentState:
-        logger.info("🧠 [Analyst] Deducting workflows from examples & AST...")
+    prompt_inputs = staticmethod(analyst_inputs)
 
-        if not state["example_scripts"] and not state["readme_content"]:
-            logger.warning("⚠️ No context found. Skipping analysis.")
-            return {**state, "identified_workflows": []}
-
-        ast_summary = json.dumps(
-            [
-                {
-                    "name": s["name"],
-                    "path": s["path"],
-                    "args_count": len(s.get("args", [])),
-                }
-                for s in state["ast_data"].get("scripts", [])
-            ],
-            indent=2,
-        )
+    def __call__(self, state: AgentState) -> Dict:
+        logger.info("🧠 [Analyst] Deducting workflows from examples & AST...")
 
-        examples_text = ""
-        for name, content in list(state["example_scripts"].items())[
-            :10
-        ]:  # Limit to top 10 examples
-            examples_text += f"\n--- FILE: {name} ---\n{content[:2000]}\n"
+        examples = self.blobs.get(state["examples_ref"], {})
+        readme = self.blobs.get(state["readme_ref"], "")
+        ast_data = self.blobs.get(state["ast_ref"], {})
 
-        prompt = ChatPromptTemplate.from_template(WORKFLOW_ANALYST_PROMPT)
+        if not examples and not readme:
+            logger.warning("⚠️ No context found. Skipping analysis.")
+            return {"identified_workflows": []}
 
-        chain = prompt | self.llm | JsonOutputParser()
         try:
-            workflows = chain.invoke(
-                {
-                    "ast_summary": ast_summary,
-                    "examples_text": examples_text,
-                    "readme_snippet": state["readme_content"][:3000],
-                }
+            workflows = invoke_structured(
+                WORKFLOW_ANALYST_PROMPT,
+                self.llm,
+                self.prompt_inputs(ast_data, readme, examples),
+                WORKFLOWS_SCHEMA,
             )
-
-            # --- FIX: Robustness check for LLM output ---
-            # LLMs sometimes wrap the list in a dict like {"workflows": [...]}
-            if isinstance(workflows, dict):
-                # Try to find the list inside values
-                found = False
-                for val in workflows.values():
-                    if isinstance(val, list):
-                        workflows = val
-                        found = True
-                        break
-                if not found:
-                    workflows = []  # Fallback
-            elif not isinstance(workflows, list):
-                workflows = []  # Fallback
-            # ---------------------------------------------
-
             logger.info(f"🧠 [Analyst] Identified {len(workflows)} workflows.")
-            return {**state, "identified_workflows": workflows}
+            return {"identified_workflows": workflows}
         except Exception as e:
             logger.error(f"Analyst failed: {e}")
-            return {**state, "identified_workflows": []}
+            return {"identified_workflows": [], "errors": [f"analyst: {e}"]}
 
 
 class SchemaRefiner:
-    def __init__(self, llm):
+    def __init__(self, llm, blobs: BlobStore):
         self.llm = llm.bind(response_format={"type": "json_object"})
+        self.blobs = blobs
+
+    prompt_inputs = staticmethod(refiner_inputs)
+    relevant_scripts = staticmethod(relevant_scripts)
+
+    def refine(self, scripts, workflows) -> List[Dict]:
+        """Ask the model for tool definitions covering `scripts`."""
+        return invoke_structured(
+            SCHEMA_REFINER_PROMPT,
+            self.llm,
+            self.prompt_inputs(scripts, workflows),
+            TOOLS_SCHEMA,
+        )
 
-    def __call__(self, state: AgentState) -> AgentState:
+    def __call__(self, state: AgentState) -> Dict:
         logger.info("🔧 [Refiner] Finalizing tool definitions...")
+        ast_data = self.blobs.get(state["ast_ref"], {})
+        relevant_scripts = self.relevant_scripts(
+            ast_data, state["identified_workflows"]
+        )
 
-        # --- FIX: Robust list comprehension ---
-        # Ensure w is a dict before calling .get()
-        workflow_paths = []
-        if state["identified_workflows"] and isinstance(
-            state["identified_workflows"], list
-        ):
-            for w in state["identified_workflows"]:
-                if isinstance(w, dict):
-                    path = w.get("target_script_path")
-                    if path:
-                        workflow_paths.append(path)
-        # --------------------------------------
-
-        # Find AST details for identified workflows
-        relevant_scripts = []
-
-        for script in state["ast_data"].get("scripts", []):
-            # Heuristic matching
-            # Include if it's part of the identified workflow OR looks like a main script
-            if script["path"] in workflow_paths:
-                relevant_scripts.append(script)
-            elif any(
-                w in script["name"]
-                for w in [
-                    "inference",
-                    "run",
-                    "predict",
-                    "generate",
-                    "parse",
-                    "assign",
-                    "make",
-                    "prep",
-                ]
-            ):
-                relevant_scripts.append(script)
-
-        if not relevant_scripts:
-            # Fallback: use all scripts if analyst failed
-            relevant_scripts = state["ast_data"].get("scripts", [])[:5]
-
-        prompt = ChatPromptTemplate.from_template(SCHEMA_REFINER_PROMPT)
-
-        chain = prompt | self.llm | JsonOutputParser()
-        try:
-            tools = chain.invoke(
-                {
-                    "ast_json": json.dumps(relevant_scripts, indent=2),
-                    "workflows_json": json.dumps(
-                        state["identified_workflows"], indent=2
-                    ),
-                }
+        # Speculative mode: the heuristic scripts were already refined while
+        # the analyst was running, so only the newly identified ones remain.
+        speculative_tools = state.get("speculative_tools") or []
+        speculative_paths = set(state.get("speculative_paths") or [])
+        pending_scripts = [
+            s for s in relevant_scripts if s["path"] not in speculative_paths
+        ]
+        if speculative_paths:
+            logger.info(
+                f"🔧 [Refiner] Reusing {len(speculative_tools)} speculative tools, "
+                f"refining {len(pending_scripts)} newly identified scripts..."
             )
+            if not pending_scripts:
+                return {"refined_tools": speculative_tools}
 
-            # --- FIX: Robustness check for LLM output ---
-            if isinstance(tools, dict):
-                for val in tools.values():
-                    if isinstance(val, list):
-                        tools = val
-                        break
-            if not isinstance(tools, list):
-                tools = []
-            # ---------------------------------------------
-
-            return {**state, "refined_tools": tools}
+        try:
+            tools = self.refine(pending_scripts, state["identified_workflows"])
         except Exception as e:
             logger.error(f"Refiner failed: {e}")
-            return {**state, "refined_tools": []}
+            return {"refined_tools": speculative_tools, "errors": [f"refiner: {e}"]}
+
+        # Reconcile: a freshly refined tool replaces a speculative one for the
+        # same script.
+        new_paths = {
+            t.get("script_path") or t.get("path") for t in tools if isinstance(t, dict)
+        }
+        merged = [
+            t
+            for t in speculative_tools
+            if isinstance(t, dict)
+            and (t.get("script_path") or t.get("path")) not in new_paths
+        ]
+        return {"refined_tools": merged + tools}
+
+
+class SpeculativeRefiner:
+    """
+    Refine the keyword-matched scripts concurrently with WorkflowAnalyst,
+    without workflow insights. SchemaRefiner later reconciles the result with
+    the analyst's workflows.
+    """
+
+    def __init__(self, refiner: SchemaRefiner):
+        self.refiner = refiner
+
+    def __call__(self, state: AgentState) -> Dict:
+        scripts = heuristic_scripts(self.refiner.blobs.get(state["ast_ref"], {}))
+        if not scripts:
+            return {"speculative_tools": [], "speculative_paths": []}
+        logger.info(
+            f"🔮 [Speculative] Refining {len(scripts)} heuristic scripts during analysis..."
+        )
+        try:
+            tools = self.refiner.refine(scripts, [])
+        except Exception as e:
+            logger.error(f"Speculative refine failed: {e}")
+            return {"speculative_tools": [], "speculative_paths": []}
+        return {
+            "speculative_tools": tools,
+            "speculative_paths": [s["path"] for s in scripts],
+        }
 
 
 class ToolCritic:
-    def __init__(self, llm):
+    def __init__(self, llm, blobs: BlobStore):
         self.llm = llm.bind(response_format={"type": "json_object"})
+        self.blobs = blobs
 
-    def __call__(self, state: AgentState) -> AgentState:
+    prompt_inputs = staticmethod(critic_inputs)
+
+    def __call__(self, state: AgentState) -> Dict:
         logger.info(
             f"🧐 [Critic] Reviewing tool coverage (Round {state['revision_count'] + 1})..."
         )
@@ -275,7 +269,7 @@ class ToolCritic:
             else:
                 logger.warning(f"⚠️ [Critic] Skipping invalid tool definition: {t}")
 
-        all_scripts = state["ast_data"].get("scripts", [])
+        all_scripts = self.blobs.get(state["ast_ref"], {}).get("scripts", [])
 
         # Filter potential candidates that are NOT in current tools
         candidates = []
@@ -284,53 +278,53 @@ class ToolCritic:
                 candidates.append(s["path"])
 
         if not candidates:
-            return {**state, "critique_approved": True}
-
-        prompt = ChatPromptTemplate.from_template(TOOL_CRITIC_PROMPT)
+            return {"critique_approved": True}
 
-        chain = prompt | self.llm | JsonOutputParser()
         try:
-            result = chain.invoke(
-                {
-                    "tool_definitions": json.dumps(state["refined_tools"], indent=2),
-                    "candidates": candidates[:50],  # Limit to avoid token overflow
-                }
+            result = invoke_structured(
+                TOOL_CRITIC_PROMPT,
+                self.llm,
+                self.prompt_inputs(state["refined_tools"], candidates),
+                CRITIQUE_SCHEMA,
             )
             return {
-                **state,
-                "critique_approved": result.get("approved", True),
-                "missing_paths": result.get("missing_paths", []),
+                "critique_approved": result["approved"],
+                "missing_paths": result["missing_paths"],
             }
         except Exception as e:
             logger.error(f"Critic failed: {e}")
-            return {**state, "critique_approved": True}
+            return {"critique_approved": True, "errors": [f"critic: {e}"]}
 
 
 class ToolReviser:
-    def __init__(self, llm):
+    def __init__(self, llm, blobs: BlobStore):
         self.llm = llm.bind(response_format={"type": "json_object"})
+        self.blobs = blobs
 
-    def __call__(self, state: AgentState) -> AgentState:
+    prompt_inputs = staticmethod(reviser_inputs)
+
+    def __call__(self, state: AgentState) -> Dict:
         logger.info(
             f"✏️ [Reviser] Adding {len(state['missing_paths'])} missing tools..."
         )
 
+        scripts = self.blobs.get(state["ast_ref"], {}).get("scripts", [])
         missing_scripts = []
         for path in state["missing_paths"]:
-            for s in state["ast_data"].get("scripts", []):
+            for s in scripts:
                 if s["path"] == path:
                     missing_scripts.append(s)
                     break
 
         if not missing_scripts:
-            return {**state, "revision_count": state["revision_count"] + 1}
-
-        prompt = ChatPromptTemplate.from_template(TOOL_REVISER_PROMPT)
+            return {"revision_count": state["revision_count"] + 1}
 
-        chain = prompt | self.llm | JsonOutputParser()
         try:
-            new_tools = chain.invoke(
-                {"scripts_json": json.dumps(missing_scripts, indent=2)}
+            new_tools = invoke_structured(
+                TOOL_REVISER_PROMPT,
+                self.llm,
+                self.prompt_inputs(missing_scripts),
+                TOOLS_SCHEMA,
             )
 
             # Remove old versions of the tools being revised (if any)
@@ -339,6 +333,8 @@ class ToolReviser:
             paths_being_revised = set(state["missing_paths"])
 
             for t in state["refined_tools"]:
+                if not isinstance(t, dict):
+                    continue
                 # Robustly get path
                 t_path = t.get("script_path") or t.get("path")
                 if t_path not in paths_being_revised:
@@ -346,63 +342,136 @@ class ToolReviser:
 
             updated_tools = current_tools + new_tools
             return {
-                **state,
                 "refined_tools": updated_tools,
                 "revision_count": state["revision_count"] + 1,
             }
         except Exception as e:
             logger.error(f"Reviser failed: {e}")
-            return {**state, "revision_count": state["revision_count"] + 1}
+            return {
+                "revision_count": state["revision_count"] + 1,
+                "errors": [f"reviser: {e}"],
+            }
 
 
 class DocWriter:
-    def __init__(self, llm):
-        self.llm = llm
-
-    def __call__(self, state: AgentState) -> AgentState:
-        logger.info("📖 [DocWriter] Generating User Manual...")
+    """Write the User Manual as independent sections generated concurrently."""
 
-        prompt = ChatPromptTemplate.from_template(DOC_WRITER_PROMPT)
+    def __init__(
+        self, llm, blobs: BlobStore, max_concurrency=8, attempts=2, model=None
+    ):
+        self.llm = llm
+        self.blobs = blobs
+        # fingerprint.model_settings of `llm`; part of the resume key
+        self.model = model or {}
+        self.max_concurrency = max_concurrency
+        # Tries per section before it is left as a placeholder
+        self.attempts = attempts
+
+    plan_sections = staticmethod(plan_sections)
+    stitch = staticmethod(stitch)
+
+    def _generate_section(self, state: AgentState, heading, template, inputs):
+        chain = (
+            ChatPromptTemplate.from_template(template) | self.llm | StrOutputParser()
+        )
+        if not state.get("work_dir"):
+            return chain.invoke(inputs)
+        artifact = StreamingArtifact(
+            os.path.join(state["work_dir"], "usage_sections"),
+            f"USAGE.{markdown_anchor(heading)}.md",
+            content_key(
+                template,
+                json.dumps(inputs, sort_keys=True),
+                json.dumps(self.model, sort_keys=True),
+            ),
+        )
+        return artifact.stream(chain, inputs)
+
+    def write_sections(self, state: AgentState, sections):
+        """
+        Generate `sections` concurrently, retrying failed ones; returns
+        ([(heading, body)], errors). Sections that fail every attempt get a
+        placeholder body and an entry in `errors`.
+        """
+        # batch() fans the per-section generations out concurrently.
+        writer = RunnableLambda(lambda s: self._generate_section(state, *s))
+        bodies = [None] * len(sections)
+        pending = list(range(len(sections)))
+        for attempt in range(self.attempts):
+            results = writer.batch(
+                [sections[i] for i in pending],
+                config={"max_concurrency": self.max_concurrency},
+                return_exceptions=True,
+            )
+            failed = []
+            for i, body in zip(pending, results):
+                bodies[i] = body
+                if isinstance(body, Exception):
+                    logger.warning(
+                        f"⚠️ [DocWriter] Section '{sections[i][0]}' failed "
+                        f"(attempt {attempt + 1}/{self.attempts}): {body}"
+                    )
+                    failed.append(i)
+            pending = failed
+            if not pending:
+                break
 
-        chain = prompt | self.llm | StrOutputParser()
-        guide = chain.invoke(
-            {
-                "repo_name": state["repo_name"],
-                "tools_json": json.dumps(state["refined_tools"], indent=2),
-                "workflows_json": json.dumps(state["identified_workflows"], indent=2),
-            }
+        written, errors = [], []
+        for (heading, _, _), body in zip(sections, bodies):
+            if isinstance(body, Exception):
+                logger.error(f"DocWriter section '{heading}' failed: {body}")
+                errors.append(f"doc_writer: section '{heading}' failed: {body}")
+                body = "_This section could not be generated._"
+            written.append((heading, body))
+        return written, errors
+
+    def __call__(self, state: AgentState) -> Dict:
+        sections = self.plan_sections(state)
+        logger.info(
+            f"📖 [DocWriter] Generating User Manual ({len(sections)} sections in parallel)..."
+        )
+        written, errors = self.write_sections(state, sections)
+        guide = self.stitch(
+            state["repo_name"], [h for h, _ in written], [b for _, b in written]
         )
-        return {**state, "user_guide": guide}
+        return {"user_guide_ref": self.blobs.put(guide), "errors": errors}
 
 
 class CodeGenerator:
-    def __init__(self, llm):
+    def __init__(self, llm, blobs: BlobStore, model=None):
         self.llm = llm
+        self.blobs = blobs
+        # fingerprint.model_settings of `llm`; part of the resume key. The
+        # langgraph_style and worker_pool flags select the prompt template.
+        self.model = model or {}
+
+    prompt = staticmethod(generator_prompt)
 
-    def __call__(self, state: AgentState) -> AgentState:
+    def __call__(self, state: AgentState) -> Dict:
         logger.info("💻 [Generator] Writing MCP Server Code...")
 
         print("State langgraph_style:", state.get("langgraph_style", False))
-        # --- FIX: Code uses external USAGE.md instead of hardcoded string ---
-        if state.get("langgraph_style", False):
-            prompt_template = CODE_GENERATOR_PROMPT_LANGGRAPH
-        else:
-            prompt_template = CODE_GENERATOR_PROMPT
-
+        prompt_template, inputs = self.prompt(state)
         prompt = ChatPromptTemplate.from_template(prompt_template)
 
         chain = prompt | self.llm | StrOutputParser()
-        # We DO NOT pass user_guide content here to keep token count low
-        response = chain.invoke(
-            {
-                "repo_name": state["repo_name"],
-                "tools_json": json.dumps(state["refined_tools"], indent=2),
-                "script_path": "{script_path}",  # literal for template
-            }
-        )
+        if state.get("work_dir"):
+            # Stream tokens to disk so a dropped connection doesn't lose the code
+            artifact = StreamingArtifact(
+                state["work_dir"],
+                "server.py",
+                content_key(
+                    prompt_template,
+                    json.dumps(inputs, sort_keys=True),
+                    json.dumps(self.model, sort_keys=True),
+                ),
+            )
+            response = artifact.stream(chain, inputs)
+        else:
+            response = chain.invoke(inputs)
 
         code = response.replace("```python", "").replace("```", "").strip()
-        return {**state, "mcp_server_code": code}
+        return {"server_code_ref": self.blobs.put(code)}
 
 
 # --- Graph Builder ---
@@ -423,6 +492,14 @@ class DeepRepoAgent:
         model_name="gpt-5-nano",
         model_api_key=None,
         langgraph_style=False,
+        work_dir=None,
+        node_models=None,
+        cassette=None,
+        timer=None,
+        speculative=False,
+        source=None,
+        context=None,
+        worker_pool=False,
     ):
         self.repo_path = repo_path
         self.repo_name = os.path.basename(repo_path)
@@ -431,35 +508,70 @@ class DeepRepoAgent:
         self.model_url = model_url
         self.model_api_key = model_api_key
         self.langgraph_style = langgraph_style
-
-        # Initialize LLM once
-        if model_url:
-            self.llm = ChatOpenAI(
-                model=model_name,
-                temperature=0,
-                base_url=model_url,
-                api_key=model_api_key,
-            )
-        else:
-            self.llm = ChatOpenAI(
-                model=model_name,
-                temperature=0,
-                api_key=model_api_key,
-            )
+        # Generated tools run their scripts through worker_pool.WorkerPool
+        self.worker_pool = worker_pool
+        self.work_dir = work_dir
+        # Optional ingest.RepoSource the gatherer reads instead of repo_path
+        self.source = source
+        # Optional precomputed gatherer output ({"readme", "examples"})
+        self.context = context
+
+        # One client per distinct model config; nodes without their own
+        # routing share the default model.
+        base = ModelConfig(
+            model_name=model_name, model_url=model_url, api_key=model_api_key
+        )
+        self.node_models = node_models or resolve_node_models(base)
+        clients = {}
+        self.llms = {}
+        # Per-node model settings; streamed artifacts are keyed by them
+        self.models = {}
+        for node in NODE_NAMES:
+            config = self.node_models.get(node, base)
+            self.models[node] = model_settings(config)
+            # Hedged and recorded clients are tied to their node, so don't share them
+            key = (config, node if config.hedge or cassette else None)
+            if key not in clients:
+                clients[key] = build_chat_model(config, node=node, cassette=cassette)
+            self.llms[node] = clients[key]
+        self.llm = self.llms["generate"]
 
         # Build Graph
         builder = StateGraph(AgentState)
-        builder.add_node("gather", ContextGatherer())
-        builder.add_node("analyze", WorkflowAnalyst(self.llm))
-        builder.add_node("refine", SchemaRefiner(self.llm))
-        builder.add_node("critique", ToolCritic(self.llm))
-        builder.add_node("reviser", ToolReviser(self.llm))
-        builder.add_node("doc_writer", DocWriter(self.llm))
-        builder.add_node("generate", CodeGenerator(self.llm))
+        # Large state values are stored out of band; blobs follow the
+        # streamed artifacts so an interrupted cast can still resolve them.
+        self.blobs = BlobStore(os.path.join(work_dir, "blobs") if work_dir else None)
+        blobs = self.blobs
+        refiner = SchemaRefiner(self.llms["refine"], blobs)
+        nodes = {
+            "gather": ContextGatherer(blobs, source, context),
+            "analyze": WorkflowAnalyst(self.llms["analyze"], blobs),
+            "refine": refiner,
+            "critique": ToolCritic(self.llms["critique"], blobs),
+            "reviser": ToolReviser(self.llms["reviser"], blobs),
+            "doc_writer": DocWriter(
+                self.llms["doc_writer"], blobs, model=self.models["doc_writer"]
+            ),
+            "generate": CodeGenerator(
+                self.llms["generate"], blobs, model=self.models["generate"]
+            ),
+        }
+        if speculative:
+            nodes["speculate"] = SpeculativeRefiner(refiner)
+        for name, node in nodes.items():
+            if timer is not None:
+                node = timer.wrap(f"node:{name}", node)
+            builder.add_node(name, node)
 
         builder.set_entry_point("gather")
         builder.add_edge("gather", "analyze")
-        builder.add_edge("analyze", "refine")
+        if speculative:
+            # Fan out: refine heuristic scripts while the analyst runs, then
+            # join both branches in the reconciling refine step.
+            builder.add_edge("gather", "speculate")
+            builder.add_edge(["analyze", "speculate"], "refine")
+        else:
+            builder.add_edge("analyze", "refine")
         builder.add_edge("refine", "critique")
 
         builder.add_conditional_edges(
@@ -473,32 +585,194 @@ class DeepRepoAgent:
         builder.add_edge("generate", END)
 
         self.app = builder.compile()
+
+    def render_graph(self, path):
+        """
+        Write the agent graph to `path` without any network access: Mermaid
+        source by default, or a Graphviz PNG for `.png` paths (needs
+        pygraphviz).
+        """
+        graph = self.app.get_graph()
         try:
-            self.app.get_graph().draw_mermaid_png(
-                output_file_path="langgraph_visualization.png"
-            )
-        except Exception:
-            pass
+            if path.lower().endswith(".png"):
+                graph.draw_png(output_file_path=path)
+            else:
+                atomic_write(path, graph.draw_mermaid())
+        except ImportError as e:
+            logger.warning(f"⚠️ Could not render graph to {path}: {e}")
+            return
+        logger.info(f"🗺️ Agent graph written to {path}")
 
     def run(self) -> Dict[str, str]:
         initial_state = {
             "repo_path": self.repo_path,
             "repo_name": self.repo_name,
-            "ast_data": self.ast_result,
-            "readme_content": "",
-            "example_scripts": {},
+            "ast_ref": self.blobs.put(self.ast_result),
+            "readme_ref": "",
+            "examples_ref": "",
             "identified_workflows": [],
             "refined_tools": [],
-            "mcp_server_code": "",
+            "server_code_ref": "",
+            "user_guide_ref": "",
             "revision_count": 0,
             "critique_approved": False,
             "missing_paths": [],
-            "user_guide": "",
             "langgraph_style": self.langgraph_style,
+            "worker_pool": self.worker_pool,
+            "work_dir": self.work_dir,
+            "errors": [],
         }
 
         result = self.app.invoke(initial_state)
         return {
-            "server_code": result["mcp_server_code"],
-            "user_manual": result["user_guide"],
+            "server_code": self.blobs.get(result["server_code_ref"], ""),
+            "user_manual": self.blobs.get(result["user_guide_ref"], ""),
+            "tools": result["refined_tools"],
+            "workflows": result["identified_workflows"],
+            "context": context_fingerprint(
+                self.blobs.get(result["readme_ref"], ""),
+                self.blobs.get(result["examples_ref"], {}),
+                [s["path"] for s in self.ast_result.get("scripts", [])],
+            ),
+            "errors": result.get("errors", []),
+        }
+
+    def _context_fingerprint(self):
+        if self.context is not None:
+            readme, examples = self.context["readme"], self.context["examples"]
+        else:
+            readme, examples = gather_context(
+                self.source or open_source(self.repo_path)
+            )
+        return context_fingerprint(
+            readme, examples, [s["path"] for s in self.ast_result.get("scripts", [])]
+        )
+
+    def update(self, tool_state, fingerprints, server_code, user_manual):
+        """
+        Incremental cast: refine and regenerate only the tools of scripts
+        whose fingerprint changed since `tool_state` (plus new relevant
+        scripts), drop the tools of deleted scripts, and splice the results
+        into the previous `server_code` and `user_manual`. Workflows and the
+        remaining tools are reused. Returns None when the README or examples
+        they were derived from changed, the previous outputs can't be spliced
+        or a model call fails; the caller then runs the full graph.
+        """
+        context = self._context_fingerprint()
+        if tool_state.get("context") != context:
+            logger.info(
+                "🧩 [Incremental] README or examples changed; running the full pipeline"
+            )
+            return None
+        relevant = SchemaRefiner.relevant_scripts(
+            self.ast_result, tool_state.get("workflows", [])
+        )
+        plan = UpdatePlan(tool_state, fingerprints, [s["path"] for s in relevant])
+        if not plan.reusable:
+            return None
+        logger.info(f"🧩 [Incremental] {plan.summary()}")
+
+        scripts = [
+            s for s in self.ast_result.get("scripts", []) if s["path"] in plan.paths
+        ]
+        new_tools = []
+        if scripts:
+            refiner = SchemaRefiner(self.llms["refine"], self.blobs)
+            try:
+                refined = refiner.refine(scripts, plan.workflows)
+            except Exception as e:
+                logger.warning(
+                    f"⚠️ [Incremental] Refining changed scripts failed: {e}; "
+                    "running the full pipeline"
+                )
+                return None
+            tools = [t for t in refined if isinstance(t, dict)]
+            for t in tools:
+                if tool_path(t) not in plan.paths and len(scripts) == 1:
+                    t["script_path"] = scripts[0]["path"]
+                if tool_path(t) in plan.paths:
+                    new_tools.append(t)
+                else:
+                    logger.warning(
+                        f"⚠️ [Incremental] Dropping tool for unknown script: {t}"
+                    )
+
+        state = {
+            "repo_name": self.repo_name,
+            "refined_tools": new_tools,
+            "identified_workflows": plan.workflows,
+            "langgraph_style": self.langgraph_style,
+            "worker_pool": self.worker_pool,
+            "work_dir": self.work_dir,
+        }
+        generated, functions, sections, errors = "", [], [], []
+        if new_tools:
+            try:
+                generator = CodeGenerator(
+                    self.llms["generate"], self.blobs, model=self.models["generate"]
+                )
+                ref = generator(state)["server_code_ref"]
+            except Exception as e:
+                logger.warning(
+                    f"⚠️ [Incremental] Generating the changed tools failed: {e}; "
+                    "running the full pipeline"
+                )
+                return None
+            generated = self.blobs.get(ref, "")
+            try:
+                functions = match_functions(new_tools, generated)
+            except SyntaxError as e:
+                logger.warning(f"⚠️ [Incremental] Generated code doesn't parse: {e}")
+                return None
+            if not all(functions):
+                logger.warning(
+                    "⚠️ [Incremental] Generated code is missing tool functions"
+                )
+                return None
+            writer = DocWriter(
+                self.llms["doc_writer"], self.blobs, model=self.models["doc_writer"]
+            )
+            tool_sections = [
+                s for s in writer.plan_sections(state) if s[0].startswith(TOOL_HEADING)
+            ]
+            # One section per tool, in new_tools order
+            sections, errors = writer.write_sections(state, tool_sections)
+
+        code_groups, doc_groups = [], []
+        for path in plan.changed + plan.removed + plan.added:
+            indices = [i for i, t in enumerate(new_tools) if tool_path(t) == path]
+            old_functions = plan.functions.get(path, [])
+            old_names = [
+                e["tool"].get("tool_name", "unnamed_tool")
+                for e in tool_state["tools"]
+                if tool_path(e["tool"]) == path
+            ]
+            code_groups.append(
+                (
+                    old_functions,
+                    [function_source(generated, functions[i]) for i in indices],
+                )
+            )
+            doc_groups.append((old_names, [sections[i] for i in indices]))
+
+        try:
+            code = splice(server_code, code_groups)
+            if generated:
+                code = merge_imports(code, generated)
+        except (KeyError, SyntaxError) as e:
+            logger.warning(f"⚠️ [Incremental] Previous server.py can't be spliced: {e}")
+            return None
+        guide_sections = splice_guide(parse_guide(user_manual), doc_groups)
+        guide = DocWriter.stitch(
+            self.repo_name,
+            [h for h, _ in guide_sections],
+            [b for _, b in guide_sections],
+        )
+        return {
+            "server_code": code,
+            "user_manual": guide,
+            "tools": [e["tool"] for e in plan.kept] + new_tools,
+            "workflows": plan.workflows,
+            "context": context,
+            "errors": errors,
         }
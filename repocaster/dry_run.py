@@ -0,0 +1,295 @@
+import os
+import re
+import json
+import shutil
+import logging
+from functools import lru_cache
+
+from .ingest import open_source
+from .models import ModelConfig, NODE_NAMES
+from .streaming import atomic_write
+from .planning import (
+    gather_context,
+    analyst_inputs,
+    relevant_scripts,
+    refiner_inputs,
+    critic_inputs,
+    plan_sections,
+    generator_prompt,
+)
+from .prompts import WORKFLOW_ANALYST_PROMPT, SCHEMA_REFINER_PROMPT, TOOL_CRITIC_PROMPT
+
+logger = logging.getLogger("RepoCaster.DryRun")
+
+# USD per 1M (input, output) tokens; matched on the longest model-name prefix.
+# Indicative list prices only — override them in the model config's "prices".
+MODEL_PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-5": (1.25, 10.00),
+    "gpt-5-mini": (0.25, 2.00),
+    "gpt-5-nano": (0.05, 0.40),
+    "deepseek-chat": (0.27, 1.10),
+    "deepseek-reasoner": (0.55, 2.19),
+    "qwen3-max": (1.20, 6.00),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-pro": (1.25, 10.00),
+}
+
+# Rough completion sizes (tokens) used where the reply can't be known upfront
+COMPLETION_TOKENS_PER_WORKFLOW = 120
+COMPLETION_TOKENS_PER_SECTION = 450
+COMPLETION_TOKENS_PER_TOOL_CODE = 300
+COMPLETION_TOKENS_CRITIQUE = 80
+
+
+@lru_cache(maxsize=None)
+def _encoding(model_name):
+    # tiktoken downloads its vocabularies on first use; remember a failure
+    # (e.g. offline) instead of retrying for every prompt.
+    try:
+        import tiktoken
+
+        try:
+            return tiktoken.encoding_for_model(model_name or "")
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text, model_name=None) -> int:
+    """Token count via tiktoken when its encodings are available, else ~4 chars/token."""
+    encoding = _encoding(model_name)
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def model_price(model_name, prices=None):
+    """(input, output) USD per 1M tokens for `model_name`, or None if unknown."""
+    table = dict(MODEL_PRICES)
+    for name, price in (prices or {}).items():
+        if isinstance(price, dict):
+            price = (price.get("input", 0.0), price.get("output", 0.0))
+        table[name] = tuple(price)
+    matches = [k for k in table if (model_name or "").startswith(k)]
+    if not matches:
+        return None
+    return table[max(matches, key=len)]
+
+
+def _script_as_tool(script):
+    """Stand-in tool definition for an AST script (what the refiner roughly returns)."""
+    return {
+        "tool_name": script.get("name"),
+        "script_path": script.get("path"),
+        "description": script.get("description", ""),
+        "args": script.get("args", []),
+    }
+
+
+def _script_as_workflow(script):
+    """Stand-in workflow step for an AST script (one per script the analyst sees)."""
+    return {
+        "task_name": script.get("name"),
+        "target_script_path": script.get("path"),
+        "description": script.get("description", ""),
+        "essential_args": [
+            a.get("name") for a in script.get("args", []) if a.get("required")
+        ],
+    }
+
+
+def plan_prompts(
+    repo_path,
+    repo_name,
+    analysis,
+    langgraph_style=False,
+    source=None,
+    worker_pool=False,
+):
+    """
+    Render the prompts each node would send, without calling a model.
+
+    The analyst's prompt is exact. Later nodes depend on model replies, so
+    they are rendered for the scripts the refiner would pick without workflow
+    insights (its keyword heuristic), as in speculative mode; the manual's
+    workflow sections assume one workflow step per such script. The reviser
+    only runs when the critic finds gaps and is not estimated.
+
+    Returns a list of (node, label, prompt_text, expected_completion_tokens).
+    """
+    readme, examples = gather_context(source or open_source(repo_path))
+
+    scripts = relevant_scripts(analysis, [])
+    tools = [_script_as_tool(s) for s in scripts]
+    tool_paths = {t["script_path"] for t in tools}
+    candidates = [
+        s["path"] for s in analysis.get("scripts", []) if s["path"] not in tool_paths
+    ]
+
+    refine_inputs = refiner_inputs(scripts, [])
+    prompts = []
+    if readme or examples:
+        prompts.append(
+            (
+                "analyze",
+                "analyze",
+                WORKFLOW_ANALYST_PROMPT.format(
+                    **analyst_inputs(analysis, readme, examples)
+                ),
+                COMPLETION_TOKENS_PER_WORKFLOW * max(1, len(scripts)),
+            )
+        )
+    prompts.append(
+        (
+            "refine",
+            "refine",
+            SCHEMA_REFINER_PROMPT.format(**refine_inputs),
+            # Tool JSON is about twice the size of the compact script table
+            2 * count_tokens(refine_inputs["scripts_table"]),
+        )
+    )
+    if candidates:
+        prompts.append(
+            (
+                "critique",
+                "critique",
+                TOOL_CRITIC_PROMPT.format(**critic_inputs(tools, candidates)),
+                COMPLETION_TOKENS_CRITIQUE,
+            )
+        )
+
+    state = {
+        "repo_name": repo_name,
+        "refined_tools": tools,
+        # The analyst only runs (and finds workflows) with context to read
+        "identified_workflows": (
+            [_script_as_workflow(s) for s in scripts] if readme or examples else []
+        ),
+        "langgraph_style": langgraph_style,
+        "worker_pool": worker_pool,
+    }
+    for heading, template, inputs in plan_sections(state):
+        prompts.append(
+            (
+                "doc_writer",
+                heading,
+                template.format(**inputs),
+                COMPLETION_TOKENS_PER_SECTION,
+            )
+        )
+    template, inputs = generator_prompt(state)
+    prompts.append(
+        (
+            "generate",
+            "generate",
+            template.format(**inputs),
+            COMPLETION_TOKENS_PER_TOOL_CODE * max(1, len(tools)),
+        )
+    )
+    return prompts
+
+
+def estimate(prompts, node_models, prices=None):
+    """Aggregate token counts and cost per node for the routed models."""
+    nodes = {}
+    for node, _, text, completion in prompts:
+        config = node_models.get(node) or ModelConfig(model_name="gpt-4o")
+        entry = nodes.setdefault(
+            node,
+            {
+                "model": config.model_name,
+                "calls": 0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+            },
+        )
+        entry["calls"] += 1
+        entry["prompt_tokens"] += count_tokens(text, config.model_name)
+        entry["completion_tokens"] += completion
+
+    for entry in nodes.values():
+        price = model_price(entry["model"], prices)
+        entry["cost_usd"] = None
+        if price is not None:
+            entry["cost_usd"] = round(
+                (
+                    entry["prompt_tokens"] * price[0]
+                    + entry["completion_tokens"] * price[1]
+                )
+                / 1_000_000,
+                6,
+            )
+    # Unknown prices make the total unknown rather than silently low
+    costs = [e["cost_usd"] for e in nodes.values()]
+    total_cost = None if None in costs else sum(costs)
+    ordered = {n: nodes[n] for n in NODE_NAMES if n in nodes}
+    return {
+        "nodes": ordered,
+        "total": {
+            "calls": sum(e["calls"] for e in ordered.values()),
+            "prompt_tokens": sum(e["prompt_tokens"] for e in ordered.values()),
+            "completion_tokens": sum(e["completion_tokens"] for e in ordered.values()),
+            "cost_usd": round(total_cost, 6) if total_cost is not None else None,
+        },
+    }
+
+
+def print_estimate(report):
+    print(
+        f"{'node':<12} {'model':<20} {'calls':>5} {'prompt':>9} {'completion':>11} {'cost $':>10}"
+    )
+    rows = list(report["nodes"].items()) + [("total", report["total"])]
+    for node, entry in rows:
+        cost = entry.get("cost_usd")
+        print(
+            f"{node:<12} {entry.get('model', ''):<20} {entry['calls']:>5} "
+            f"{entry['prompt_tokens']:>9} {entry['completion_tokens']:>11} "
+            f"{(f'{cost:.4f}' if cost is not None else 'n/a'):>10}"
+        )
+
+
+def dry_run(
+    repo_path,
+    repo_name,
+    analysis,
+    out_dir,
+    node_models=None,
+    prices=None,
+    langgraph_style=False,
+    source=None,
+    worker_pool=False,
+):
+    """
+    Write analysis.json, the rendered prompts (prompts/*.txt) and
+    estimate.json to `out_dir`; returns the estimate.
+    """
+    prompts = plan_prompts(
+        repo_path, repo_name, analysis, langgraph_style, source, worker_pool
+    )
+    report = estimate(prompts, node_models or {}, prices)
+
+    prompt_dir = os.path.join(out_dir, "prompts")
+    # Render into a fresh directory and swap it in, so prompts left by an
+    # earlier run (e.g. with more tools) never sit next to these
+    staging = f"{prompt_dir}.tmp.{os.getpid()}"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    atomic_write(os.path.join(out_dir, "analysis.json"), json.dumps(analysis, indent=2))
+    for i, (node, label, text, _) in enumerate(prompts, 1):
+        slug = re.sub(r"[^a-z0-9]+", "_", label.lower()).strip("_")
+        name = f"{i:02d}_{node}.txt" if slug == node else f"{i:02d}_{node}.{slug}.txt"
+        atomic_write(os.path.join(staging, name), text)
+    stale = f"{prompt_dir}.old.{os.getpid()}"
+    if os.path.exists(prompt_dir):
+        os.replace(prompt_dir, stale)
+    os.replace(staging, prompt_dir)
+    shutil.rmtree(stale, ignore_errors=True)
+    atomic_write(os.path.join(out_dir, "estimate.json"), json.dumps(report, indent=2))
+    logger.info(f"🧾 [DryRun] {len(prompts)} prompts written to {prompt_dir}")
+    return report
@@ -0,0 +1,188 @@
+"""
+Compact tabular encoding for the script, tool and workflow schemas embedded
+in prompts. Indented JSON spends most of its tokens on whitespace, quotes and
+repeated keys ("type": "string", "required": false); this format writes each
+record as a header line plus one line per argument:
+
+    SCRIPT helper_scripts/parse_multiple_chains.py
+      --input_path s! Path to a folder with pdb files
+      --ca_only b Parse a backbone-only structure
+
+    TOOL parse_chains helper_scripts/parse_multiple_chains.py
+    : Parses PDB files into a JSONL file.
+      --input_path s! Path to a folder with pdb files
+      --num_designs i =1 Number of designs to generate
+
+    STEP 1 parse_chains helper_scripts/parse_multiple_chains.py
+    : Parses PDB files into JSON format for the model.
+      args: input_path, output_path
+      notes: Step 1: Prepares input data.
+
+Argument lines are `--<name> <type>[!] [=<default as JSON>] <description>`
+where `!` marks a required argument and the type is abbreviated
+(s=string, i=integer, n=number, b=boolean, l=list; other types are written
+in full). `decode_tools` / `decode_workflows` turn model output written in
+this format back into the usual dicts.
+"""
+
+import json
+
+TYPE_CODES = {
+    "string": "s",
+    "str": "s",
+    "integer": "i",
+    "int": "i",
+    "number": "n",
+    "float": "n",
+    "boolean": "b",
+    "bool": "b",
+    "list": "l",
+    "array": "l",
+}
+CODE_TYPES = {"s": "string", "i": "integer", "n": "number", "b": "boolean", "l": "list"}
+
+_decoder = json.JSONDecoder()
+
+
+def _one_line(text) -> str:
+    return " ".join(str(text or "").split())
+
+
+def _arg_line(arg) -> str:
+    type_name = str(arg.get("type") or "string")
+    line = f"  --{arg.get('name')} {TYPE_CODES.get(type_name, type_name)}"
+    if arg.get("required") is True:
+        line += "!"
+    if arg.get("default") is not None:
+        line += " =" + json.dumps(arg["default"], separators=(",", ":"))
+    help_text = _one_line(arg.get("description") or arg.get("help"))
+    return line + (f" {help_text}" if help_text else "")
+
+
+def encode_scripts(scripts) -> str:
+    """AST scripts (RepoAnalyzer output) as SCRIPT blocks."""
+    blocks = []
+    for script in scripts:
+        lines = [f"SCRIPT {script.get('path')}"]
+        lines.extend(_arg_line(a) for a in script.get("args", []))
+        blocks.append("\n".join(lines))
+    return "\n\n".join(blocks) or "(none)"
+
+
+def encode_tools(tools) -> str:
+    """Refined tool definitions as TOOL blocks."""
+    blocks = []
+    for tool in tools:
+        if not isinstance(tool, dict):
+            continue
+        path = tool.get("script_path") or tool.get("path") or ""
+        lines = [f"TOOL {tool.get('tool_name')} {path}".rstrip()]
+        if tool.get("description"):
+            lines.append(f": {_one_line(tool['description'])}")
+        lines.extend(_arg_line(a) for a in tool.get("args", []) if isinstance(a, dict))
+        blocks.append("\n".join(lines))
+    return "\n\n".join(blocks) or "(none)"
+
+
+def encode_workflows(workflows) -> str:
+    """Identified workflow steps as numbered STEP blocks."""
+    blocks = []
+    for i, step in enumerate(workflows, 1):
+        if not isinstance(step, dict):
+            continue
+        lines = [
+            f"STEP {i} {step.get('task_name')} {step.get('target_script_path', '')}".rstrip()
+        ]
+        if step.get("description"):
+            lines.append(f": {_one_line(step['description'])}")
+        if step.get("essential_args"):
+            lines.append("  args: " + ", ".join(map(str, step["essential_args"])))
+        if step.get("notes"):
+            lines.append(f"  notes: {_one_line(step['notes'])}")
+        blocks.append("\n".join(lines))
+    return "\n\n".join(blocks) or "(none)"
+
+
+def _parse_arg_line(line):
+    name, _, rest = line.strip()[2:].partition(" ")
+    type_token, _, rest = rest.strip().partition(" ")
+    required = type_token.endswith("!")
+    type_token = type_token.rstrip("!")
+    arg = {
+        "name": name,
+        "type": CODE_TYPES.get(type_token, type_token or "string"),
+        "required": required,
+    }
+    rest = rest.strip()
+    if rest.startswith("="):
+        try:
+            arg["default"], end = _decoder.raw_decode(rest[1:])
+            rest = rest[1 + end :].strip()
+        except ValueError:
+            default, _, rest = rest[1:].partition(" ")
+            arg["default"] = default
+    arg["description"] = rest
+    return arg
+
+
+def _blocks(text, keyword, fields):
+    """
+    Yield (header fields, body lines) for every `keyword` block in text. The
+    header is split into at most `fields` parts so the trailing script path
+    may contain spaces.
+    """
+    header, body = None, []
+    for raw in text.splitlines():
+        line = raw.rstrip()
+        if line.startswith(keyword + " "):
+            if header is not None:
+                yield header, body
+            header, body = line.split(None, fields)[1:], []
+        elif header is not None and line.strip():
+            body.append(line)
+    if header is not None:
+        yield header, body
+
+
+def decode_tools(text):
+    """Parse TOOL blocks back into tool definition dicts."""
+    tools = []
+    for header, body in _blocks(text, "TOOL", 2):
+        tool = {
+            "tool_name": header[0] if header else "",
+            "script_path": header[1] if len(header) > 1 else "",
+            "description": "",
+            "args": [],
+        }
+        for line in body:
+            if line.startswith(":"):
+                tool["description"] = line[1:].strip()
+            elif line.strip().startswith("--"):
+                tool["args"].append(_parse_arg_line(line))
+        tools.append(tool)
+    return tools
+
+
+def decode_workflows(text):
+    """Parse STEP blocks back into workflow dicts."""
+    workflows = []
+    for header, body in _blocks(text, "STEP", 3):
+        step = {
+            "task_name": header[1] if len(header) > 1 else "",
+            "target_script_path": header[2] if len(header) > 2 else "",
+            "description": "",
+            "essential_args": [],
+            "notes": "",
+        }
+        for line in body:
+            stripped = line.strip()
+            if line.startswith(":"):
+                step["description"] = line[1:].strip()
+            elif stripped.startswith("args:"):
+                step["essential_args"] = [
+                    a.strip() for a in stripped[5:].split(",") if a.strip()
+                ]
+            elif stripped.startswith("notes:"):
+                step["notes"] = stripped[6:].strip()
+        workflows.append(step)
+    return workflows
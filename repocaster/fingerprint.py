@@ -0,0 +1,112 @@
+import os
+import json
+import hashlib
+
+from .ingest import is_analyzable
+from .streaming import atomic_write
+
+FINGERPRINT_FILE = ".fingerprint.json"
+
+# Modules whose code shapes the generated server and manual; their source
+# stands in for the analyzer and prompt versions.
+PIPELINE_MODULES = (
+    "analyzer",
+    "prompts",
+    "planning",
+    "encoding",
+    "deep_agent",
+    "structured",
+    "incremental",
+    "worker_pool",
+)
+
+# Model settings that don't change what the model writes
+TRANSPORT_KEYS = ("api_key_env", "timeout", "hedge_fallback_delay")
+
+
+def pipeline_version() -> str:
+    digest = hashlib.sha256()
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    for module in PIPELINE_MODULES:
+        with open(os.path.join(package_dir, f"{module}.py"), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def analyzable_paths(source):
+    """Relative paths of the files the analyzer and gatherer can read."""
+    for root, _, files in source.walk():
+        for f in files:
+            path = os.path.join(root, f) if root else f
+            if is_analyzable(path):
+                yield path
+
+
+def file_digest(data) -> bytes:
+    return hashlib.sha256(data).digest()
+
+
+def combine_digests(digests) -> str:
+    """Content hash from {path: file_digest}; see content_hash."""
+    digest = hashlib.sha256()
+    for path in sorted(digests):
+        digest.update(path.encode("utf-8") + b"\0" + digests[path])
+    return digest.hexdigest()[:16]
+
+
+def content_hash(source) -> str:
+    """
+    Hash of every file the analyzer and gatherer can read from `source`.
+    Built from per-file digests, so a caller that caches them (WatchCaster)
+    can recompute it by reading only the files that changed.
+    """
+    digests = {}
+    for path in analyzable_paths(source):
+        try:
+            digests[path] = file_digest(source.read_bytes(path))
+        except OSError:
+            continue
+    return combine_digests(digests)
+
+
+def model_settings(config):
+    """Public settings of a ModelConfig that shape what the model writes."""
+    settings = config.public_dict()
+    for key in TRANSPORT_KEYS:
+        settings.pop(key, None)
+    if settings.get("hedge"):
+        settings["hedge"] = {
+            k: v for k, v in settings["hedge"].items() if k not in TRANSPORT_KEYS
+        }
+    return settings
+
+
+def cast_fingerprint(revision, node_models, langgraph_style, worker_pool=False):
+    """Return (fingerprint, components) for one cast's inputs."""
+    components = {
+        "revision": revision,
+        "pipeline": pipeline_version(),
+        "models": {node: model_settings(c) for node, c in sorted(node_models.items())},
+        "langgraph_style": bool(langgraph_style),
+    }
+    if worker_pool:
+        # Only when set, so casts without the pool keep their fingerprints
+        components["worker_pool"] = True
+    data = json.dumps(components, sort_keys=True)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()[:24], components
+
+
+def load_fingerprint(output_dir):
+    path = os.path.join(output_dir, FINGERPRINT_FILE)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("fingerprint")
+    except (OSError, ValueError):
+        return None
+
+
+def save_fingerprint(output_dir, fingerprint, components):
+    atomic_write(
+        os.path.join(output_dir, FINGERPRINT_FILE),
+        json.dumps({"fingerprint": fingerprint, "components": components}, indent=2),
+    )
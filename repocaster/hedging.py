@@ -0,0 +1,83 @@
+import os
+import re
+import json
+import logging
+import threading
+
+from .cache import cache_dir
+from .streaming import atomic_write
+
+logger = logging.getLogger("RepoCaster.Hedging")
+
+
+class LatencyStore:
+    """
+    Recent successful call latencies per (agent node, model), persisted as
+    one small JSON file each under the local cache so percentiles survive
+    runs. Keeping models apart means a node routed to another model doesn't
+    inherit the old model's latency profile.
+    """
+
+    def __init__(self, directory=None, max_samples=200):
+        self.directory = directory or cache_dir("latency")
+        self.max_samples = max_samples
+        self.samples = {}
+        self.lock = threading.Lock()
+
+    def _path(self, key):
+        name = re.sub(r"[^A-Za-z0-9_.-]+", "_", f"{key[0]}--{key[1]}")
+        return os.path.join(self.directory, f"{name}.json")
+
+    def _load(self, key):
+        if key not in self.samples:
+            try:
+                with open(self._path(key), "r", encoding="utf-8") as f:
+                    self.samples[key] = json.load(f)[-self.max_samples :]
+            except (OSError, ValueError):
+                self.samples[key] = []
+        return self.samples[key]
+
+    def record(self, node, model, seconds):
+        with self.lock:
+            samples = self._load((node, model))
+            samples.append(round(seconds, 3))
+            del samples[: -self.max_samples]
+            atomic_write(self._path((node, model)), json.dumps(samples))
+
+    def percentile(self, node, model, pct, min_samples=5):
+        """Latency at `pct` (0-100), or None until `min_samples` are recorded."""
+        with self.lock:
+            samples = sorted(self._load((node, model)))
+        if len(samples) < min_samples:
+            return None
+        index = min(len(samples) - 1, int(round(pct / 100.0 * (len(samples) - 1))))
+        return samples[index]
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def get_latency_store() -> LatencyStore:
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = LatencyStore()
+        return _default_store
+
+
+def is_valid_response(message, json_mode) -> bool:
+    """A hedged response only wins if it is usable by the calling node."""
+    content = message.content if isinstance(message.content, str) else ""
+    if not content.strip():
+        return False
+    if not json_mode:
+        return True
+    text = content.strip()
+    if text.startswith("```"):
+        text = text.strip("`").removeprefix("json").strip()
+    try:
+        json.loads(text)
+        return True
+    except ValueError:
+        return False
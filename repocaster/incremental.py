@@ -0,0 +1,287 @@
+import os
+import ast
+import json
+import hashlib
+import logging
+
+from .streaming import atomic_write
+
+logger = logging.getLogger("RepoCaster.Incremental")
+
+TOOLS_FILE = ".tools.json"
+
+# USAGE.md sections written per tool (see DocWriter.plan_sections)
+TOOL_HEADING = "Tool: "
+
+
+def tool_path(tool):
+    return tool.get("script_path") or tool.get("path")
+
+
+def script_fingerprints(analysis, source):
+    """{script path: hash of its AST entry (arguments) and file content}."""
+    fingerprints = {}
+    for script in analysis.get("scripts", []):
+        digest = hashlib.sha256(json.dumps(script, sort_keys=True).encode("utf-8"))
+        try:
+            digest.update(source.read_bytes(script["path"]))
+        except OSError:
+            pass
+        fingerprints[script["path"]] = digest.hexdigest()[:16]
+    return fingerprints
+
+
+def context_fingerprint(readme, examples, scripts=()):
+    """
+    Hash of the gathered README and examples the analyst and manual read.
+    Examples that are also CLI `scripts` are left out: their own
+    fingerprints already cover them.
+    """
+    examples = {p: c for p, c in examples.items() if p not in set(scripts)}
+    data = json.dumps([readme, examples], sort_keys=True).encode("utf-8")
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def _basis(components):
+    # Everything but the repository revision must match to reuse old tools
+    return {k: v for k, v in components.items() if k != "revision"}
+
+
+# --- server.py ---
+
+
+def tool_functions(code):
+    """
+    {name: (first line, last line)} of the top-level functions decorated
+    with `@...tool(...)` in `code`; lines are 1-based, inclusive, and
+    include the decorators.
+    """
+    spans = {}
+    for node in ast.parse(code).body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and any(
+            "tool" in ast.unparse(d) for d in node.decorator_list
+        ):
+            spans[node.name] = (node.decorator_list[0].lineno, node.end_lineno)
+    return spans
+
+
+def match_functions(tools, code):
+    """
+    Name of each tool's function in `code` (None when missing): the function
+    named after the tool, else the one that mentions its script path.
+    """
+    lines = code.splitlines()
+    spans = tool_functions(code)
+    taken = set()
+    names = []
+    for tool in tools:
+        name = tool.get("tool_name")
+        if name not in spans or name in taken:
+            path = tool_path(tool)
+            name = next(
+                (
+                    n
+                    for n, (start, end) in spans.items()
+                    if n not in taken
+                    and path
+                    and path in "\n".join(lines[start - 1 : end])
+                ),
+                None,
+            )
+        if name:
+            taken.add(name)
+        names.append(name)
+    return names
+
+
+def function_source(code, name):
+    start, end = tool_functions(code)[name]
+    return "\n".join(code.splitlines()[start - 1 : end])
+
+
+def _main_guard(code):
+    for node in ast.parse(code).body:
+        if isinstance(node, ast.If) and "__name__" in ast.unparse(node.test):
+            return node.lineno
+    return None
+
+
+def splice(code, groups):
+    """
+    Apply `groups` of (old function names, new function sources) to `code`:
+    the first old function of a group is replaced by the new sources, the
+    rest are removed, and groups without old functions are inserted before
+    the `if __name__ == "__main__":` block. Everything else is untouched.
+    """
+    lines = code.splitlines()
+    spans = tool_functions(code)
+    edits, inserts = [], []
+    for old, new in groups:
+        block = "\n\n\n".join(new)
+        if not old:
+            if block:
+                inserts.append(block)
+            continue
+        first = min(old, key=lambda n: spans[n][0])
+        for name in old:
+            start, end = spans[name]
+            edits.append((start, end, block if name == first and block else None))
+    if inserts:
+        anchor = _main_guard(code) or len(lines) + 1
+        edits.append((anchor, anchor - 1, "\n\n\n".join(inserts) + "\n\n"))
+
+    for start, end, text in sorted(edits, key=lambda e: e[0], reverse=True):
+        if text is None:
+            # Drop the blank lines that separated the removed function
+            while end < len(lines) and not lines[end].strip():
+                end += 1
+        lines[start - 1 : end] = text.split("\n") if text else []
+    ending = "\n" if code.endswith("\n") else ""
+    return "\n".join(lines).rstrip("\n") + ending
+
+
+def merge_imports(code, generated):
+    """Add the top-level imports of `generated` that `code` lacks after its last import."""
+    tree = ast.parse(code)
+    existing = {
+        ast.unparse(n) for n in tree.body if isinstance(n, (ast.Import, ast.ImportFrom))
+    }
+    missing = [
+        ast.unparse(n)
+        for n in ast.parse(generated).body
+        if isinstance(n, (ast.Import, ast.ImportFrom))
+        and ast.unparse(n) not in existing
+    ]
+    if not missing:
+        return code
+    imports = [n for n in tree.body if isinstance(n, (ast.Import, ast.ImportFrom))]
+    at = imports[-1].end_lineno if imports else 0
+    lines = code.splitlines()
+    lines[at:at] = missing
+    return "\n".join(lines) + ("\n" if code.endswith("\n") else "")
+
+
+# --- USAGE.md ---
+
+
+def parse_guide(text):
+    """Split a stitched USAGE.md into [(heading, body)] (Table of Contents excluded)."""
+    sections = []
+    for line in text.splitlines():
+        if line.startswith("## "):
+            sections.append([line[3:].strip(), []])
+        elif sections:
+            sections[-1][1].append(line)
+    return [
+        (heading, "\n".join(body).strip())
+        for heading, body in sections
+        if heading != "Table of Contents"
+    ]
+
+
+def splice_guide(sections, groups):
+    """
+    Like splice() for the manual: `groups` of (old tool names, [(heading,
+    body)] of the new tool sections). New sections without an old one go
+    after the last tool section.
+    """
+    replaced = {}
+    for old, new in groups:
+        headings = [TOOL_HEADING + n for n in old]
+        present = [h for h, _ in sections if h in headings]
+        if present:
+            replaced[present[0]] = new
+            for h in present[1:]:
+                replaced[h] = []
+        else:
+            replaced.setdefault(None, []).extend(new)
+
+    result = []
+    for heading, body in sections:
+        result.extend(replaced.get(heading, [(heading, body)]))
+    extra = replaced.get(None, [])
+    if extra:
+        tool_indices = [
+            i for i, (h, _) in enumerate(result) if h.startswith(TOOL_HEADING)
+        ]
+        at = tool_indices[-1] + 1 if tool_indices else min(1, len(result))
+        result[at:at] = extra
+    return result
+
+
+# --- Saved state ---
+
+
+def load_tool_state(output_dir, components):
+    """The tool state of the last cast into `output_dir`, if it can be reused with `components`."""
+    try:
+        with open(os.path.join(output_dir, TOOLS_FILE), "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if state.get("basis") != _basis(components):
+        return None
+    return state
+
+
+def save_tool_state(output_dir, components, result, fingerprints):
+    tools = [t for t in result.get("tools", []) if isinstance(t, dict)]
+    try:
+        functions = match_functions(tools, result["server_code"])
+    except SyntaxError as e:
+        # Not spliceable; the next cast of a changed repo runs in full
+        logger.warning(f"⚠️ [Incremental] server.py doesn't parse: {e}")
+        functions = [None] * len(tools)
+    state = {
+        "basis": _basis(components),
+        "scripts": sorted(fingerprints),
+        "context": result.get("context"),
+        "workflows": result.get("workflows", []),
+        "tools": [
+            {"tool": t, "function": f, "fingerprint": fingerprints.get(tool_path(t))}
+            for t, f in zip(tools, functions)
+        ],
+    }
+    atomic_write(os.path.join(output_dir, TOOLS_FILE), json.dumps(state, indent=2))
+
+
+class UpdatePlan:
+    """Which scripts' tools an incremental cast re-derives, keeps or drops."""
+
+    def __init__(self, state, fingerprints, relevant_paths):
+        self.workflows = state.get("workflows", [])
+        known = set(state.get("scripts", []))
+        by_path = {}
+        for entry in state["tools"]:
+            by_path.setdefault(tool_path(entry["tool"]), []).append(entry)
+
+        self.removed = [p for p in by_path if p not in fingerprints]
+        self.changed = [
+            p
+            for p, entries in by_path.items()
+            if p in fingerprints
+            and any(e["fingerprint"] != fingerprints[p] for e in entries)
+        ]
+        # New scripts that a full cast would also consider for tools
+        self.added = [p for p in relevant_paths if p not in known and p not in by_path]
+        stale = set(self.removed + self.changed)
+        self.kept = [e for e in state["tools"] if tool_path(e["tool"]) not in stale]
+        self.functions = {
+            p: [e["function"] for e in by_path.get(p, [])] for p in by_path
+        }
+
+    @property
+    def paths(self):
+        """Scripts to refine and regenerate."""
+        return self.changed + self.added
+
+    @property
+    def reusable(self):
+        # Functions being replaced or dropped must be found in server.py
+        return all(all(self.functions[p]) for p in self.changed + self.removed)
+
+    def summary(self):
+        return (
+            f"{len(self.changed)} changed, {len(self.added)} new, "
+            f"{len(self.removed)} removed scripts; {len(self.kept)} tools kept"
+        )
@@ -0,0 +1,396 @@
+import os
+import re
+import abc
+import shutil
+import posixpath
+import fnmatch
+import logging
+import tarfile
+import zipfile
+
+from .mirrors import SPARSE_PATTERNS, materialize, tracked_paths
+
+logger = logging.getLogger("RepoCaster.Ingest")
+
+ARCHIVE_SUFFIXES = (".tar.gz", ".tgz", ".tar.bz2", ".tar.xz", ".tar", ".zip")
+
+# How a local repository path becomes `<output_dir>/repo_source`
+LOCAL_MODES = ("copy", "link", "inplace")
+
+# Never mirrored into a linked tree: VCS data and environments
+LINK_SKIP_DIRS = {".git", ".hg", ".svn", "__pycache__", ".venv", "venv", "node_modules"}
+
+
+# Path-like words in tool argument defaults and descriptions
+_PATH_TOKEN = re.compile(r"[\w.\-/]+")
+
+
+def _clear(path):
+    if os.path.islink(path) or os.path.isfile(path):
+        os.remove(path)
+    elif os.path.exists(path):
+        shutil.rmtree(path)
+
+
+def link_tree(src, dst):
+    """
+    Recreate the directory structure of `src` at `dst` with every file
+    hard-linked (symlinked when `src` is on another filesystem), so no file
+    data is copied. Symlinks inside `src` are reproduced as-is. Returns the
+    number of files linked.
+
+    Hard links share their data with the source: tools that rewrite files in
+    place would change the original checkout too.
+    """
+    src = os.path.abspath(src)
+    count = 0
+    use_symlinks = False
+    for root, dirs, files in os.walk(src):
+        dirs[:] = [d for d in dirs if d not in LINK_SKIP_DIRS]
+        rel = os.path.relpath(root, src)
+        target_root = os.path.join(dst, rel) if rel != "." else dst
+        os.makedirs(target_root, exist_ok=True)
+
+        # os.walk lists symlinked directories but doesn't descend into them
+        for d in [d for d in dirs if os.path.islink(os.path.join(root, d))]:
+            os.symlink(os.readlink(os.path.join(root, d)), os.path.join(target_root, d))
+            dirs.remove(d)
+
+        for f in files:
+            source = os.path.join(root, f)
+            target = os.path.join(target_root, f)
+            if os.path.islink(source):
+                os.symlink(os.readlink(source), target)
+                continue
+            if not use_symlinks:
+                try:
+                    os.link(source, target)
+                    count += 1
+                    continue
+                except OSError:
+                    # Cross-device or unsupported: fall back for the rest
+                    use_symlinks = True
+            os.symlink(source, target)
+            count += 1
+    return count
+
+
+def ingest_local(src, target_dir, mode="copy"):
+    """
+    Materialize the local repository `src` at `target_dir`:
+
+    - "copy": full copy (the original behaviour).
+    - "link": hard-link tree without VCS data or environments; no data copied.
+    - "inplace": `target_dir` becomes a symlink to `src`, which is then
+      analyzed where it is. The pipeline only reads the repository.
+    """
+    if mode not in LOCAL_MODES:
+        raise ValueError(f"Unknown local mode: {mode} (expected one of {LOCAL_MODES})")
+    _clear(target_dir)
+    if mode == "copy":
+        print(f"📂 Copying local repo from {src}...")
+        shutil.copytree(src, target_dir, dirs_exist_ok=True)
+    elif mode == "link":
+        print(f"🔗 Linking local repo from {src}...")
+        count = link_tree(src, target_dir)
+        logger.info(f"🔗 [Ingest] Linked {count} files into {target_dir}")
+    else:
+        print(f"📌 Using local repo in place: {src}")
+        os.symlink(os.path.abspath(src), target_dir, target_is_directory=True)
+
+
+def is_archive(path) -> bool:
+    return os.path.isfile(path) and path.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def archive_stem(path) -> str:
+    """`esm-main.tar.gz` -> `esm-main`."""
+    name = os.path.basename(path)
+    for suffix in ARCHIVE_SUFFIXES:
+        if name.lower().endswith(suffix):
+            return name[: -len(suffix)]
+    return name
+
+
+def repo_name_for(repo_input) -> str:
+    """Output directory name for a repository URL, local path or archive."""
+    if os.path.isdir(repo_input):
+        return os.path.basename(os.path.abspath(repo_input))
+    if is_archive(repo_input):
+        return archive_stem(repo_input)
+    return repo_input.rstrip("/").split("/")[-1].replace(".git", "")
+
+
+def is_analyzable(name) -> bool:
+    """Whether the analyzer or context gatherer may read a file (SPARSE_PATTERNS)."""
+    base = os.path.basename(name).lower()
+    return any(fnmatch.fnmatch(base, p.lower()) for p in SPARSE_PATTERNS)
+
+
+class RepoSource(abc.ABC):
+    """
+    Read-only view of a repository's files for RepoAnalyzer and
+    ContextGatherer. Paths are relative to the repository root and use "/".
+    """
+
+    name = ""
+
+    @abc.abstractmethod
+    def walk(self):
+        """Like os.walk, top-down, with relative roots ("" for the root)."""
+
+    @abc.abstractmethod
+    def read_bytes(self, rel_path) -> bytes:
+        """Content of the file at `rel_path`."""
+
+    def read_text(self, rel_path, errors="ignore") -> str:
+        return self.read_bytes(rel_path).decode("utf-8", errors=errors)
+
+    def listdir(self):
+        """Files directly in the repository root."""
+        for _, _, files in self.walk():
+            return list(files)
+        return []
+
+
+class DirectorySource(RepoSource):
+    def __init__(self, path):
+        self.path = path
+        self.name = path
+
+    def walk(self):
+        for root, dirs, files in os.walk(self.path):
+            rel = os.path.relpath(root, self.path)
+            yield ("" if rel == "." else rel.replace(os.sep, "/")), dirs, files
+
+    def read_bytes(self, rel_path) -> bytes:
+        with open(os.path.join(self.path, rel_path), "rb") as f:
+            return f.read()
+
+
+class ArchiveSource(RepoSource):
+    """
+    A .tar(.gz|.bz2|.xz) or .zip snapshot read without extracting it. One
+    streaming pass records every member and keeps the analyzable ones
+    (is_analyzable, up to `max_member_size` bytes) in memory; weights and
+    datasets are skipped over. A single top-level directory, as in GitHub
+    snapshots, is stripped.
+    """
+
+    def __init__(self, path, max_member_size=2_000_000):
+        self.path = path
+        self.name = path
+        self.max_member_size = max_member_size
+        self.sizes = {}
+        self.contents = {}
+        self.prefix = ""
+        self._tree = None
+        self._load()
+
+    def _keep(self, name, size) -> bool:
+        return is_analyzable(name) and size <= self.max_member_size
+
+    @staticmethod
+    def _safe(name):
+        # Never let a member escape the repository root when materialized
+        parts = [p for p in name.replace("\\", "/").split("/") if p not in ("", ".")]
+        if not parts or ".." in parts or os.path.isabs(name):
+            return None
+        return "/".join(parts)
+
+    def _load(self):
+        sizes, contents = {}, {}
+        if self.path.lower().endswith(".zip"):
+            with zipfile.ZipFile(self.path) as archive:
+                for info in archive.infolist():
+                    name = self._safe(info.filename)
+                    if name is None or info.is_dir():
+                        continue
+                    sizes[name] = info.file_size
+                    if self._keep(name, info.file_size):
+                        contents[name] = archive.read(info)
+        else:
+            # "r|*" streams the (compressed) tar once, front to back
+            with tarfile.open(self.path, "r|*") as archive:
+                for member in archive:
+                    name = self._safe(member.name)
+                    if name is None or not member.isfile():
+                        continue
+                    sizes[name] = member.size
+                    if self._keep(name, member.size):
+                        contents[name] = archive.extractfile(member).read()
+
+        roots = {n.split("/", 1)[0] for n in sizes}
+        if len(roots) == 1 and all("/" in n for n in sizes):
+            self.prefix = roots.pop() + "/"
+            cut = len(self.prefix)
+            sizes = {n[cut:]: v for n, v in sizes.items()}
+            contents = {n[cut:]: v for n, v in contents.items()}
+        self.sizes, self.contents = sizes, contents
+        logger.info(
+            f"📦 [Ingest] {self.path}: {len(sizes)} members, "
+            f"{len(contents)} analyzable loaded without extraction"
+        )
+
+    def walk(self):
+        if self._tree is None:
+            self._tree = {}
+            for name in self.sizes:
+                parts = name.split("/")
+                for i in range(len(parts)):
+                    node = self._tree.setdefault("/".join(parts[:i]), (set(), []))
+                    if i < len(parts) - 1:
+                        node[0].add(parts[i])
+                    else:
+                        node[1].append(parts[i])
+        tree = self._tree
+
+        def visit(root):
+            subdirs, files = tree.get(root, (set(), []))
+            dirs = sorted(subdirs)
+            yield root, dirs, sorted(files)
+            for d in dirs:  # honours in-place pruning like os.walk
+                yield from visit(f"{root}/{d}" if root else d)
+
+        yield from visit("")
+
+    def read_bytes(self, rel_path) -> bytes:
+        rel_path = rel_path.replace(os.sep, "/")
+        if rel_path in self.contents:
+            return self.contents[rel_path]
+        if rel_path not in self.sizes:
+            raise FileNotFoundError(rel_path)
+        # Not kept in memory: fetch just this member (slow for compressed tars)
+        wanted = self.prefix + rel_path
+        if self.path.lower().endswith(".zip"):
+            with zipfile.ZipFile(self.path) as archive:
+                for info in archive.infolist():
+                    if self._safe(info.filename) == wanted:
+                        return archive.read(info)
+        else:
+            with tarfile.open(self.path, "r|*") as archive:
+                for member in archive:
+                    if member.isfile() and self._safe(member.name) == wanted:
+                        return archive.extractfile(member).read()
+        raise FileNotFoundError(rel_path)
+
+    def needed_paths(self, tools):
+        """Code and READMEs plus the members `tools` reference (referenced_paths)."""
+        analyzable = {name for name in self.sizes if is_analyzable(name)}
+        return analyzable | referenced_paths(tools, self.sizes)
+
+    def materialize(self, target_dir, paths=None):
+        """
+        Extract the members in `paths` (relative; all regular files when
+        None) to `target_dir`. Members are streamed to disk, so large ones
+        never sit in memory; links, devices and members escaping the root
+        are skipped. Returns the file count.
+        """
+        _clear(target_dir)
+        cut = len(self.prefix)
+        count = 0
+
+        def wanted(name):
+            return paths is None or name[cut:] in paths
+
+        def write(name, stream):
+            path = os.path.join(target_dir, *name[cut:].split("/"))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                shutil.copyfileobj(stream, f)
+
+        if self.path.lower().endswith(".zip"):
+            with zipfile.ZipFile(self.path) as archive:
+                for info in archive.infolist():
+                    name = self._safe(info.filename)
+                    if name is not None and not info.is_dir() and wanted(name):
+                        with archive.open(info) as stream:
+                            write(name, stream)
+                        count += 1
+        else:
+            with tarfile.open(self.path, "r|*") as archive:
+                for member in archive:
+                    name = self._safe(member.name)
+                    if name is not None and member.isfile() and wanted(name):
+                        write(name, archive.extractfile(member))
+                        count += 1
+        return count
+
+
+def referenced_paths(tools, paths):
+    """
+    The members of `paths` (relative, "/"-separated) the generated `tools`
+    need at run time besides the analyzable files: the files next to each
+    tool's script, and every file or directory named in an argument default
+    (or a path-looking word of an argument description), relative to the
+    root or to the script.
+    """
+    paths = set(paths)
+    under = {}
+    for path in paths:
+        parts = path.split("/")
+        for i in range(1, len(parts)):
+            under.setdefault("/".join(parts[:i]), []).append(path)
+
+    script_dirs, names = set(), []
+    for tool in tools:
+        if not isinstance(tool, dict):
+            continue
+        script = (tool.get("script_path") or tool.get("path") or "").replace("\\", "/")
+        script_dir = posixpath.dirname(posixpath.normpath(script))
+        script_dirs.add("" if script_dir == "." else script_dir)
+        for arg in tool.get("args") or []:
+            if not isinstance(arg, dict):
+                continue
+            if isinstance(arg.get("default"), str):
+                names.append(arg["default"])
+                names.extend(_PATH_TOKEN.findall(arg["default"]))
+            if isinstance(arg.get("description"), str):
+                names.extend(
+                    w
+                    for w in _PATH_TOKEN.findall(arg["description"])
+                    if "/" in w or "." in w.strip(".")
+                )
+
+    needed = {p for p in paths if posixpath.dirname(p) in script_dirs}
+    for name in names:
+        name = name.strip().rstrip(".")
+        if not name or name.startswith("/"):
+            continue
+        for base in script_dirs | {""}:
+            candidate = posixpath.normpath(posixpath.join(base, name))
+            if candidate in (".", "") or candidate.startswith(".."):
+                continue
+            if candidate in paths:
+                needed.add(candidate)
+            else:
+                needed.update(under.get(candidate, []))
+    return needed
+
+
+def fetch_referenced(repo_dir, tools):
+    """
+    Check out the files `tools` reference (see referenced_paths) in the
+    sparse checkout `repo_dir`; their blobs are fetched lazily from the
+    partial clone's remote. Returns the paths added.
+    """
+    paths = sorted(
+        p
+        for p in referenced_paths(tools, tracked_paths(repo_dir))
+        if not is_analyzable(p)
+    )
+    if paths:
+        # Anchored, escaped gitignore-style patterns matching exactly these files
+        materialize(
+            repo_dir, ["/" + re.sub(r"([*?\[\\!#])", r"\\\1", p) for p in paths]
+        )
+    return paths
+
+
+def open_source(path) -> RepoSource:
+    """A RepoSource for a directory or archive path (sources pass through)."""
+    if isinstance(path, RepoSource):
+        return path
+    if is_archive(path):
+        return ArchiveSource(path)
+    return DirectorySource(path)
@@ -0,0 +1,407 @@
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from .scheduler import get_scheduler, provider_key
+from .hedging import get_latency_store, is_valid_response
+
+logger = logging.getLogger("RepoCaster.LLM")
+
+
+class ScheduledChatModel(BaseChatModel):
+    """
+    Wraps a chat model so every call goes through the shared RequestScheduler
+    (rate limit, concurrency cap, retries, timeout). Bound kwargs such as
+    `response_format` are passed straight through to the wrapped model.
+    """
+
+    inner: BaseChatModel
+    provider: str
+    scheduler: Any = None
+    timeout: Optional[float] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return f"scheduled-{self.inner._llm_type}"
+
+    def _get_scheduler(self):
+        return self.scheduler or get_scheduler()
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager=None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        message = self._get_scheduler().call(
+            self.provider,
+            lambda: self.inner.invoke(messages, stop=stop, **kwargs),
+            timeout=self.timeout,
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager=None,
+        **kwargs: Any,
+    ):
+        for chunk in self._get_scheduler().stream(
+            self.provider, lambda: self.inner.stream(messages, stop=stop, **kwargs)
+        ):
+            generation = ChatGenerationChunk(message=chunk)
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.content, chunk=generation)
+            yield generation
+
+
+class HedgedChatModel(BaseChatModel):
+    """
+    Sends a call to `primary` and, if it hasn't answered within the node's
+    historical latency percentile for the primary model, sends the same
+    messages to `secondary`. Both calls are fanned out through the shared
+    scheduler, so they count against their providers' limits. The first
+    valid response wins (parseable JSON when the node asked for
+    `json_object`); a losing call that hasn't started is dropped, and one
+    already in flight keeps its slot until it returns. An invalid or failed
+    answer from either side triggers the other one immediately.
+
+    Streams are raced the same way up to their first chunk, against the
+    node's time-to-first-chunk history: the first endpoint to produce
+    output wins and is followed to the end, and the loser's stream is
+    closed at its next chunk.
+    """
+
+    primary: BaseChatModel
+    secondary: BaseChatModel
+    node: str
+    # Primary model name; latency history is kept per (node, model)
+    model: str = "default"
+    percentile: float = 95.0
+    # Hedge delay while the node has too little latency history (None: wait)
+    fallback_delay: Optional[float] = None
+    store: Any = None
+
+    @property
+    def _llm_type(self) -> str:
+        return f"hedged-{self.primary._llm_type}"
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager=None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        store = self.store or get_latency_store()
+        json_mode = (kwargs.get("response_format") or {}).get("type") == "json_object"
+        delay = store.percentile(self.node, self.model, self.percentile)
+        if delay is None:
+            delay = self.fallback_delay
+        started = time.monotonic()
+
+        def call_primary():
+            message = self.primary.invoke(messages, stop=stop, **kwargs)
+            store.record(self.node, self.model, time.monotonic() - started)
+            return message
+
+        def call_secondary():
+            return self.secondary.invoke(messages, stop=stop, **kwargs)
+
+        scheduler = get_scheduler()
+        # Set once a winner is found: the loser then gives up before it
+        # takes a provider slot or retries
+        settled = threading.Event()
+        futures = {scheduler.submit(call_primary, cancel=settled): "primary"}
+        secondary_sent = False
+        done, _ = wait(list(futures), timeout=delay)
+        if not done:
+            logger.info(
+                f"🪁 [Hedge] {self.node} exceeded p{self.percentile:g} "
+                f"({delay:.1f}s); sending to secondary endpoint"
+            )
+            futures[scheduler.submit(call_secondary, cancel=settled)] = "secondary"
+            secondary_sent = True
+
+        last_message, last_error = None, None
+        while futures:
+            done, _ = wait(list(futures), return_when=FIRST_COMPLETED)
+            for future in done:
+                source = futures.pop(future)
+                try:
+                    message = future.result()
+                except Exception as e:
+                    logger.warning(f"⚠️ [Hedge] {self.node} {source} failed: {e}")
+                    last_error = e
+                    message = None
+                if message is not None and is_valid_response(message, json_mode):
+                    settled.set()
+                    if source == "secondary":
+                        logger.info(f"🪁 [Hedge] {self.node} won by secondary endpoint")
+                    return ChatResult(generations=[ChatGeneration(message=message)])
+                if message is not None:
+                    last_message = message
+                if not secondary_sent:
+                    futures[scheduler.submit(call_secondary, cancel=settled)] = (
+                        "secondary"
+                    )
+                    secondary_sent = True
+
+        # Neither answer was usable: hand back what we got so the node's own
+        # error handling applies.
+        if last_message is not None:
+            return ChatResult(generations=[ChatGeneration(message=last_message)])
+        raise last_error
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager=None,
+        **kwargs: Any,
+    ):
+        store = self.store or get_latency_store()
+        # Streams are raced on time to first chunk, kept apart from call latency
+        node = f"{self.node}-first-chunk"
+        delay = store.percentile(node, self.model, self.percentile)
+        if delay is None:
+            delay = self.fallback_delay
+        started = time.monotonic()
+        # (source, chunk or None when the stream ended, error or None)
+        events = queue.Queue()
+        settled = threading.Event()
+        winner = []
+        sides = {"primary": self.primary, "secondary": self.secondary}
+
+        def pump(source):
+            first = True
+            try:
+                for chunk in sides[source].stream(messages, stop=stop, **kwargs):
+                    if winner and winner[0] != source:
+                        return  # Lost the race; closing the stream frees its slot
+                    if first and source == "primary":
+                        store.record(node, self.model, time.monotonic() - started)
+                    first = False
+                    events.put((source, chunk, None))
+                events.put((source, None, None))
+            except Exception as e:
+                events.put((source, None, e))
+
+        scheduler = get_scheduler()
+
+        def send(source):
+            scheduler.submit(lambda: pump(source), cancel=settled)
+
+        send("primary")
+        pending = {"primary"}
+        secondary_sent = False
+        last_error = None
+        try:
+            while True:
+                try:
+                    source, chunk, error = events.get(
+                        timeout=None if secondary_sent or winner else delay
+                    )
+                except queue.Empty:
+                    logger.info(
+                        f"🪁 [Hedge] {self.node} stream exceeded p{self.percentile:g} "
+                        f"({delay:.1f}s) to first chunk; sending to secondary endpoint"
+                    )
+                    send("secondary")
+                    pending.add("secondary")
+                    secondary_sent = True
+                    continue
+                if winner and source != winner[0]:
+                    continue
+                if chunk is not None:
+                    if not winner:
+                        winner.append(source)
+                        settled.set()
+                        if source == "secondary":
+                            logger.info(
+                                f"🪁 [Hedge] {self.node} stream won by secondary endpoint"
+                            )
+                    generation = ChatGenerationChunk(message=chunk)
+                    if run_manager:
+                        run_manager.on_llm_new_token(chunk.content, chunk=generation)
+                    yield generation
+                    continue
+                if winner:
+                    # The winner finished, or failed after producing output
+                    if error is not None:
+                        raise error
+                    return
+                # A side ended without any output: fall over to the other one
+                pending.discard(source)
+                if error is not None:
+                    logger.warning(f"⚠️ [Hedge] {self.node} {source} failed: {error}")
+                    last_error = error
+                if not secondary_sent:
+                    send("secondary")
+                    pending.add("secondary")
+                    secondary_sent = True
+                elif not pending:
+                    if last_error is not None:
+                        raise last_error
+                    return
+        finally:
+            # Also when the consumer stops early: pumps stop at their next chunk
+            settled.set()
+            if not winner:
+                winner.append(None)
+
+
+class RecordingChatModel(BaseChatModel):
+    """Passes calls through to `inner` and stores every exchange in a Cassette."""
+
+    inner: BaseChatModel
+    cassette: Any
+    node: str
+
+    @property
+    def _llm_type(self) -> str:
+        return f"recording-{self.inner._llm_type}"
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager=None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        started = time.monotonic()
+        message = self.inner.invoke(messages, stop=stop, **kwargs)
+        self.cassette.put(
+            self.cassette.key(self.node, messages, kwargs),
+            self.node,
+            messages,
+            message.content,
+            time.monotonic() - started,
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager=None,
+        **kwargs: Any,
+    ):
+        started = time.monotonic()
+        parts = []
+        for chunk in self.inner.stream(messages, stop=stop, **kwargs):
+            parts.append(chunk.content)
+            generation = ChatGenerationChunk(message=chunk)
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.content, chunk=generation)
+            yield generation
+        self.cassette.put(
+            self.cassette.key(self.node, messages, kwargs),
+            self.node,
+            messages,
+            "".join(parts),
+            time.monotonic() - started,
+        )
+
+
+class ReplayChatModel(BaseChatModel):
+    """Offline chat model answering from a recorded Cassette."""
+
+    cassette: Any
+    node: str
+    # Streaming replays the response in chunks of this many characters
+    chunk_size: int = 64
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay"
+
+    def _lookup(self, messages, kwargs):
+        entry = self.cassette.get(self.cassette.key(self.node, messages, kwargs))
+        return entry["response"], self.cassette.replay_delay(entry)
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager=None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        response, delay = self._lookup(messages, kwargs)
+        time.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(response))])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager=None,
+        **kwargs: Any,
+    ):
+        response, delay = self._lookup(messages, kwargs)
+        pieces = [
+            response[i : i + self.chunk_size]
+            for i in range(0, len(response), self.chunk_size)
+        ] or [""]
+        for piece in pieces:
+            time.sleep(delay / len(pieces))
+            generation = ChatGenerationChunk(message=AIMessageChunk(piece))
+            if run_manager:
+                run_manager.on_llm_new_token(piece, chunk=generation)
+            yield generation
+
+
+def build_chat_model(config, node=None, cassette=None) -> BaseChatModel:
+    """
+    Scheduled ChatOpenAI client for a `models.ModelConfig`, or the matching
+    record/replay model when a Cassette is given.
+    """
+    if cassette is not None and cassette.mode == "replay":
+        return ReplayChatModel(cassette=cassette, node=node or "default")
+    if cassette is not None:
+        return RecordingChatModel(
+            inner=build_chat_model(config, node=node),
+            cassette=cassette,
+            node=node or "default",
+        )
+
+    from langchain_openai import ChatOpenAI
+
+    # Retries and timeouts are owned by the shared scheduler, so the client
+    # itself must not retry on its own.
+    kwargs = {
+        "model": config.model_name,
+        "temperature": 0,
+        "api_key": config.resolve_api_key(),
+        "max_retries": 0,
+    }
+    if config.model_url:
+        kwargs["base_url"] = config.model_url
+    if config.max_tokens:
+        kwargs["max_tokens"] = config.max_tokens
+    if config.timeout:
+        kwargs["timeout"] = config.timeout
+    llm = ScheduledChatModel(
+        inner=ChatOpenAI(**kwargs),
+        provider=provider_key(config.model_url),
+        timeout=config.timeout,
+    )
+    if config.hedge:
+        return HedgedChatModel(
+            primary=llm,
+            secondary=build_chat_model(config.hedge),
+            node=node or "default",
+            model=config.model_name or "default",
+            percentile=config.hedge_percentile,
+            fallback_delay=config.hedge_fallback_delay,
+        )
+    return llm
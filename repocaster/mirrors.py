@@ -0,0 +1,181 @@
+import os
+import re
+import shutil
+import hashlib
+import logging
+import subprocess
+
+from .cache import cache_dir, file_lock
+
+logger = logging.getLogger("RepoCaster.Mirrors")
+
+# Files the analyzer and context gatherer read; everything else (weights,
+# datasets, example outputs) stays unfetched in sparse mode.
+SPARSE_PATTERNS = [
+    "*.py",
+    "*.sh",
+    "*.bash",
+    "*.ipynb",
+    "README*",
+    "readme*",
+    "Readme*",
+]
+
+
+def _git(*args, cwd=None, capture=False, input=None):
+    result = subprocess.run(
+        ["git", *args],
+        cwd=cwd,
+        check=True,
+        capture_output=capture,
+        text=True,
+        input=input,
+    )
+    return result.stdout.strip() if capture else None
+
+
+def mirror_path(url) -> str:
+    """Bare mirror location for `url`: a readable name plus a hash of the URL."""
+    name = re.sub(r"[^A-Za-z0-9._-]+", "_", url.rstrip("/").split("/")[-1])
+    name = name[:-4] if name.endswith(".git") else name
+    digest = hashlib.sha1(url.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(cache_dir("mirrors"), f"{name}-{digest}.git")
+
+
+class MirrorCache:
+    """
+    Bare `git clone --mirror` copies of remote repositories, keyed by URL and
+    kept under the RepoCaster cache. The first cast of a URL downloads the
+    full history once; later casts only fetch new objects. Every cast gets
+    its own detached worktree of the mirror's HEAD, so nothing is re-cloned.
+
+    All git operations on a mirror happen under a per-mirror file lock, so
+    concurrent casts of the same repository share it safely.
+    """
+
+    def __init__(self, sparse=False):
+        # Blob-less partial mirror + sparse checkout of SPARSE_PATTERNS
+        self.sparse = sparse
+
+    def _update(self, url, mirror):
+        if os.path.isdir(mirror):
+            print(f"🔄 Fetching updates for cached mirror of {url}...")
+            _git("remote", "update", "--prune", cwd=mirror)
+            return
+        print(f"🚀 Cloning {url} into the mirror cache...")
+        # Clone next to the final path and rename, so an interrupted clone
+        # is never mistaken for a complete mirror.
+        partial = mirror + ".partial"
+        shutil.rmtree(partial, ignore_errors=True)
+        filters = ["--filter=blob:none"] if self.sparse else []
+        _git("clone", "--mirror", *filters, url, partial)
+        os.replace(partial, mirror)
+
+    def checkout(self, url, target_dir, revision="HEAD") -> str:
+        """
+        Refresh the mirror of `url` and materialize `revision` as a detached
+        worktree at `target_dir` (replacing it). Returns the commit checked out.
+        """
+        mirror = mirror_path(url)
+        with file_lock(mirror + ".lock"):
+            self._update(url, mirror)
+            commit = _git(
+                "rev-parse", f"{revision}^{{commit}}", cwd=mirror, capture=True
+            )
+            if os.path.exists(target_dir):
+                shutil.rmtree(target_dir)
+            # Forget worktrees whose directories were deleted by earlier casts
+            _git("worktree", "prune", cwd=mirror)
+            checkout = ["--no-checkout"] if self.sparse else []
+            _git(
+                "worktree",
+                "add",
+                "--detach",
+                "--force",
+                *checkout,
+                os.path.abspath(target_dir),
+                commit,
+                cwd=mirror,
+                capture=True,
+            )
+            if self.sparse:
+                sparse_checkout(target_dir)
+            else:
+                _own_worktree_config(target_dir)
+        logger.info(f"🌳 [Mirrors] {url} @ {commit[:12]} -> {target_dir}")
+        return commit
+
+
+def _own_worktree_config(repo_dir):
+    # Sparse settings must stay local to each worktree, not the shared
+    # mirror. With per-worktree config enabled, the bare mirror's
+    # core.bare=true would apply to its worktrees too, so override it.
+    _git("config", "extensions.worktreeConfig", "true", cwd=repo_dir)
+    _git("config", "--worktree", "core.bare", "false", cwd=repo_dir)
+
+
+def sparse_checkout(repo_dir, patterns=None):
+    """
+    Restrict the working tree of `repo_dir` to `patterns` (non-cone,
+    gitignore-style; SPARSE_PATTERNS by default) and check them out. In a
+    partial clone only the blobs of matching files are downloaded.
+    """
+    _own_worktree_config(repo_dir)
+    _git("sparse-checkout", "init", "--no-cone", cwd=repo_dir)
+    _git(
+        "sparse-checkout",
+        "set",
+        "--no-cone",
+        *(patterns or SPARSE_PATTERNS),
+        cwd=repo_dir,
+    )
+    if not os.listdir(repo_dir) or os.listdir(repo_dir) == [".git"]:
+        _git("checkout", "--quiet", "HEAD", cwd=repo_dir)
+
+
+def sparse_clone(url, target_dir):
+    """Shallow, blob-less clone of `url` with a sparse checkout (no mirror)."""
+    print(f"🚀 Sparse-cloning {url} (analyzable files only)...")
+    if os.path.exists(target_dir):
+        shutil.rmtree(target_dir)
+    _git(
+        "clone",
+        "--depth",
+        "1",
+        "--filter=blob:none",
+        "--no-checkout",
+        url,
+        target_dir,
+    )
+    sparse_checkout(target_dir)
+
+
+def head_commit(repo_dir) -> str:
+    return _git("rev-parse", "HEAD", cwd=repo_dir, capture=True)
+
+
+def disable_sparse(repo_dir):
+    """Check out every file of a sparse checkout; missing blobs are fetched."""
+    _git("sparse-checkout", "disable", cwd=repo_dir)
+
+
+def tracked_paths(repo_dir):
+    """Every file path of HEAD, checked out or not (no blobs are fetched)."""
+    listing = _git("ls-tree", "-r", "--name-only", "HEAD", cwd=repo_dir, capture=True)
+    return listing.splitlines() if listing else []
+
+
+def materialize(repo_dir, paths):
+    """
+    Add `paths` (files, directories or patterns) to a sparse checkout; their
+    blobs are fetched on demand from the partial clone's remote.
+    """
+    # Patterns go through stdin: a tool may reference thousands of files
+    _git(
+        "sparse-checkout",
+        "add",
+        "--stdin",
+        cwd=repo_dir,
+        input="".join(f"{p}\n" for p in paths),
+    )
+    logger.info(f"📥 [Mirrors] Materialized {len(paths)} paths in {repo_dir}")
@@ -0,0 +1,96 @@
+import os
+import json
+from dataclasses import dataclass, asdict, replace, fields
+from typing import Dict, Optional
+
+# LLM nodes of the DeepRepoAgent graph that can be routed to their own model
+NODE_NAMES = ("analyze", "refine", "critique", "reviser", "doc_writer", "generate")
+
+
+@dataclass(frozen=True)
+class ModelConfig:
+    """Connection settings for one OpenAI-compatible chat model."""
+
+    model_name: str = "gpt-4o"
+    model_url: Optional[str] = None
+    api_key_env: str = "OPENAI_API_KEY"
+    api_key: Optional[str] = None
+    max_tokens: Optional[int] = None
+    timeout: Optional[float] = None
+    # Optional second endpoint raced against this one (see llm.HedgedChatModel)
+    hedge: Optional["ModelConfig"] = None
+    hedge_percentile: float = 95.0
+    hedge_fallback_delay: Optional[float] = None
+
+    def resolve_api_key(self):
+        return self.api_key or os.environ.get(self.api_key_env)
+
+    def merged(self, overrides: Optional[Dict]) -> "ModelConfig":
+        """Copy of this config with the known keys of `overrides` applied."""
+        known = {f.name for f in fields(self)}
+        unknown = set(overrides or {}) - known
+        if unknown:
+            raise ValueError(f"Unknown model config keys: {sorted(unknown)}")
+        overrides = dict(overrides or {})
+        if "api_key_env" in overrides:
+            # A different key variable means the inherited key no longer applies
+            overrides.setdefault("api_key", None)
+        if isinstance(overrides.get("hedge"), dict):
+            overrides["hedge"] = ModelConfig().merged(overrides["hedge"])
+        return replace(self, **overrides)
+
+    def public_dict(self) -> Dict:
+        """Settings without the secret, safe for logs and fingerprints."""
+        data = asdict(self)
+        data.pop("api_key")
+        if self.hedge:
+            data["hedge"] = self.hedge.public_dict()
+        return data
+
+
+def load_model_config(path) -> Dict:
+    """
+    Read a JSON model routing file:
+
+        {
+            "default": {"model_name": "qwen3-max", "model_url": "...", "api_key_env": "QWEN_API_KEY"},
+            "nodes": {
+                "analyze": {"model_name": "qwen-turbo", "max_tokens": 2048},
+                "critique": {"model_name": "qwen-turbo", "timeout": 60},
+                "generate": {"hedge": {"model_name": "deepseek-chat", "model_url": "...",
+                                       "api_key_env": "DEEPSEEK_API_KEY"},
+                             "hedge_percentile": 90}
+            },
+            "providers": {"dashscope.aliyuncs.com": {"requests_per_minute": 120}},
+            "prices": {"qwen-turbo": {"input": 0.05, "output": 0.2}}
+        }
+
+    Every section is optional. `providers` feeds the scheduler's per-host limits;
+    `prices` (USD per 1M tokens) feeds the --dry_run cost estimate.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    unknown_nodes = set(config.get("nodes", {})) - set(NODE_NAMES)
+    if unknown_nodes:
+        raise ValueError(
+            f"Unknown nodes in {path}: {sorted(unknown_nodes)} (expected {NODE_NAMES})"
+        )
+    return config
+
+
+def resolve_node_models(
+    base: ModelConfig, config: Optional[Dict] = None, node_overrides=None
+) -> Dict[str, ModelConfig]:
+    """
+    Build the per-node ModelConfig map: `base` <- config "default" <- config
+    "nodes"[node] <- `node_overrides` ({"critique": "gpt-4o-mini"}).
+    """
+    config = config or {}
+    default = base.merged(config.get("default"))
+    node_models = {}
+    for node in NODE_NAMES:
+        node_config = default.merged(config.get("nodes", {}).get(node))
+        if node_overrides and node in node_overrides:
+            node_config = replace(node_config, model_name=node_overrides[node])
+        node_models[node] = node_config
+    return node_models
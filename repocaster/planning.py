@@ -0,0 +1,235 @@
+"""
+Prompt planning for the agent nodes: context gathering, script selection
+and prompt inputs. Pure functions without LangChain, shared by deep_agent
+and dry runs, so an analysis-only run starts without the LLM stack.
+"""
+
+import os
+from typing import List, Dict
+
+from .encoding import encode_scripts, encode_tools, encode_workflows
+from .prompts import (
+    DOC_INTRO_PROMPT,
+    DOC_TOOL_SECTION_PROMPT,
+    DOC_WORKFLOW_SECTION_PROMPT,
+    CODE_GENERATOR_PROMPT,
+    CODE_GENERATOR_PROMPT_LANGGRAPH,
+    WORKER_POOL_PROMPT,
+)
+
+# --- Gatherer ---
+
+
+def gather_context(source):
+    """(README text, {path: content} of usage examples) of a RepoSource."""
+    readme = ""
+    examples = {}
+
+    # Read README
+    for f in source.listdir():
+        if f.lower().startswith("readme"):
+            try:
+                readme = source.read_text(f)
+            except:
+                pass
+
+    # Search Usage Examples (.sh, .ipynb, key .py)
+    for root, dirs, files in source.walk():
+        if any(x in root for x in [".git", "__pycache__", "venv", "node_modules"]):
+            continue
+        for f in files:
+            # As long as it is a script, or a py file with run/inference in the name
+            if f.endswith((".sh", ".bash", ".ipynb")) or (
+                f.endswith(".py")
+                and any(k in f for k in ["run", "infer", "example", "submit"])
+            ):
+                rel_name = os.path.join(root, f) if root else f
+                try:
+                    content = source.read_text(rel_name)
+                    if 50 < len(content) < 15000:  # Simple length filter
+                        examples[rel_name] = content
+                except:
+                    pass
+        if len(examples) > 15:
+            break
+    return readme, examples
+
+
+# --- Analyst ---
+
+
+def analyst_inputs(ast_data, readme, examples) -> Dict:
+    ast_summary = "\n".join(
+        f"{s['path']} ({len(s.get('args', []))} args)"
+        for s in ast_data.get("scripts", [])
+    )
+
+    examples_text = ""
+    for name, content in list(examples.items())[:10]:  # Limit to top 10 examples
+        examples_text += f"\n--- FILE: {name} ---\n{content[:2000]}\n"
+
+    return {
+        "ast_summary": ast_summary,
+        "examples_text": examples_text,
+        "readme_snippet": readme[:3000],
+    }
+
+
+# --- Refiner, critic and reviser ---
+
+# Script names that look like inference entry points or data prep helpers
+RELEVANT_SCRIPT_KEYWORDS = [
+    "inference",
+    "run",
+    "predict",
+    "generate",
+    "parse",
+    "assign",
+    "make",
+    "prep",
+]
+
+
+def heuristic_scripts(ast_data) -> List[Dict]:
+    """AST scripts whose names match RELEVANT_SCRIPT_KEYWORDS (no LLM needed)."""
+    return [
+        script
+        for script in ast_data.get("scripts", [])
+        if any(w in script["name"] for w in RELEVANT_SCRIPT_KEYWORDS)
+    ]
+
+
+def relevant_scripts(ast_data, workflows) -> List[Dict]:
+    """Scripts named by a workflow or matching the keyword heuristic."""
+    workflow_paths = []
+    if workflows and isinstance(workflows, list):
+        for w in workflows:
+            if isinstance(w, dict):
+                path = w.get("target_script_path")
+                if path:
+                    workflow_paths.append(path)
+
+    # Include if it's part of the identified workflow OR looks like a main script
+    heuristic_paths = {s["path"] for s in heuristic_scripts(ast_data)}
+    relevant = [
+        script
+        for script in ast_data.get("scripts", [])
+        if script["path"] in workflow_paths or script["path"] in heuristic_paths
+    ]
+    if not relevant:
+        # Fallback: use all scripts if analyst failed
+        relevant = ast_data.get("scripts", [])[:5]
+    return relevant
+
+
+def refiner_inputs(scripts, workflows) -> Dict:
+    return {
+        "scripts_table": encode_scripts(scripts),
+        "workflows_table": encode_workflows(workflows),
+    }
+
+
+def critic_inputs(tools, candidates) -> Dict:
+    return {
+        "tool_definitions": encode_tools(tools),
+        # Limit to avoid token overflow
+        "candidates": "\n".join(candidates[:50]),
+    }
+
+
+def reviser_inputs(missing_scripts) -> Dict:
+    return {"scripts_table": encode_scripts(missing_scripts)}
+
+
+# --- Doc writer ---
+
+
+def markdown_anchor(heading: str) -> str:
+    """GitHub-style anchor for a Markdown heading."""
+    anchor = "".join(
+        c for c in heading.strip().lower() if c.isalnum() or c in (" ", "-", "_")
+    )
+    return anchor.replace(" ", "-")
+
+
+def plan_sections(state):
+    """Return (heading, prompt_template, inputs) for every manual section."""
+    tools = [t for t in state["refined_tools"] if isinstance(t, dict)]
+    workflows = [w for w in state["identified_workflows"] if isinstance(w, dict)]
+
+    tools_summary = "\n".join(
+        f"- {t.get('tool_name', 'unnamed_tool')}: {t.get('description', '')}"
+        for t in tools
+    )
+    workflows_summary = "\n".join(
+        f"{i}. {w.get('task_name', 'task')} ({w.get('target_script_path', '')}): "
+        f"{w.get('description', '')}"
+        for i, w in enumerate(workflows, 1)
+    )
+
+    sections = [
+        (
+            "Introduction",
+            DOC_INTRO_PROMPT,
+            {
+                "repo_name": state["repo_name"],
+                "tools_summary": tools_summary or "(none)",
+                "workflows_summary": workflows_summary or "(none)",
+            },
+        )
+    ]
+    for t in tools:
+        sections.append(
+            (
+                f"Tool: {t.get('tool_name', 'unnamed_tool')}",
+                DOC_TOOL_SECTION_PROMPT,
+                {
+                    "repo_name": state["repo_name"],
+                    "tool_table": encode_tools([t]),
+                },
+            )
+        )
+    for w in workflows:
+        sections.append(
+            (
+                f"Workflow: {w.get('task_name', 'task')}",
+                DOC_WORKFLOW_SECTION_PROMPT,
+                {
+                    "repo_name": state["repo_name"],
+                    "workflow_table": encode_workflows([w]),
+                    "tools_summary": tools_summary or "(none)",
+                },
+            )
+        )
+    return sections
+
+
+def stitch(repo_name, headings, bodies):
+    lines = [f"# {repo_name} MCP Server User Guide", "", "## Table of Contents", ""]
+    for heading in headings:
+        lines.append(f"- [{heading}](#{markdown_anchor(heading)})")
+    for heading, body in zip(headings, bodies):
+        lines.extend(["", f"## {heading}", "", body.strip()])
+    return "\n".join(lines) + "\n"
+
+
+# --- Generator ---
+
+
+def generator_prompt(state):
+    """Return (prompt_template, inputs) for the server code generation."""
+    # --- FIX: Code uses external USAGE.md instead of hardcoded string ---
+    if state.get("langgraph_style", False):
+        prompt_template = CODE_GENERATOR_PROMPT_LANGGRAPH
+    else:
+        prompt_template = CODE_GENERATOR_PROMPT
+    if state.get("worker_pool", False):
+        prompt_template += WORKER_POOL_PROMPT
+
+    # We DO NOT pass user_guide content here to keep token count low
+    inputs = {
+        "repo_name": state["repo_name"],
+        "tools_table": encode_tools(state["refined_tools"]),
+        "script_path": "{script_path}",  # literal for template
+    }
+    return prompt_template, inputs
@@ -0,0 +1,200 @@
+import io
+import os
+import re
+import json
+import time
+import shutil
+import pstats
+import cProfile
+import logging
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+from .streaming import atomic_write
+
+logger = logging.getLogger("RepoCaster.Profile")
+
+# --profile values -> (cpu, memory)
+PROFILE_MODES = {"cpu": (True, False), "memory": (False, True), "all": (True, True)}
+
+
+def _size(n) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if abs(n) < 1024:
+            return f"{n:.1f} {unit}" if unit != "B" else f"{n} B"
+        n /= 1024
+    return f"{n:.1f} GiB"
+
+
+class StageProfiler:
+    """
+    cProfile and tracemalloc capture for StageTimer stages, written to
+    `out_dir` (cleared first):
+
+    - `NN_<stage>.prof`: cProfile dump per stage call (pstats, snakeviz).
+    - `allocations.txt`: CPU hot spots and top allocation sites per stage.
+    - `profile.json`: wall/CPU seconds and memory growth/peak per stage.
+
+    Memory is traced only while stages run, starting empty, so a stage's
+    report lists the allocations it made that are still alive at its end.
+    Tracing is process-wide: stages running concurrently (e.g. speculative
+    refinement) see each other's allocations. It also makes allocation-heavy
+    stages much slower (importing LangChain in agent_init takes ~15x longer),
+    so wall times of a memory-profiled run are not representative. A stage
+    nested in another stage of the same thread is covered by the outer one.
+    """
+
+    def __init__(self, out_dir, top=15, cpu=True, memory=False):
+        self.out_dir = out_dir
+        self.top = top
+        self.cpu = cpu
+        self.memory = memory
+        self.records = []
+        self.count = 0
+        # Stages currently being traced (tracemalloc runs while > 0)
+        self.active = 0
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        shutil.rmtree(out_dir, ignore_errors=True)
+        os.makedirs(out_dir, exist_ok=True)
+        if memory and tracemalloc.is_tracing():
+            logger.warning(
+                "⚠️ [Profile] tracemalloc is already in use; skipping memory capture"
+            )
+            self.memory = False
+
+    def _start_tracing(self):
+        with self.lock:
+            if self.active == 0:
+                tracemalloc.start()
+            else:
+                tracemalloc.reset_peak()
+            self.active += 1
+            return tracemalloc.get_traced_memory()[0]
+
+    def _stop_tracing(self):
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        with self.lock:
+            self.active -= 1
+            if self.active == 0:
+                tracemalloc.stop()
+        return snapshot, current, peak
+
+    @contextmanager
+    def capture(self, name):
+        if getattr(self.local, "active", False):
+            yield
+            return
+        self.local.active = True
+        with self.lock:
+            self.count += 1
+            index = self.count
+
+        profile = None
+        if self.cpu:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError as e:
+                # Another profiler is active (e.g. under python -m cProfile)
+                logger.warning(f"⚠️ [Profile] No CPU profile for {name}: {e}")
+                profile = None
+        if self.memory:
+            start_memory = self._start_tracing()
+        wall_started = time.perf_counter()
+        cpu_started = time.thread_time()
+        try:
+            yield
+        finally:
+            cpu_seconds = time.thread_time() - cpu_started
+            seconds = time.perf_counter() - wall_started
+            if profile is not None:
+                profile.disable()
+            record = {
+                "index": index,
+                "stage": name,
+                "thread": threading.current_thread().name,
+                "seconds": round(seconds, 4),
+                "cpu_seconds": round(cpu_seconds, 4),
+            }
+            # Before dumping the profile, which allocates
+            if self.memory:
+                snapshot, current, peak = self._stop_tracing()
+                record["memory_growth_bytes"] = current - start_memory
+                record["memory_peak_bytes"] = peak - start_memory
+                stats = [
+                    stat
+                    for stat in snapshot.statistics("lineno")
+                    if stat.traceback[0].filename != tracemalloc.__file__
+                ]
+                record["allocations"] = [
+                    {
+                        "site": str(stat.traceback),
+                        "size": stat.size,
+                        "count": stat.count,
+                    }
+                    for stat in stats[: self.top]
+                ]
+            if profile is not None:
+                slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", name)
+                path = os.path.join(self.out_dir, f"{index:02d}_{slug}.prof")
+                profile.dump_stats(path)
+                record["profile"] = os.path.basename(path)
+            with self.lock:
+                self.records.append(record)
+            self.local.active = False
+
+    def _hot_spots(self, record):
+        stream = io.StringIO()
+        stats = pstats.Stats(
+            os.path.join(self.out_dir, record["profile"]), stream=stream
+        )
+        stats.sort_stats("cumulative").print_stats(self.top)
+        # Drop pstats' header lines, keep the table
+        text = stream.getvalue()
+        start = text.find("   ncalls")
+        return text[start:].rstrip() if start >= 0 else text.strip()
+
+    def finish(self):
+        """Write the reports; returns the per-stage records."""
+        records = sorted(self.records, key=lambda r: r["index"])
+        lines = []
+        for r in records:
+            header = (
+                f"== {r['index']:02d} {r['stage']} [{r['thread']}]: "
+                f"{r['seconds']:.3f}s wall, {r['cpu_seconds']:.3f}s CPU"
+            )
+            if "memory_growth_bytes" in r:
+                header += (
+                    f", memory {_size(r['memory_growth_bytes'])} retained "
+                    f"(peak {_size(r['memory_peak_bytes'])})"
+                )
+            lines.extend([header, ""])
+            if r.get("profile"):
+                lines.extend(["CPU (cumulative):", self._hot_spots(r), ""])
+            if r.get("allocations"):
+                lines.append("Top allocations (still alive at stage end):")
+                for a in r["allocations"]:
+                    lines.append(
+                        f"  {_size(a['size']):>11} {a['count']:>8} blocks  {a['site']}"
+                    )
+                lines.append("")
+        atomic_write(os.path.join(self.out_dir, "allocations.txt"), "\n".join(lines))
+        atomic_write(
+            os.path.join(self.out_dir, "profile.json"),
+            json.dumps({"stages": records}, indent=2),
+        )
+        return records
+
+
+def print_profile(records):
+    print(f"{'stage':<24} {'wall s':>8} {'cpu s':>8} {'retained':>11} {'peak':>11}")
+    for r in records:
+        growth = _size(r["memory_growth_bytes"]) if "memory_growth_bytes" in r else "-"
+        peak = _size(r["memory_peak_bytes"]) if "memory_peak_bytes" in r else "-"
+        print(
+            f"{r['stage']:<24} {r['seconds']:>8.3f} {r['cpu_seconds']:>8.3f} "
+            f"{growth:>11} {peak:>11}"
+        )
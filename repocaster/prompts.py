@@ -1,3 +1,9 @@
+# Legend for the compact SCRIPT/TOOL/STEP blocks (see encoding.py) that the
+# prompts below embed instead of indented JSON.
+SCHEMA_LEGEND = """FORMAT: SCRIPT/TOOL/STEP blocks start with a header line; a line starting with `:` is the description.
+Arguments are one per line as `--name type[!] [=default] description`, where `!` means required and
+types are s=string, i=integer, n=number, b=boolean, l=list."""
+
 WORKFLOW_ANALYST_PROMPT = """
 You are a Senior DevOps Engineer analyzing a scientific code repository (like RFDiffusion or ProteinMPNN).
 
@@ -9,7 +15,7 @@ You MUST identify these helper scripts and include them in the workflow.
 
 Ignore training workflows (backpropagation, loss calculation, etc).
 
-AST DETECTED SCRIPTS:
+AST DETECTED SCRIPTS (path and argument count):
 {ast_summary}
 
 USAGE EXAMPLES (Shell/Python):
@@ -43,23 +49,28 @@ Format:
 ]
 """
 
-SCHEMA_REFINER_PROMPT = """
+SCHEMA_REFINER_PROMPT = (
+    """
 You are an API Architect. Define the MCP Tools based on the code analysis.
 
+"""
+    + SCHEMA_LEGEND
+    + """
+
 AST DETAILS (Ground Truth for Arguments):
-{ast_json}
+{scripts_table}
 
 WORKFLOW INSIGHTS (Context for descriptions):
-{workflows_json}
+{workflows_table}
 
 **CRITICAL INSTRUCTIONS FOR ARGUMENTS**:
 1. **FOCUS ON RELEVANCE**: Do NOT include all arguments if the script has many (e.g. > 15). Focus only on arguments that appear in `WORKFLOW INSIGHTS` or are clearly critical for inference.
 2. **MANDATORY**:
-   - ALL arguments marked `required: True` in AST.
+   - ALL arguments marked required (`!`) in AST.
    - Key input/output paths (files, directories).
    - Core model parameters mentioned in workflows.
 3. **FILTER NOISE**: Exclude debug flags, obscure hyperparameters, or training-only args unless they are commonly used.
-4. **DEFAULTS**: Respect `required: False` from AST.
+4. **DEFAULTS**: Arguments without `!` in AST are optional; keep their defaults.
 
 Return JSON list:
 [
@@ -74,10 +85,16 @@ Return JSON list:
     }}
 ]
 """
+)
 
-TOOL_CRITIC_PROMPT = """
+TOOL_CRITIC_PROMPT = (
+    """
 You are a QA Lead for a scientific software wrapper.
 
+"""
+    + SCHEMA_LEGEND
+    + """
+
 Current Tool Definitions:
 {tool_definitions}
 
@@ -109,19 +126,25 @@ Return JSON:
     "missing_paths": ["path/to/missing_script.py"]
 }}
 """
+)
 
-TOOL_REVISER_PROMPT = """
+TOOL_REVISER_PROMPT = (
+    """
 Generate or Revise MCP Tool definitions for the following scripts:
-{scripts_json}
+{scripts_table}
+
+"""
+    + SCHEMA_LEGEND
+    + """
 
 **CONTEXT**:
 - You are defining tools for an MCP server.
 - **ONE SCRIPT = ONE TOOL**. Do not create multiple tools for the same script.
 
 **INSTRUCTIONS**:
-1. **Analyze AST**: Look at the `args` list in the provided JSON.
+1. **Analyze AST**: Look at the argument lines of each SCRIPT block.
 2. **Select Arguments (Be Comprehensive yet Clean)**:
-   - **MANDATORY**: Include ALL arguments marked `required: True`.
+   - **MANDATORY**: Include ALL arguments marked required (`!`).
    - **CRITICAL**: Include ALL arguments related to INPUTS (files, directories) and OUTPUTS.
    - **IMPORTANT**: Include common configuration flags (e.g., flags for model behavior, sampling options, seeds).
    - **OMIT**: Only omit obvious debug flags or training-specific params.
@@ -142,56 +165,138 @@ Format:
     }}
 ]
 """
+)
+
+
+# Follow-up sent (with str.format, not as a template) when a JSON reply
+# can't be repaired locally.
+CORRECTION_PROMPT = """
+Your previous reply could not be used:
+{errors}
+
+Reply again with ONLY the corrected JSON, no prose and no markdown fences, in this shape:
+{shape}
+"""
 
 
-DOC_WRITER_PROMPT = """
-Write a concise and practical User Guide (Markdown) for this MCP Server.
+DOC_INTRO_PROMPT = """
+Write the INTRODUCTION section of a User Guide (Markdown) for this MCP Server.
 
 Repository Name: {repo_name}
 
-Available Tools:
-{tools_json}
+Available Tools (names and purposes):
+{tools_summary}
 
-Defined Workflows:
-{workflows_json}
+Defined Workflows (in execution order):
+{workflows_summary}
 
 Your tasks:
-
-1. **Introduction**
-   - Briefly state what this MCP server does.
-   - Summarize the core capabilities in 3-5 bullet points.
-
-2. **Tool Reference**
-   - For each tool, list:
-     - Purpose (1-2 sentences)
-     - Input schema (cleaned + minimal)
-     - Output schema (cleaned + minimal)
-   - Do NOT add commentary or explanation beyond what is necessary.
-
-3. **Workflow Examples**
-   - Provide 2-3 practical workflows showing how to chain the tools.
-   - Each workflow should include:
-     - What problem it solves
-     - Step-by-step tool invocation sequence
-     - Required inputs for each step
-   - Keep steps short and actionable.
+- Briefly state what this MCP server does.
+- Summarize the core capabilities in 3-5 bullet points.
+- Show the end-to-end order in which the tools are usually chained (one short numbered list).
 
 Guidelines:
-- The final output MUST be concise, complete, and free of unnecessary explanations.
+- Do NOT write a top-level title or a table of contents; they are added separately.
+- Do NOT describe individual tool parameters; each tool has its own section.
+- Use `###` or deeper for any sub-headings.
 - No filler content, no motivational text, no assumptions.
-- Only include information that is directly useful for an end-user trying to operate the MCP server.
-- Format cleanly using Markdown.
 """
 
+DOC_TOOL_SECTION_PROMPT = (
+    """
+Write the reference section of a User Guide (Markdown) for ONE tool of the "{repo_name}" MCP Server.
+
+Tool Definition:
+{tool_table}
+
+"""
+    + SCHEMA_LEGEND
+    + """
+
+Your tasks:
+- Purpose (1-2 sentences)
+- Input schema (cleaned + minimal)
+- Output schema (cleaned + minimal)
+
+Guidelines:
+- Do NOT repeat the tool name as a heading; the heading is added separately.
+- Use `###` or deeper for any sub-headings.
+- Do NOT add commentary or explanation beyond what is necessary.
+"""
+)
+
+DOC_WORKFLOW_SECTION_PROMPT = """
+Write ONE workflow example section of a User Guide (Markdown) for the "{repo_name}" MCP Server.
+
+Workflow Step:
+{workflow_table}
 
-CODE_GENERATOR_PROMPT = """
+Available Tools (names and purposes):
+{tools_summary}
+
+Your tasks:
+- What problem this step solves
+- Step-by-step tool invocation sequence (including any prerequisite steps)
+- Required inputs for each step
+
+Guidelines:
+- Do NOT repeat the workflow name as a heading; the heading is added separately.
+- Use `###` or deeper for any sub-headings.
+- Keep steps short and actionable. No filler content, no assumptions.
+"""
+
+
+# Tools must not block the FastMCP event loop: scripts run as asyncio
+# subprocesses through one shared helper
+ASYNC_EXECUTION = """
+ASYNC EXECUTION (REQUIRED):
+- Import `asyncio`, `collections`, `os` and `subprocess`.
+- Define this helper ONCE at module level, after `mcp = FastMCP(...)`, exactly as written:
+```python
+TOOL_CONCURRENCY = int(os.environ.get("REPOCASTER_TOOL_CONCURRENCY", "2"))
+_limits = collections.defaultdict(lambda: asyncio.Semaphore(TOOL_CONCURRENCY))
+
+
+async def run_script(tool_name, cmd, check=False):
+    \"\"\"Run `cmd` without blocking the event loop; at most TOOL_CONCURRENCY runs per tool.\"\"\"
+    async with _limits[tool_name]:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=os.getcwd(),
+        )
+        try:
+            # Drains stdout and stderr concurrently, so neither pipe can fill up and stall
+            stdout, stderr = await proc.communicate()
+        except asyncio.CancelledError:
+            proc.kill()
+            await proc.wait()
+            raise
+    result = subprocess.CompletedProcess(
+        cmd, proc.returncode, stdout.decode(errors="replace"), stderr.decode(errors="replace")
+    )
+    if check:
+        result.check_returncode()
+    return result
+```
+- Every tool is an `async def` and runs its command with `await run_script("<tool_name>", cmd)`. NEVER call `subprocess.run` or any other blocking call in a tool.
+"""
+
+
+CODE_GENERATOR_PROMPT = (
+    """
 You are a Python Expert. Write a COMPLETE, RUNNABLE `server.py` for an MCP Server.
 
 Library: `mcp` (specifically `from mcp.server.fastmcp import FastMCP`)
 Server Name: "{repo_name}"
 
 TOOLS TO IMPLEMENT:
-{tools_json}
+{tools_table}
+
+"""
+    + SCHEMA_LEGEND
+    + """
 
 REQUIREMENTS:
 1. Initialize `mcp = FastMCP("{repo_name}")`.
@@ -199,13 +304,13 @@ REQUIREMENTS:
    - Logic: Read content of "USAGE.md" in `os.path.dirname(__file__)`.
    - **CRITICAL DOCSTRING**: The docstring MUST say: "READ THIS FIRST: Contains the comprehensive user manual, workflows, and parameter explanations. Essential for understanding how to use the other tools."
    - This ensures the agent (Claude, etc.) sees it immediately when listing tools.
-3. For each tool in TOOLS TO IMPLEMENT, create an `@mcp.tool()` decorated function.
+3. For each tool in TOOLS TO IMPLEMENT, create an `@mcp.tool()` decorated `async def` function.
    - **Function Signature**: Must reflect ALL args in the tool definition. 
    - Use Python type hints (`str`, `int`, `bool`).
-   - **Defaults**: If an arg is `required: false`, give it a default value of `None` (or a sensible default if evident).
+   - **Defaults**: If an arg is not marked `!`, give it its `=default` value, or `None` if it has none.
    - **Docstring**: You MUST include a docstring for the function.
-     - The docstring should describe the tool's purpose (from `description`).
-     - It MUST list and explain each argument (from `args`).
+     - The docstring should describe the tool's purpose (from the `:` description line).
+     - It MUST list and explain each argument (from the argument lines).
 4. **Implementation Logic**:
    - Construct command: `cmd = ["python", "{script_path}"]`
    - Iterate through args. 
@@ -213,20 +318,28 @@ REQUIREMENTS:
      - If bool is True, append `--flag`.
      - If list, append `--arg` multiple times or space-separated (default to multiple flags).
      - Else, append `--arg` and `str(value)`.
-   - `subprocess.run(cmd, capture_output=True, text=True, cwd=os.getcwd())`
+   - `result = await run_script("<tool_name>", cmd)` (see ASYNC EXECUTION)
 5. CRITICAL: Script paths are relative to repo root.
-
+"""
+    + ASYNC_EXECUTION
+    + """
 Output ONLY Python code. No markdown blocks.
 """
+)
 
-CODE_GENERATOR_PROMPT_LANGGRAPH = """
+CODE_GENERATOR_PROMPT_LANGGRAPH = (
+    """
 You are a Python Expert. Write a COMPLETE, RUNNABLE `server.py` for an MCP Server.
 
 Library: `mcp` (specifically `from mcp.server.fastmcp import FastMCP`)
 Server Name: "{repo_name}"
 
 TOOLS TO IMPLEMENT:
-{tools_json}
+{tools_table}
+
+"""
+    + SCHEMA_LEGEND
+    + """
 
 REQUIREMENTS:
 1. Initialize `mcp = FastMCP("{repo_name}")`.
@@ -234,13 +347,13 @@ REQUIREMENTS:
    - Logic: Read content of "USAGE.md" in `os.path.dirname(__file__)`.
    - **CRITICAL DOCSTRING**: The docstring MUST say: "READ THIS FIRST: Contains the comprehensive user manual, workflows, and parameter explanations. Essential for understanding how to use the other tools."
    - This ensures the agent (Claude, etc.) sees it immediately when listing tools.
-3. For each tool in TOOLS TO IMPLEMENT, create an `@mcp.tool()` decorated function.
+3. For each tool in TOOLS TO IMPLEMENT, create an `@mcp.tool()` decorated `async def` function.
    - **Function Signature**: Must reflect ALL args in the tool definition. 
    - Use Python type hints (`str`, `int`, `bool`).
-   - **Defaults**: If an arg is `required: false`, give it a default value of `None` (or a sensible default if evident).
+   - **Defaults**: If an arg is not marked `!`, give it its `=default` value, or `None` if it has none.
    - **Docstring**: You MUST include a docstring for the function.
-     - The docstring should describe the tool's purpose (from `description`).
-     - It MUST list and explain each argument (from `args`).
+     - The docstring should describe the tool's purpose (from the `:` description line).
+     - It MUST list and explain each argument (from the argument lines).
 4. **Implementation Logic**:
    - Construct command: `cmd = ["python", "{script_path}"]`
    - Iterate through args. 
@@ -248,9 +361,11 @@ REQUIREMENTS:
      - If bool is True, append `--flag`.
      - If list, append `--arg` multiple times or space-separated (default to multiple flags).
      - Else, append `--arg` and `str(value)`.
-   - `subprocess.run(cmd, capture_output=True, text=True, cwd=os.getcwd())`
+   - `result = await run_script("<tool_name>", cmd)` (see ASYNC EXECUTION)
 5. CRITICAL: Script paths are relative to repo root.
-
+"""
+    + ASYNC_EXECUTION
+    + """
 **RETURN FORMAT (LANGGRAPH COMPATIBLE):**
 - The tool MUST return a dictionary containing execution status and relevant outputs.
 - **Status Key**: Include a `"status"` key.
@@ -264,7 +379,7 @@ REQUIREMENTS:
 Example:
 ```python
     try:
-        subprocess.run(cmd, check=True, capture_output=True, text=True)
+        await run_script("prepare_inputs", cmd, check=True)
         # Example 1: Intermediate step
         return {{"jsonl_path": output_jsonl, "status": "inputs_prepared"}}
         
@@ -276,3 +391,16 @@ Example:
 
 Output ONLY Python code. No markdown blocks.
 """
+)
+
+# Appended to the code generator prompt when casting with --worker_pool
+WORKER_POOL_PROMPT = """
+WORKER POOL (REQUIRED):
+- Tools run their scripts in a pool of warm worker processes from `worker_pool.py`, which sits next to `server.py`.
+- Add `from worker_pool import WorkerPool` to the imports.
+- Right after `mcp = FastMCP(...)`, create ONE module-level pool listing every distinct script path from TOOLS TO IMPLEMENT:
+  `pool = WorkerPool(scripts=["path/to/a.py", "path/to/b.py"])`
+- In `run_script`, keep `async with _limits[tool_name]:` but replace the process creation and `communicate()` with `result = await pool.run_async(cmd, cwd=os.getcwd())`. It returns the same `CompletedProcess` (`returncode`, `stdout`, `stderr` as text) and runs in a thread, so the event loop stays free.
+- Keep `cmd = ["python", "<script path>", ...]` exactly as specified; the pool runs such commands in-process.
+- Call `pool.start()` inside `if __name__ == "__main__":`, before `mcp.run()`, and never at import time.
+"""
@@ -0,0 +1,260 @@
+import time
+import random
+import logging
+import threading
+import contextvars
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from urllib.parse import urlparse
+
+logger = logging.getLogger("RepoCaster.Scheduler")
+
+RETRYABLE_STATUS = {408, 409, 429}
+RETRYABLE_ERRORS = {
+    "APITimeoutError",
+    "APIConnectionError",
+    "RateLimitError",
+    "InternalServerError",
+}
+
+
+# threading.Event set once the current fanned-out call's result is no
+# longer needed (see RequestScheduler.submit)
+_cancel_event = contextvars.ContextVar("repocaster_cancel_event", default=None)
+
+
+class CallCancelled(Exception):
+    """A fanned-out model call was dropped before it started."""
+
+
+def _check_cancelled():
+    event = _cancel_event.get()
+    if event is not None and event.is_set():
+        raise CallCancelled("result no longer needed")
+
+
+def provider_key(model_url=None) -> str:
+    """Rate limits are shared per API host (api.openai.com when no URL is given)."""
+    if not model_url:
+        return "api.openai.com"
+    return urlparse(model_url).netloc or model_url
+
+
+def _status_code(exc):
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status
+
+
+def is_retryable(exc) -> bool:
+    if isinstance(exc, (TimeoutError, FutureTimeout, ConnectionError)):
+        return True
+    status = _status_code(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUS or status >= 500
+    return type(exc).__name__ in RETRYABLE_ERRORS
+
+
+def _retry_after(exc):
+    """Seconds requested by a Retry-After header, if the provider sent one."""
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled at `rate_per_minute`."""
+
+    def __init__(self, rate_per_minute, burst=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(burst or max(1, int(rate_per_minute // 6)))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class _ProviderLimits:
+    def __init__(self, provider, requests_per_minute, max_concurrency):
+        self.bucket = TokenBucket(requests_per_minute)
+        self.semaphore = threading.BoundedSemaphore(max_concurrency)
+        # One thread per slot: an admitted call starts at once, so its
+        # timeout never runs down in a queue
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix=f"repocaster-llm-{provider}"
+        )
+
+    def run(self, fn):
+        """fn() on a provider thread; the slot (already acquired) is freed when fn returns."""
+        try:
+            return fn()
+        finally:
+            self.semaphore.release()
+
+
+class RequestScheduler:
+    """
+    Central gate for every model call: a token bucket and a concurrency cap per
+    provider, jittered exponential backoff on transient errors (429, 5xx,
+    timeouts, dropped connections) and a per-call timeout.
+
+    One scheduler is shared by all nodes of all casts running in this process
+    (see `get_scheduler`), so concurrent casts never add up past a provider's
+    limits.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute=60,
+        max_concurrency=8,
+        max_retries=5,
+        base_delay=1.0,
+        max_delay=60.0,
+        timeout=600.0,
+        provider_limits=None,
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+        # {"api.deepseek.com": {"requests_per_minute": 30, "max_concurrency": 4}}
+        self.provider_limits = provider_limits or {}
+        self._providers = {}
+        self._lock = threading.Lock()
+
+    def _limits(self, provider) -> _ProviderLimits:
+        with self._lock:
+            if provider not in self._providers:
+                conf = self.provider_limits.get(provider, {})
+                self._providers[provider] = _ProviderLimits(
+                    provider,
+                    conf.get("requests_per_minute", self.requests_per_minute),
+                    conf.get("max_concurrency", self.max_concurrency),
+                )
+            return self._providers[provider]
+
+    def _backoff(self, provider, attempt, exc):
+        delay = _retry_after(exc)
+        if delay is None:
+            # Full jitter: uniform over [0, base * 2^attempt], capped
+            delay = random.uniform(
+                0, min(self.max_delay, self.base_delay * (2**attempt))
+            )
+        logger.warning(
+            f"⏳ [Scheduler] {provider} call failed ({type(exc).__name__}: {exc}); "
+            f"retry {attempt + 1}/{self.max_retries} in {delay:.1f}s"
+        )
+        time.sleep(delay)
+
+    def call(self, provider, fn, timeout=None):
+        """Run `fn()` under the provider's limits, retrying transient failures."""
+        limits = self._limits(provider)
+        timeout = timeout or self.timeout
+        for attempt in range(self.max_retries + 1):
+            _check_cancelled()
+            limits.bucket.acquire()
+            limits.semaphore.acquire()
+            try:
+                # Don't spend a slot on a call nobody waits for anymore
+                _check_cancelled()
+                future = limits.executor.submit(limits.run, fn)
+            except BaseException:
+                limits.semaphore.release()
+                raise
+            try:
+                return future.result(timeout=timeout)
+            except Exception as e:
+                if isinstance(e, FutureTimeout):
+                    # A running call can't be interrupted; it keeps its slot
+                    # until it returns, so abandoned calls still count.
+                    e = TimeoutError(f"model call exceeded {timeout}s")
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise e
+                error = e
+            self._backoff(provider, attempt, error)
+
+    @staticmethod
+    def submit(fn, cancel=None) -> Future:
+        """
+        Run `fn()` on a thread of its own and return its Future. For callers
+        that fan model calls out (hedging): the calls wait for their limits
+        inside call(), never in a bounded pool's queue. Once the optional
+        `cancel` event is set, the scheduled calls made by `fn` give up
+        (CallCancelled) instead of taking a slot or retrying; a call already
+        running holds its slot until it returns.
+        """
+        future = Future()
+        context = contextvars.copy_context()
+        context.run(_cancel_event.set, cancel)
+
+        def target():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(context.run(fn))
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=target, name="repocaster-fanout", daemon=True).start()
+        return future
+
+    def stream(self, provider, make_iter):
+        """
+        Iterate `make_iter()` under the provider's limits. Failures before the
+        first chunk are retried; once output has been yielded they propagate.
+        """
+        limits = self._limits(provider)
+        for attempt in range(self.max_retries + 1):
+            _check_cancelled()
+            limits.bucket.acquire()
+            started = False
+            with limits.semaphore:
+                try:
+                    # A hedged stream that already lost gives up here
+                    _check_cancelled()
+                    for chunk in make_iter():
+                        started = True
+                        yield chunk
+                    return
+                except Exception as e:
+                    if started or attempt >= self.max_retries or not is_retryable(e):
+                        raise
+                    error = e
+            self._backoff(provider, attempt, error)
+
+
+_default_scheduler = None
+_default_lock = threading.Lock()
+
+
+def configure_scheduler(**kwargs) -> RequestScheduler:
+    """Replace the process-wide scheduler (call before any cast starts)."""
+    global _default_scheduler
+    with _default_lock:
+        _default_scheduler = RequestScheduler(**kwargs)
+        return _default_scheduler
+
+
+def get_scheduler() -> RequestScheduler:
+    global _default_scheduler
+    with _default_lock:
+        if _default_scheduler is None:
+            _default_scheduler = RequestScheduler()
+        return _default_scheduler
@@ -0,0 +1,112 @@
+import os
+import sys
+import time
+import hashlib
+import threading
+import logging
+
+logger = logging.getLogger("RepoCaster.Streaming")
+
+PARTIAL_SUFFIX = ".partial"
+
+
+def atomic_write(path, text):
+    """Write text to a sibling temp file, fsync it and rename it over `path`."""
+    tmp_path = f"{path}.tmp.{os.getpid()}.{threading.get_ident()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def content_key(*parts) -> str:
+    """Short, stable key for the inputs of a generation (used for resume)."""
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(str(part).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()[:16]
+
+
+class StreamProgress:
+    """
+    Single live progress line for all generations streaming in this process.
+    Falls back to one log line per finished artifact when stderr is not a TTY.
+    """
+
+    def __init__(self, stream=None, interval=0.1):
+        self.stream = stream or sys.stderr
+        self.interval = interval
+        self.counts = {}
+        self.lock = threading.Lock()
+        self.last_render = 0.0
+        self.live = hasattr(self.stream, "isatty") and self.stream.isatty()
+
+    def update(self, label, n_chars):
+        with self.lock:
+            self.counts[label] = self.counts.get(label, 0) + n_chars
+            now = time.monotonic()
+            if self.live and now - self.last_render >= self.interval:
+                self.last_render = now
+                self._render()
+
+    def finish(self, label):
+        with self.lock:
+            n_chars = self.counts.pop(label, 0)
+            if self.live:
+                self.stream.write("\r\033[K")
+                self._render()
+        logger.info(f"📝 [Stream] {label} complete ({n_chars} chars)")
+
+    def _render(self):
+        line = " | ".join(f"{k}: {v:,} chars" for k, v in self.counts.items())
+        self.stream.write(f"\r\033[K⏳ {line}" if line else "")
+        self.stream.flush()
+
+
+progress = StreamProgress()
+
+
+class StreamingArtifact:
+    """
+    A generated text streamed to `<work_dir>/<name>.<key>.partial` as tokens
+    arrive and renamed to `<work_dir>/<name>.<key>` once the stream completes.
+
+    `key` identifies the generation inputs, so a completed artifact left over
+    from an interrupted cast is reused instead of regenerated. The `.partial`
+    file of a stream that dies midway is left in place for inspection.
+    """
+
+    def __init__(self, work_dir, name, key):
+        self.work_dir = work_dir
+        self.name = name
+        self.final_path = os.path.join(work_dir, f"{name}.{key}")
+        self.partial_path = self.final_path + PARTIAL_SUFFIX
+
+    def cached(self):
+        if os.path.exists(self.final_path):
+            with open(self.final_path, "r", encoding="utf-8") as f:
+                return f.read()
+        return None
+
+    def stream(self, chain, inputs, config=None) -> str:
+        cached = self.cached()
+        if cached is not None:
+            logger.info(
+                f"♻️ [Stream] Reusing completed {self.name} from a previous run"
+            )
+            return cached
+
+        os.makedirs(self.work_dir, exist_ok=True)
+        chunks = []
+        with open(self.partial_path, "w", encoding="utf-8") as f:
+            for chunk in chain.stream(inputs, config=config):
+                f.write(chunk)
+                f.flush()
+                chunks.append(chunk)
+                progress.update(self.name, len(chunk))
+        progress.finish(self.name)
+
+        os.replace(self.partial_path, self.final_path)
+        return "".join(chunks)
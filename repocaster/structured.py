@@ -0,0 +1,199 @@
+import re
+import json
+import logging
+
+from .prompts import CORRECTION_PROMPT
+from .encoding import decode_tools, decode_workflows
+
+logger = logging.getLogger("RepoCaster.Structured")
+
+
+class StructuredOutputError(ValueError):
+    """A node's reply could not be repaired into its declared schema."""
+
+
+class OutputSchema:
+    """
+    Declared shape of a node's JSON reply: either a list of objects
+    (`kind="list"`) or a single object (`kind="object"`), with required keys
+    and their Python types. `aliases` renames keys models commonly use
+    instead (e.g. "path" for "script_path"); `defaults` fills optional keys.
+    `decoder` parses replies that echo the compact prompt encoding instead
+    of JSON (see encoding.py).
+    """
+
+    def __init__(self, name, kind, keys, aliases=None, defaults=None, decoder=None):
+        self.name = name
+        self.kind = kind
+        self.keys = keys
+        self.aliases = aliases or {}
+        self.defaults = defaults or {}
+        self.decoder = decoder
+
+    def describe(self) -> str:
+        fields = ", ".join(f'"{k}": <{t.__name__}>' for k, t in self.keys.items())
+        if self.kind == "list":
+            return f'{{"{self.name}": [{{{fields}, ...}}, ...]}}'
+        return f"{{{fields}}}"
+
+    def _fix_object(self, obj, where, errors):
+        if not isinstance(obj, dict):
+            errors.append(f"{where} is a {type(obj).__name__}, expected an object")
+            return None
+        obj = dict(obj)
+        for alias, key in self.aliases.items():
+            if key not in obj and alias in obj:
+                obj[key] = obj.pop(alias)
+        for key, value in self.defaults.items():
+            obj.setdefault(key, value)
+        for key, expected in self.keys.items():
+            if key not in obj:
+                errors.append(f'{where} is missing "{key}"')
+                return None
+            if not isinstance(obj[key], expected):
+                errors.append(
+                    f'{where}."{key}" is a {type(obj[key]).__name__}, '
+                    f"expected {expected.__name__}"
+                )
+                return None
+        return obj
+
+    def coerce(self, data):
+        """Return (value, errors); for lists, value keeps only valid items."""
+        errors = []
+        if self.kind == "object":
+            return self._fix_object(data, "reply", errors), errors
+
+        # Models in json_object mode wrap lists: {"tools": [...]}
+        if isinstance(data, dict):
+            lists = [v for v in data.values() if isinstance(v, list)]
+            if lists:
+                data = lists[0]
+            elif all(k in data for k in self.keys):
+                data = [data]  # a single bare item
+        if not isinstance(data, list):
+            return [], [f"reply is a {type(data).__name__}, expected a list"]
+        items = []
+        for i, item in enumerate(data):
+            fixed = self._fix_object(item, f"item {i}", errors)
+            if fixed is not None:
+                items.append(fixed)
+        return items, errors
+
+
+WORKFLOWS_SCHEMA = OutputSchema(
+    "workflows",
+    "list",
+    {"task_name": str, "target_script_path": str},
+    decoder=decode_workflows,
+)
+TOOLS_SCHEMA = OutputSchema(
+    "tools",
+    "list",
+    {"tool_name": str, "script_path": str, "args": list},
+    aliases={"path": "script_path", "name": "tool_name", "arguments": "args"},
+    defaults={"args": []},
+    decoder=decode_tools,
+)
+CRITIQUE_SCHEMA = OutputSchema(
+    "critique",
+    "object",
+    {"approved": bool, "missing_paths": list},
+    defaults={"missing_paths": []},
+)
+
+
+_FENCE = re.compile(r"^```[a-zA-Z]*\s*|\s*```$")
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+_LINE_COMMENT = re.compile(r'\s//[^"\n]*$', re.MULTILINE)
+_PY_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+
+def _candidates(text):
+    """Plausible JSON payloads inside a reply, most likely first."""
+    text = _FENCE.sub("", text.strip())
+    yield text
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if starts:
+        start = min(starts)
+        closer = "}" if text[start] == "{" else "]"
+        end = text.rfind(closer)
+        if end > start:
+            yield text[start : end + 1]
+
+
+def _repairs(candidate):
+    yield candidate
+    fixed = _TRAILING_COMMA.sub(r"\1", _LINE_COMMENT.sub("", candidate))
+    yield fixed
+    yield re.sub(r"\b(True|False|None)\b", lambda m: _PY_LITERALS[m.group(1)], fixed)
+
+
+def repair_json(text):
+    """
+    Parse a model reply as JSON, locally repairing the usual damage: code
+    fences, prose around the payload, trailing commas, `//` comments and
+    Python literals. Raises ValueError if nothing parses.
+    """
+    for candidate in _candidates(text):
+        for attempt in _repairs(candidate):
+            try:
+                return json.loads(attempt)
+            except ValueError:
+                pass
+    raise ValueError("no JSON payload found in reply")
+
+
+def parse_reply(text, schema):
+    try:
+        data = repair_json(text)
+    except ValueError as e:
+        decoded = schema.decoder(text) if schema.decoder else None
+        if not decoded:
+            return None, [str(e)]
+        data = decoded
+    return schema.coerce(data)
+
+
+def invoke_structured(template, llm, inputs, schema, max_corrections=1):
+    """
+    Render `template`, call `llm` and return the reply coerced to `schema`.
+    If the reply can't be repaired locally, only this call is re-asked with a
+    focused correction message. After `max_corrections` the valid part of a
+    list reply is kept; with nothing usable StructuredOutputError is raised.
+    """
+    from langchain_core.messages import AIMessage, HumanMessage
+    from langchain_core.prompts import ChatPromptTemplate
+
+    messages = ChatPromptTemplate.from_template(template).format_messages(**inputs)
+    reply = llm.invoke(messages).content
+    value, errors = parse_reply(reply, schema)
+
+    for attempt in range(max_corrections):
+        if not errors:
+            return value
+        logger.warning(
+            f"🩹 [Structured] {schema.name} reply invalid ({'; '.join(errors[:3])}); "
+            f"asking for a correction ({attempt + 1}/{max_corrections})"
+        )
+        messages = messages + [
+            AIMessage(reply),
+            HumanMessage(
+                CORRECTION_PROMPT.format(
+                    errors="\n".join(f"- {e}" for e in errors[:10]),
+                    shape=schema.describe(),
+                )
+            ),
+        ]
+        reply = llm.invoke(messages).content
+        value, errors = parse_reply(reply, schema)
+
+    if not errors:
+        return value
+    if schema.kind == "list" and value:
+        logger.warning(
+            f"🩹 [Structured] Keeping {len(value)} valid {schema.name} items; "
+            f"dropped invalid ones: {'; '.join(errors[:3])}"
+        )
+        return value
+    raise StructuredOutputError(f"{schema.name}: {'; '.join(errors[:3])}")
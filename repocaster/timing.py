@@ -0,0 +1,49 @@
+import time
+import threading
+from contextlib import contextmanager, nullcontext
+
+
+class StageTimer:
+    """
+    Accumulates wall time per named pipeline stage. Stages that run more than
+    once (e.g. the critique loop) add up; `calls` counts the repetitions.
+    """
+
+    def __init__(self, profiler=None):
+        self.durations = {}
+        self.calls = {}
+        self.lock = threading.Lock()
+        # Optional profiling.StageProfiler that also captures CPU and memory
+        self.profiler = profiler
+
+    @contextmanager
+    def stage(self, name):
+        capture = self.profiler.capture(name) if self.profiler else nullcontext()
+        started = time.perf_counter()
+        try:
+            with capture:
+                yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def add(self, name, seconds):
+        with self.lock:
+            self.durations[name] = self.durations.get(name, 0.0) + seconds
+            self.calls[name] = self.calls.get(name, 0) + 1
+
+    def wrap(self, name, node):
+        """Graph node that times each call of `node` under stage `name`."""
+
+        # Single positional parameter on purpose: LangGraph inspects node
+        # signatures and would inject config/writer into **kwargs.
+        def timed(state):
+            with self.stage(name):
+                return node(state)
+
+        return timed
+
+    def report(self):
+        return {
+            name: {"seconds": round(seconds, 4), "calls": self.calls[name]}
+            for name, seconds in self.durations.items()
+        }
@@ -0,0 +1,225 @@
+import os
+import re
+import json
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from .core import RepoCaster
+from .ingest import open_source
+from .planning import gather_context
+from .fingerprint import cast_fingerprint
+from .incremental import load_tool_state
+from .models import NODE_NAMES, resolve_node_models
+from .streaming import atomic_write
+from .timing import StageTimer
+
+logger = logging.getLogger("RepoCaster.Variants")
+
+VARIANT_KEYS = {"name", "node_models", "langgraph_style"}
+
+
+def variant_name(model_name, langgraph_style=False) -> str:
+    """`qwen3-max` + langgraph -> `qwen3_max_langgraph` (the mcp_servers layout)."""
+    name = re.sub(r"[^a-z0-9]+", "_", model_name.lower()).strip("_")
+    return f"{name}_langgraph" if langgraph_style else name
+
+
+def load_variants(path):
+    """
+    Read model variants from JSON, either a list or {"variants": [...]}:
+
+        [
+            {"model_name": "gpt-4o"},
+            {"model_name": "deepseek-chat", "model_url": "https://api.deepseek.com",
+             "api_key_env": "DEEPSEEK_API_KEY"},
+            {"model_name": "qwen3-max", "model_url": "...", "api_key_env": "QWEN_API_KEY",
+             "langgraph_style": true, "node_models": {"critique": "qwen-turbo"}}
+        ]
+
+    Each entry takes ModelConfig keys plus optional `name`, `node_models` and
+    `langgraph_style`.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("variants", [])
+    return [dict(v) for v in data]
+
+
+def resolve_variants(
+    entries, base_model, model_config=None, node_overrides=None, langgraph_style=False
+):
+    """
+    Turn variant entries into [{"name", "model", "node_models", "langgraph_style"}],
+    layering each entry over `base_model`, `model_config` and `node_overrides`
+    as for a single cast. Names are made unique.
+    """
+    variants = []
+    seen = {}
+    for entry in entries:
+        model_keys = {k: v for k, v in entry.items() if k not in VARIANT_KEYS}
+        model = base_model.merged(model_keys)
+        overrides = {**(node_overrides or {}), **entry.get("node_models", {})}
+        unknown = set(overrides) - set(NODE_NAMES)
+        if unknown:
+            raise ValueError(f"Unknown nodes in variant: {sorted(unknown)}")
+        style = entry.get("langgraph_style", langgraph_style)
+        name = entry.get("name") or variant_name(model.model_name, style)
+        seen[name] = seen.get(name, 0) + 1
+        if seen[name] > 1:
+            name = f"{name}_{seen[name]}"
+        variants.append(
+            {
+                "name": name,
+                "model": model,
+                "node_models": resolve_node_models(model, model_config, overrides),
+                "langgraph_style": style,
+            }
+        )
+    return variants
+
+
+class MultiModelCaster(RepoCaster):
+    """
+    Cast one repository with several model variants. Clone, AST analysis
+    and context gathering run once; the LLM stages of all variants then run
+    concurrently, each writing `<output_dir>/<variant>/server.py` and
+    `USAGE.md`, so a comparison takes as long as the slowest model.
+    Unchanged variants are skipped by fingerprint like a single cast.
+    """
+
+    def __init__(self, repo_url, variants, output_dir="./output_mcp", **options):
+        super().__init__(repo_url, output_dir=output_dir, **options)
+        # Output of resolve_variants()
+        self.variants = variants
+        # Per-variant status, timings and error of the last cast()
+        self.results = {}
+
+    def _gather(self, repo_local_path):
+        readme, examples = gather_context(self.source or open_source(repo_local_path))
+        return {"readme": readme, "examples": examples}
+
+    def _cast_variant(
+        self, variant, repo_local_path, revision, analysis, context, fingerprints
+    ):
+        name = variant["name"]
+        output_dir = os.path.join(self.output_dir, name)
+        work_dir = os.path.join(output_dir, ".partial")
+        os.makedirs(output_dir, exist_ok=True)
+        timer = StageTimer(profiler=self.timer.profiler)
+        record = {"status": "ok", "output_dir": output_dir}
+        started = time.perf_counter()
+
+        fingerprint, components = cast_fingerprint(
+            revision,
+            variant["node_models"],
+            variant["langgraph_style"],
+            self.worker_pool,
+        )
+        if self._is_unchanged(output_dir, fingerprint):
+            print(f"⏭️ [{name}] Unchanged since the last cast; keeping {output_dir}")
+            record["status"] = "unchanged"
+            state = load_tool_state(output_dir, components) or {}
+            # Popped in _cast: repo_source must hold what every variant's tools use
+            record["tools"] = [e["tool"] for e in state.get("tools", [])]
+        else:
+            print(f"🧠 [{name}] Running Deep Repo Agent...")
+            try:
+                with timer.stage("agent_init"):
+                    agent = self._build_agent(
+                        repo_local_path,
+                        analysis,
+                        work_dir,
+                        variant["node_models"],
+                        variant["langgraph_style"],
+                        timer,
+                        context=context,
+                    )
+                result = self._run_agent(
+                    agent, output_dir, components, fingerprints, timer
+                )
+                with timer.stage("write"):
+                    errors = self._write_outputs(
+                        output_dir,
+                        result,
+                        work_dir,
+                        fingerprint,
+                        components,
+                        fingerprints,
+                    )
+                record["tools"] = result.get("tools", [])
+                if errors:
+                    record.update(status="degraded", errors=errors)
+                    print(f"⚠️ [{name}] Degraded output at: {output_dir}/server.py")
+                else:
+                    print(f"✅ [{name}] MCP Server is ready at: {output_dir}/server.py")
+            except Exception as e:
+                logger.error(f"❌ [{name}] Agent failed: {e}")
+                record.update(status="failed", error=str(e))
+        record["seconds"] = round(time.perf_counter() - started, 3)
+        record["stages"] = timer.report()
+        return name, record
+
+    def _cast(self):
+        print(
+            f"🔥 Starting RepoCaster for {self.repo_name} "
+            f"({len(self.variants)} model variants)"
+        )
+        repo_local_path = os.path.join(self.output_dir, "repo_source")
+        self.error = None
+        self.degraded = []
+
+        # Shared pre-LLM stages
+        with self.timer.stage("clone"):
+            self._clone_repo(repo_local_path)
+        with self.timer.stage("fingerprint"):
+            revision = self._revision(repo_local_path)
+        print("🔍 Analyzing repository structure (AST)...")
+        with self.timer.stage("ast"):
+            analysis = self._analyze(repo_local_path, revision)
+        print(f"   -> Found {len(analysis['scripts'])} CLI scripts")
+        with self.timer.stage("gather"):
+            context = self._gather(repo_local_path)
+            fingerprints = self._script_fingerprints(repo_local_path, analysis)
+
+        with ThreadPoolExecutor(max_workers=len(self.variants) or 1) as pool:
+            futures = [
+                pool.submit(
+                    self._cast_variant,
+                    v,
+                    repo_local_path,
+                    revision,
+                    analysis,
+                    context,
+                    fingerprints,
+                )
+                for v in self.variants
+            ]
+            self.results = dict(f.result() for f in futures)
+        tools = [t for r in self.results.values() for t in r.pop("tools", [])]
+
+        # Archives are extracted when a variant wrote new outputs; a sparse
+        # clone was checked out afresh and needs the files in any case
+        statuses = {r["status"] for r in self.results.values()}
+        if statuses & {"ok", "degraded"} or (
+            self._is_sparse_clone() and statuses - {"failed"}
+        ):
+            self._materialize_source(repo_local_path, tools)
+
+        failed = [n for n, r in self.results.items() if r["status"] == "failed"]
+        if failed:
+            self.error = f"variants failed: {', '.join(failed)}"
+        self.unchanged = all(r["status"] == "unchanged" for r in self.results.values())
+        self.degraded = [
+            f"{n}: {e}" for n, r in self.results.items() for e in r.get("errors", [])
+        ]
+
+        report = {"shared": self.timer.report(), "variants": self.results}
+        atomic_write(
+            os.path.join(self.output_dir, "variants_report.json"),
+            json.dumps(report, indent=2),
+        )
+        for name, r in self.results.items():
+            print(f"   {name:<28} {r['status']:<10} {r['seconds']:>8.2f}s")
+        return report
@@ -0,0 +1,191 @@
+import os
+import time
+import logging
+
+from .core import RepoCaster
+from .analyzer import RepoAnalyzer
+from .ingest import LINK_SKIP_DIRS, DirectorySource, is_analyzable
+from .fingerprint import analyzable_paths, combine_digests, file_digest
+from .timing import StageTimer
+
+logger = logging.getLogger("RepoCaster.Watch")
+
+
+def snapshot(repo_path, skip=()):
+    """
+    {relative path: (mtime_ns, size)} of the analyzable files under
+    `repo_path`, from one stat per file. VCS data, environments and the
+    real paths in `skip` (e.g. an output directory inside the repository)
+    are not descended into.
+    """
+    files = {}
+    stack = [""]
+    while stack:
+        rel = stack.pop()
+        try:
+            entries = os.scandir(os.path.join(repo_path, rel))
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                path = f"{rel}/{entry.name}" if rel else entry.name
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in LINK_SKIP_DIRS and (
+                            os.path.realpath(entry.path) not in skip
+                        ):
+                            stack.append(path)
+                    elif is_analyzable(entry.name):
+                        stat = entry.stat()
+                        files[path] = (stat.st_mtime_ns, stat.st_size)
+                except OSError:
+                    continue
+    return files
+
+
+def diff(old, new):
+    """Sorted paths added, removed or modified between two snapshots."""
+    return sorted(p for p in old.keys() | new.keys() if old.get(p) != new.get(p))
+
+
+class WatchCaster(RepoCaster):
+    """
+    RepoCaster for repeated casts of one local repository. The AST analysis
+    and content digest are kept per file, and only files whose mtime or size
+    changed are parsed and hashed again; the rest of the pipeline relies on
+    the fingerprint and incremental-tool caches, so an edit to one script
+    regenerates one tool.
+    """
+
+    def __init__(self, repo_url, **options):
+        super().__init__(repo_url, **options)
+        # {relative path: ((mtime_ns, size), RepoAnalyzer.analyze_file result)}
+        self.file_analysis = {}
+        # {relative path: ((mtime_ns, size), fingerprint.file_digest)}
+        self.file_digests = {}
+
+    def _revision(self, repo_local_path):
+        if self.revision or self.source is not None:
+            return super()._revision(repo_local_path)
+        source = DirectorySource(repo_local_path)
+        digests = {}
+        hashed = 0
+        for rel_path in analyzable_paths(source):
+            try:
+                stat = os.stat(os.path.join(repo_local_path, rel_path))
+                key = (stat.st_mtime_ns, stat.st_size)
+                cached = self.file_digests.get(rel_path)
+                if cached is None or cached[0] != key:
+                    cached = (key, file_digest(source.read_bytes(rel_path)))
+                    hashed += 1
+            except OSError:
+                continue
+            digests[rel_path] = cached
+        self.file_digests = digests
+        logger.info(f"🔍 [Watch] Hashed {hashed} of {len(digests)} files")
+        return "content:" + combine_digests(
+            {path: cached[1] for path, cached in digests.items()}
+        )
+
+    def _analyze(self, repo_local_path, revision):
+        if self.source is not None:
+            return super()._analyze(repo_local_path, revision)
+        analyzer = RepoAnalyzer(DirectorySource(repo_local_path))
+        results = {"scripts": [], "library": []}
+        seen = set()
+        parsed = 0
+        for root, _, files in analyzer.source.walk():
+            for file in files:
+                if not file.endswith(".py"):
+                    continue
+                rel_path = os.path.join(root, file) if root else file
+                stat = os.stat(os.path.join(repo_local_path, rel_path))
+                key = (stat.st_mtime_ns, stat.st_size)
+                cached = self.file_analysis.get(rel_path)
+                if cached is None or cached[0] != key:
+                    cached = (key, analyzer.analyze_file(rel_path))
+                    self.file_analysis[rel_path] = cached
+                    parsed += 1
+                seen.add(rel_path)
+                results["scripts"].extend(cached[1]["scripts"])
+                results["library"].extend(cached[1]["library"])
+        for rel_path in set(self.file_analysis) - seen:
+            del self.file_analysis[rel_path]
+        logger.info(f"🔍 [Watch] Parsed {parsed} of {len(seen)} Python files")
+        return results
+
+
+class RepoWatcher:
+    """
+    Poll a local repository and recast it whenever its code or READMEs
+    change. A burst of saves is debounced into one update: after the first
+    change, the tree must stay unchanged for `debounce` seconds.
+    """
+
+    def __init__(self, caster: WatchCaster, interval=1.0, debounce=0.5):
+        self.caster = caster
+        self.interval = interval
+        self.debounce = debounce
+        # Never react to our own outputs when they live inside the repository
+        self.skip = {os.path.realpath(caster.output_dir)}
+        # Per-update {"seconds", "changed", "stages"}
+        self.updates = []
+
+    def _snapshot(self):
+        return snapshot(self.caster.repo_url, self.skip)
+
+    def _settle(self, current):
+        while True:
+            time.sleep(self.debounce)
+            latest = self._snapshot()
+            if latest == current:
+                return current
+            current = latest
+
+    def _update(self, changed):
+        self.caster.timer = StageTimer()
+        started = time.perf_counter()
+        self.caster.cast()
+        seconds = time.perf_counter() - started
+        stages = self.caster.timer.report()
+        self.updates.append(
+            {"seconds": round(seconds, 3), "changed": changed, "stages": stages}
+        )
+        if self.caster.error:
+            status = f"failed ({self.caster.error})"
+        elif self.caster.unchanged:
+            status = "unchanged"
+        elif self.caster.degraded:
+            status = f"degraded ({len(self.caster.degraded)} step(s) fell back)"
+        else:
+            status = "updated"
+        breakdown = ", ".join(
+            f"{name} {s['seconds']:.2f}s" for name, s in stages.items()
+        )
+        print(f"⏱️ [Watch] {status} in {seconds:.2f}s ({breakdown})")
+
+    def run(self, max_updates=None):
+        """
+        Cast once, then recast on every settled change (Ctrl+C stops).
+        `max_updates` limits the change-triggered recasts.
+        """
+        print(f"👀 Watching {self.caster.repo_url} (every {self.interval}s)...")
+        previous = self._snapshot()
+        self._update([])
+        recasts = 0
+        try:
+            while max_updates is None or recasts < max_updates:
+                time.sleep(self.interval)
+                current = self._snapshot()
+                if current == previous:
+                    continue
+                current = self._settle(current)
+                changed = diff(previous, current)
+                shown = ", ".join(changed[:5]) + (" ..." if len(changed) > 5 else "")
+                print(f"✏️ [Watch] {len(changed)} changed: {shown}")
+                previous = current
+                self._update(changed)
+                recasts += 1
+        except KeyboardInterrupt:
+            print("👋 Stopped watching.")
+        return self.updates
@@ -0,0 +1,326 @@
+"""
+Warm worker pool for generated MCP servers.
+
+This file is standalone (standard library only): RepoCaster copies it next
+to `server.py` when casting with `--worker_pool`. Instead of paying
+interpreter startup and heavy imports (torch, model code) on every tool
+call, `WorkerPool` keeps pre-started worker processes that have already
+imported what the target scripts import, and runs each script in a worker
+with `runpy` as `__main__`, with `sys.argv` set from the command:
+
+    pool = WorkerPool(scripts=["protein_mpnn_run.py"])
+    pool.start()  # under `if __name__ == "__main__":`
+    result = pool.run(["python", "protein_mpnn_run.py", "--seed", "37"], cwd=repo_dir)
+    result.returncode, result.stdout, result.stderr
+
+`run()` mirrors `subprocess.run(cmd, capture_output=True, text=True)` and
+returns a `subprocess.CompletedProcess`. Commands that are not
+`python <script.py> ...` fall back to `subprocess.run`. Workers are
+replaced after `max_calls` calls, once their resident memory exceeds
+`max_rss_mb`, when they crash, or when a call times out.
+
+Environment overrides: REPOCASTER_POOL_WORKERS, REPOCASTER_POOL_MAX_CALLS,
+REPOCASTER_POOL_MAX_RSS_MB, REPOCASTER_POOL_PRELOAD (comma-separated
+modules), and REPOCASTER_POOL_DISABLE=1 to always use subprocess.
+"""
+
+import os
+import ast
+import sys
+import queue
+import runpy
+import atexit
+import asyncio
+import logging
+import tempfile
+import threading
+import traceback
+import subprocess
+import multiprocessing
+
+logger = logging.getLogger("RepoCaster.WorkerPool")
+
+PYTHON_NAMES = {"python", "python3", os.path.basename(sys.executable)}
+
+
+def script_imports(path):
+    """Absolute module names imported anywhere in the Python file `path`."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=path)
+    except (OSError, SyntaxError, ValueError):
+        return []
+    modules = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules.append(node.module)
+    return sorted(set(modules))
+
+
+def _preload(modules, paths):
+    for path in paths:
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    for module in modules:
+        try:
+            __import__(module)
+        except BaseException:
+            # A missing or broken import only costs warmth
+            pass
+
+
+def _rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        import resource
+
+        # Peak rather than current RSS where /proc is unavailable (macOS: bytes)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def _exit_code(e: SystemExit):
+    if e.code is None:
+        return 0
+    if isinstance(e.code, int):
+        return e.code
+    print(e.code, file=sys.stderr)
+    return 1
+
+
+def _run_in_worker(script, args, cwd):
+    """Run `script` as __main__ with fd-level capture of stdout and stderr."""
+    cwd = cwd or os.getcwd()
+    script_path = os.path.join(cwd, script)
+    saved_argv, saved_path, saved_cwd = sys.argv, sys.path[:], os.getcwd()
+    saved_fds = os.dup(1), os.dup(2)
+    with tempfile.TemporaryFile() as out, tempfile.TemporaryFile() as err:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.dup2(out.fileno(), 1)
+        os.dup2(err.fileno(), 2)
+        try:
+            os.chdir(cwd)
+            sys.argv = [script_path, *args]
+            sys.path.insert(0, os.path.dirname(os.path.abspath(script_path)))
+            try:
+                runpy.run_path(script_path, run_name="__main__")
+                code = 0
+            except SystemExit as e:
+                code = _exit_code(e)
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os.dup2(saved_fds[0], 1)
+            os.dup2(saved_fds[1], 2)
+            for fd in saved_fds:
+                os.close(fd)
+            sys.argv, sys.path[:] = saved_argv, saved_path
+            os.chdir(saved_cwd)
+        out.seek(0)
+        err.seek(0)
+        return (
+            code,
+            out.read().decode("utf-8", errors="replace"),
+            err.read().decode("utf-8", errors="replace"),
+        )
+
+
+def _worker_main(conn, modules, paths, max_calls, max_rss_mb):
+    _preload(modules, paths)
+    conn.send("ready")
+    calls = 0
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            return
+        if request is None:
+            return
+        result = _run_in_worker(*request)
+        calls += 1
+        retire = calls >= max_calls or bool(max_rss_mb and _rss_mb() > max_rss_mb)
+        conn.send((result, retire))
+        if retire:
+            return
+
+
+class _Worker:
+    def __init__(self, context, modules, paths, max_calls, max_rss_mb):
+        self.conn, child = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child, modules, paths, max_calls, max_rss_mb),
+            daemon=True,
+        )
+        self.process.start()
+        child.close()
+        self.ready = False
+
+    def wait_ready(self, timeout=None):
+        if not self.ready:
+            if not self.conn.poll(timeout):
+                raise TimeoutError("worker did not start in time")
+            self.conn.recv()
+            self.ready = True
+
+    def stop(self, kill=False):
+        try:
+            if kill:
+                self.process.kill()
+            else:
+                self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+        self.conn.close()
+
+
+class WorkerPool:
+    """
+    `workers` warm processes for running Python scripts. Pass the `scripts`
+    the tools run (relative to `root`, default the working directory) so
+    their imports are loaded before the first call; `preload` adds more
+    modules. With the "forkserver" start method (Linux), the modules are
+    imported once in the fork server and replacement workers start warm.
+    """
+
+    def __init__(
+        self,
+        scripts=(),
+        root=None,
+        workers=None,
+        max_calls=None,
+        max_rss_mb=None,
+        preload=(),
+        start_timeout=600,
+    ):
+        env = os.environ
+        self.disabled = env.get("REPOCASTER_POOL_DISABLE") == "1"
+        self.workers = int(env.get("REPOCASTER_POOL_WORKERS", workers or 2))
+        self.max_calls = int(env.get("REPOCASTER_POOL_MAX_CALLS", max_calls or 100))
+        self.max_rss_mb = float(
+            env.get("REPOCASTER_POOL_MAX_RSS_MB", max_rss_mb or 4096)
+        )
+        self.start_timeout = start_timeout
+        root = root or os.getcwd()
+        self.paths = sorted(
+            {os.path.dirname(os.path.join(root, s)) or root for s in scripts}
+        )
+        modules = set(preload)
+        modules.update(
+            m for m in env.get("REPOCASTER_POOL_PRELOAD", "").split(",") if m
+        )
+        for script in scripts:
+            modules.update(script_imports(os.path.join(root, script)))
+        self.modules = sorted(modules)
+
+        self.idle = queue.Queue()
+        self.lock = threading.Lock()
+        self.started = False
+        self.closed = False
+        self.context = None
+
+    def start(self):
+        """
+        Start the workers (the first run() does it otherwise). Call it under
+        `if __name__ == "__main__":`: workers re-import the main module, and
+        must not start pools of their own.
+        """
+        with self.lock:
+            if self.started or self.disabled or self.closed:
+                return
+            self.started = True
+            if "forkserver" in multiprocessing.get_all_start_methods():
+                self.context = multiprocessing.get_context("forkserver")
+                for path in self.paths:
+                    if path not in sys.path:
+                        sys.path.append(path)
+                self.context.set_forkserver_preload(
+                    [m for m in self.modules if m != "__main__"]
+                )
+            else:
+                self.context = multiprocessing.get_context("spawn")
+            for _ in range(self.workers):
+                self.idle.put(self._spawn())
+            atexit.register(self.close)
+
+    def _spawn(self):
+        return _Worker(
+            self.context, self.modules, self.paths, self.max_calls, self.max_rss_mb
+        )
+
+    def _replace(self, worker, kill=False):
+        worker.stop(kill=kill)
+        if not self.closed:
+            self.idle.put(self._spawn())
+
+    @staticmethod
+    def _split(cmd):
+        if (
+            len(cmd) >= 2
+            and os.path.basename(str(cmd[0])) in PYTHON_NAMES
+            and str(cmd[1]).endswith(".py")
+        ):
+            return str(cmd[1]), [str(a) for a in cmd[2:]]
+        return None
+
+    def run(self, cmd, cwd=None, timeout=None, check=False):
+        """Like subprocess.run(cmd, capture_output=True, text=True, cwd=cwd, ...)."""
+        target = self._split(cmd)
+        if self.disabled or self.closed or target is None:
+            return subprocess.run(
+                cmd,
+                capture_output=True,
+                text=True,
+                cwd=cwd,
+                timeout=timeout,
+                check=check,
+            )
+
+        self.start()
+        worker = self.idle.get()
+        try:
+            worker.wait_ready(self.start_timeout)
+            worker.conn.send((target[0], target[1], cwd))
+            if not worker.conn.poll(timeout):
+                self._replace(worker, kill=True)
+                raise subprocess.TimeoutExpired(cmd, timeout)
+            (code, stdout, stderr), retire = worker.conn.recv()
+        except (EOFError, OSError, TimeoutError) as e:
+            # The worker died (e.g. a segfault or OOM kill): replace it
+            self._replace(worker, kill=True)
+            result = subprocess.CompletedProcess(cmd, -1, "", f"Worker failed: {e}")
+        else:
+            if retire:
+                self._replace(worker)
+            else:
+                self.idle.put(worker)
+            result = subprocess.CompletedProcess(cmd, code, stdout, stderr)
+        if check:
+            result.check_returncode()
+        return result
+
+    async def run_async(self, cmd, cwd=None, timeout=None, check=False):
+        """run() without blocking the event loop."""
+        return await asyncio.to_thread(self.run, cmd, cwd, timeout, check)
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        while True:
+            try:
+                worker = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            worker.stop()
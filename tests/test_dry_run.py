@@ -0,0 +1,36 @@
+import json
+import os
+
+from fixtures import FIXTURES
+from repocaster.analyzer import RepoAnalyzer
+from repocaster.dry_run import dry_run
+from repocaster.ingest import open_source
+
+
+def prompt_files(out_dir):
+    return sorted(os.listdir(os.path.join(out_dir, "prompts")))
+
+
+def test_dry_run_replaces_prompts_and_estimates_workflows(tmp_path):
+    repo = FIXTURES["proteinmpnn_like"](str(tmp_path / "repo"))
+    analysis = RepoAnalyzer(open_source(repo)).analyze()
+    out_dir = str(tmp_path / "dry_run")
+
+    dry_run(repo, "ProteinMPNN", analysis, out_dir)
+    first = prompt_files(out_dir)
+    assert any(".workflow_" in name for name in first)
+
+    # Fewer scripts: fewer tool and workflow sections than the first run
+    fewer = dict(analysis, scripts=analysis["scripts"][:1])
+    dry_run(repo, "ProteinMPNN", fewer, out_dir)
+    second = prompt_files(out_dir)
+
+    assert len(second) < len(first)
+    assert not [
+        p for p in os.listdir(tmp_path / "dry_run") if ".tmp." in p or ".old." in p
+    ]
+    with open(os.path.join(out_dir, "estimate.json")) as f:
+        estimate = json.load(f)
+    assert estimate["nodes"]["doc_writer"]["calls"] == sum(
+        "doc_writer" in name for name in second
+    )
@@ -0,0 +1,75 @@
+import time
+from typing import Any, List
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from repocaster.hedging import LatencyStore
+from repocaster.llm import HedgedChatModel
+
+
+class FakeStreamModel(BaseChatModel):
+    """Streams `text` word by word after `delay` seconds (or raises `error`)."""
+
+    text: str
+    delay: float = 0.0
+    error: Any = None
+    calls: List = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-stream"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(self.text))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls.append(time.monotonic())
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        for word in self.text.split(" "):
+            yield ChatGenerationChunk(message=AIMessageChunk(word + " "))
+
+
+def hedged(tmp_path, primary, secondary):
+    return HedgedChatModel(
+        primary=primary,
+        secondary=secondary,
+        node="generate",
+        model="fake",
+        fallback_delay=0.1,
+        store=LatencyStore(str(tmp_path)),
+    )
+
+
+def streamed(llm):
+    return "".join(chunk.content for chunk in llm.stream("hi")).strip()
+
+
+def test_slow_stream_is_won_by_secondary(tmp_path):
+    llm = hedged(
+        tmp_path,
+        FakeStreamModel(text="slow primary", delay=2.0, calls=[]),
+        FakeStreamModel(text="fast secondary", calls=[]),
+    )
+    started = time.monotonic()
+    assert streamed(llm) == "fast secondary"
+    assert time.monotonic() - started < 1.0
+
+
+def test_fast_stream_never_sends_secondary(tmp_path):
+    secondary = FakeStreamModel(text="secondary", calls=[])
+    llm = hedged(tmp_path, FakeStreamModel(text="primary answer", calls=[]), secondary)
+    assert streamed(llm) == "primary answer"
+    assert secondary.calls == []
+
+
+def test_failed_stream_falls_over_to_secondary(tmp_path):
+    llm = hedged(
+        tmp_path,
+        FakeStreamModel(text="", error=ValueError("bad request"), calls=[]),
+        FakeStreamModel(text="secondary answer", calls=[]),
+    )
+    assert streamed(llm) == "secondary answer"
@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+from fixtures import FIXTURES
+from stub_server import start_stub_server
+from repocaster.core import RepoCaster
+from repocaster.deep_agent import DeepRepoAgent
+
+
+@pytest.fixture
+def stub_url():
+    server, _, url = start_stub_server()
+    yield url
+    server.shutdown()
+
+
+@pytest.fixture
+def full_runs(monkeypatch):
+    """Count the casts that ran the whole agent graph."""
+    runs = []
+    run = DeepRepoAgent.run
+
+    def counted(self):
+        runs.append(self)
+        return run(self)
+
+    monkeypatch.setattr(DeepRepoAgent, "run", counted)
+    return runs
+
+
+def cast(repo, out, url):
+    caster = RepoCaster(
+        str(repo),
+        output_dir=str(out),
+        model_name="stub",
+        model_url=url,
+        model_api_key="x",
+    )
+    caster.cast()
+    assert caster.error is None and not caster.degraded
+    return caster
+
+
+def append(path, text):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(text)
+
+
+def test_script_edit_updates_incrementally(tmp_path, stub_url, full_runs):
+    repo = FIXTURES["proteinmpnn_like"](str(tmp_path / "repo"))
+    cast(repo, tmp_path / "out", stub_url)
+    append(os.path.join(repo, "protein_mpnn_run.py"), "\n# tweak\n")
+    cast(repo, tmp_path / "out", stub_url)
+    assert len(full_runs) == 1
+
+
+def test_readme_edit_reruns_full_graph(tmp_path, stub_url, full_runs):
+    repo = FIXTURES["proteinmpnn_like"](str(tmp_path / "repo"))
+    cast(repo, tmp_path / "out", stub_url)
+    append(os.path.join(repo, "README.md"), "\nNew usage notes.\n")
+    cast(repo, tmp_path / "out", stub_url)
+    assert len(full_runs) == 2
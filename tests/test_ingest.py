@@ -0,0 +1,69 @@
+import io
+import tarfile
+import zipfile
+
+import pytest
+
+from repocaster.ingest import ArchiveSource
+
+TOOLS = [
+    {
+        "tool_name": "predict",
+        "script_path": "predict.py",
+        "args": [{"name": "weights", "default": "weights/model.pt"}],
+    }
+]
+
+MEMBERS = {
+    "demo/predict.py": b"print('predict')\n",
+    "demo/README.md": b"# Demo\n",
+    "demo/weights/model.pt": b"w" * 1000,
+    "demo/weights/unused.pt": b"u" * 3_000_000,
+    "demo/data/big.bin": b"d" * 3_000_000,
+}
+
+
+def write_tar(path):
+    with tarfile.open(path, "w:gz") as archive:
+        for name, data in MEMBERS.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+
+
+def write_zip(path):
+    with zipfile.ZipFile(path, "w") as archive:
+        for name, data in MEMBERS.items():
+            archive.writestr(name, data)
+
+
+def files(root):
+    return sorted(
+        p.relative_to(root).as_posix() for p in root.rglob("*") if p.is_file()
+    )
+
+
+@pytest.mark.parametrize(
+    "name, write", [("repo.tar.gz", write_tar), ("repo.zip", write_zip)]
+)
+def test_materialize_skips_unneeded_members(tmp_path, name, write):
+    write(tmp_path / name)
+    source = ArchiveSource(str(tmp_path / name))
+    target = tmp_path / "repo_source"
+
+    count = source.materialize(str(target), source.needed_paths(TOOLS))
+
+    assert count == 3
+    assert files(target) == ["README.md", "predict.py", "weights/model.pt"]
+    assert (target / "weights/model.pt").read_bytes() == MEMBERS[
+        "demo/weights/model.pt"
+    ]
+
+
+def test_materialize_everything_on_request(tmp_path):
+    write_tar(tmp_path / "repo.tar.gz")
+    source = ArchiveSource(str(tmp_path / "repo.tar.gz"))
+    target = tmp_path / "repo_source"
+
+    assert source.materialize(str(target)) == len(MEMBERS)
+    assert (target / "data/big.bin").stat().st_size == 3_000_000
@@ -0,0 +1,60 @@
+from langchain_core.runnables import RunnableLambda
+
+from repocaster.blobs import BlobStore
+from repocaster.deep_agent import CodeGenerator, DocWriter
+
+TOOL = {
+    "tool_name": "run_model",
+    "description": "Run the model",
+    "script_path": "run.py",
+    "arguments": [],
+}
+
+
+def fake_llm(text):
+    return RunnableLambda(lambda _: text)
+
+
+def state(work_dir):
+    return {
+        "repo_name": "demo",
+        "refined_tools": [TOOL],
+        "identified_workflows": [],
+        "langgraph_style": False,
+        "worker_pool": False,
+        "work_dir": str(work_dir),
+    }
+
+
+def test_generator_reuses_artifact_of_same_model(tmp_path):
+    blobs = BlobStore(None)
+    model = {"model_name": "model-a"}
+    first = CodeGenerator(fake_llm("code_a"), blobs, model=model)(state(tmp_path))
+    again = CodeGenerator(fake_llm("code_b"), blobs, model=model)(state(tmp_path))
+    assert blobs.get(first["server_code_ref"]) == "code_a"
+    assert blobs.get(again["server_code_ref"]) == "code_a"
+
+
+def test_generator_regenerates_for_other_model(tmp_path):
+    blobs = BlobStore(None)
+    CodeGenerator(fake_llm("code_a"), blobs, model={"model_name": "model-a"})(
+        state(tmp_path)
+    )
+    result = CodeGenerator(fake_llm("code_b"), blobs, model={"model_name": "model-b"})(
+        state(tmp_path)
+    )
+    assert blobs.get(result["server_code_ref"]) == "code_b"
+
+
+def test_doc_sections_regenerate_for_other_model(tmp_path):
+    blobs = BlobStore(None)
+    st = state(tmp_path)
+    sections = DocWriter.plan_sections(st)
+    DocWriter(fake_llm("old"), blobs, model={"model_name": "model-a"}).write_sections(
+        st, sections
+    )
+    written, errors = DocWriter(
+        fake_llm("new"), blobs, model={"model_name": "model-b"}
+    ).write_sections(st, sections)
+    assert not errors
+    assert [body for _, body in written] == ["new"] * len(sections)
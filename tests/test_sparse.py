@@ -0,0 +1,83 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from repocaster.ingest import fetch_referenced, referenced_paths
+from repocaster.mirrors import sparse_clone
+
+TOOLS = [
+    {
+        "tool_name": "predict",
+        "script_path": "tools/predict.py",
+        "args": [
+            {"name": "weights", "default": "../weights/model.pt"},
+            {"name": "config", "description": "Config file, e.g. configs/small.yaml."},
+        ],
+    }
+]
+
+FILES = {
+    "tools/predict.py": "print('predict')\n",
+    "tools/vocab.txt": "a b c\n",
+    "weights/model.pt": "w" * 1000,
+    "configs/small.yaml": "size: 1\n",
+    "data/big.bin": "d" * 100000,
+    "README.md": "# Demo\n",
+}
+
+
+def git(*args, cwd=None):
+    subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True)
+
+
+@pytest.fixture
+def remote(tmp_path):
+    """A local repository served with partial-clone support over file://."""
+    if shutil.which("git") is None:
+        pytest.skip("git is not installed")
+    origin = tmp_path / "origin"
+    for rel_path, content in FILES.items():
+        path = origin / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+    git("init", "-q", str(origin))
+    git("add", "-A", cwd=origin)
+    git(
+        "-c",
+        "user.name=test",
+        "-c",
+        "user.email=test@example.com",
+        "commit",
+        "-qm",
+        "init",
+        cwd=origin,
+    )
+    git("config", "uploadpack.allowFilter", "true", cwd=origin)
+    git("config", "uploadpack.allowAnySHA1InWant", "true", cwd=origin)
+    return f"file://{origin}"
+
+
+def test_referenced_paths():
+    needed = referenced_paths(TOOLS, FILES)
+    assert needed == {
+        "tools/predict.py",
+        "tools/vocab.txt",
+        "weights/model.pt",
+        "configs/small.yaml",
+    }
+
+
+def test_sparse_clone_fetches_referenced_files_lazily(tmp_path, remote):
+    checkout = tmp_path / "checkout"
+    sparse_clone(remote, str(checkout))
+    assert (checkout / "tools/predict.py").exists()
+    assert not (checkout / "weights/model.pt").exists()
+
+    fetched = fetch_referenced(str(checkout), TOOLS)
+
+    assert fetched == ["configs/small.yaml", "tools/vocab.txt", "weights/model.pt"]
+    for rel_path in fetched:
+        assert (checkout / rel_path).read_text() == FILES[rel_path]
+    assert not (checkout / "data/big.bin").exists()